@@ -0,0 +1,57 @@
+"""
+Benchmark of `features.extract_hsv_stats`.
+
+Compares the per-image conversion with skimage's float64 `rgb2hsv`, which
+`extract_hsv_stats` used to run once per image, with the batch engine
+that converts whole chunks of images at once.
+
+Usage: python benchmarks/bench_hsv_stats.py [--n-samples 100000] [--size 32]
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+import numpy as np
+from skimage import color
+
+from mosaic import features
+
+
+def per_image_hsv_stats(images):
+    """The per image loop of extract_hsv_stats before the batch engine."""
+    return np.vstack([color.rgb2hsv(image).reshape(-1, 3).mean(axis=0)
+                      for image in images])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-samples', type=int, default=100000)
+    parser.add_argument('--size', type=int, default=32)
+    parser.add_argument('--n-jobs', type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.RandomState(0)
+    images = rng.randint(0, 256, size=(args.n_samples, args.size,
+                                       args.size, 3)).astype(np.uint8)
+
+    # the per image loop is timed on a subset and extrapolated.
+    n_subset = min(args.n_samples, 2000)
+    tic = time.perf_counter()
+    expected = per_image_hsv_stats(images[:n_subset])
+    per_image = (time.perf_counter() - tic) * args.n_samples / n_subset
+
+    tic = time.perf_counter()
+    hsv = features.extract_hsv_stats(images, n_jobs=args.n_jobs)
+    batch = time.perf_counter() - tic
+
+    print('{} images of {}x{}'.format(args.n_samples, args.size, args.size))
+    print('per image: {:.2f}s (extrapolated from {} images)'.format(
+        per_image, n_subset))
+    print('batch:     {:.2f}s'.format(batch))
+    print('max abs difference: {:.2e}'.format(
+        np.abs(hsv[:n_subset] - expected).max()))
+
+
+if __name__ == '__main__':
+    main()
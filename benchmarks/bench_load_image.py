@@ -0,0 +1,76 @@
+"""
+Benchmark of the fast decoding path of `image_io.load_image`.
+
+Decodes large synthetic photos into small thumbnails with the default
+full resolution path and with `fast_decode=True`. The fast path decodes
+JPEGs at a reduced DCT scale and reduces other formats by an integer
+factor before the final LANCZOS resample.
+
+Usage: python benchmarks/bench_load_image.py [--width 4000] [--height 3000]
+"""
+from __future__ import print_function
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image as pil_image
+
+from mosaic import image_io
+
+
+def make_photo(width, height, seed=0):
+    """Smooth gradients plus noise. Compresses like a natural photo."""
+    rng = np.random.RandomState(seed)
+    xx, yy = np.meshgrid(np.linspace(0, 1, width), np.linspace(0, 1, height))
+    img = np.dstack([xx, yy, 1 - xx * yy]) * 200
+    img += rng.normal(scale=20, size=img.shape)
+    return pil_image.fromarray(np.clip(img, 0, 255).astype(np.uint8))
+
+
+def bench(image_loc, image_size, fast_decode, n_repeats):
+    times = []
+    for _ in range(n_repeats):
+        tic = time.perf_counter()
+        img = image_io.load_image(image_loc, image_size=image_size,
+                                  fast_decode=fast_decode, cache=False)
+        times.append(time.perf_counter() - tic)
+    return np.median(times), img
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--width', type=int, default=4000)
+    parser.add_argument('--height', type=int, default=3000)
+    parser.add_argument('--n-repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        photo = make_photo(args.width, args.height)
+        image_files = {}
+        for fmt in ('jpeg', 'png'):
+            image_files[fmt] = os.path.join(tmp_dir, 'photo.' + fmt)
+            photo.save(image_files[fmt], quality=90)
+
+        print('{:>6} {:>6} {:>12} {:>12} {:>8} {:>10}'.format(
+            'format', 'size', 'default (s)', 'fast (s)', 'speedup',
+            'max diff'))
+        for fmt, image_loc in sorted(image_files.items()):
+            for image_size in (40, 64, 256):
+                slow, slow_img = bench(image_loc, image_size, False,
+                                       args.n_repeats)
+                fast, fast_img = bench(image_loc, image_size, True,
+                                       args.n_repeats)
+                max_diff = np.abs(slow_img.astype(int) - fast_img).max()
+                print('{:>6} {:>6} {:>12.4f} {:>12.4f} {:>7.1f}x {:>10}'.format(
+                    fmt, image_size, slow, fast, slow / fast, max_diff))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark of the shared memory output buffer of `image_io.load_images`.
+
+Compares the default path, where every joblib worker pickles its image
+back to the parent before `np.stack`, with `shared_memory=True`, where
+the workers decode directly into a preallocated buffer. Each
+configuration runs in a fresh interpreter so that the reported peak
+resident memory of the parent process is not polluted by earlier runs.
+
+Usage: python benchmarks/bench_load_images_shared.py [--n-jobs -1]
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image as pil_image
+
+
+# (name, number of images, width, height, format)
+DATASETS = [
+    ('mnist', 20000, 28, 28, 'png'),
+    ('photo', 500, 1024, 768, 'jpeg'),
+]
+
+
+def make_dataset(image_dir, n_images, width, height, fmt, seed=0):
+    rng = np.random.RandomState(seed)
+    image_files = []
+    for index in range(n_images):
+        img = rng.randint(0, 255, size=(height, width, 3)).astype(np.uint8)
+        image_file = os.path.join(image_dir, 'img_{}.{}'.format(index, fmt))
+        pil_image.fromarray(img).save(image_file)
+        image_files.append(image_file)
+    return image_files
+
+
+def run(image_dir, shared_memory, n_jobs):
+    from mosaic import image_io
+
+    image_files = sorted(os.path.join(image_dir, f) for
+                         f in os.listdir(image_dir))
+    tic = time.perf_counter()
+    images = image_io.load_images(image_files,
+                                  shared_memory=shared_memory,
+                                  n_jobs=n_jobs,
+                                  cache=False)
+    elapsed = time.perf_counter() - tic
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.
+    print(json.dumps({'time': elapsed, 'max_rss_mb': max_rss,
+                      'nbytes_mb': images.nbytes / 1024. ** 2}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--run', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        image_dir, shared_memory = args.run
+        return run(image_dir, shared_memory == 'True', args.n_jobs)
+
+    print('{:>6} {:>8} {:>10} {:>14} {:>12}'.format(
+        'data', 'shared', 'time (s)', 'peak rss (MB)', 'output (MB)'))
+    for name, n_images, width, height, fmt in DATASETS:
+        image_dir = tempfile.mkdtemp()
+        try:
+            make_dataset(image_dir, n_images, width, height, fmt)
+            for shared_memory in (False, True):
+                output = subprocess.check_output(
+                    [sys.executable, __file__,
+                     '--n-jobs', str(args.n_jobs),
+                     '--run', image_dir, str(shared_memory)])
+                result = json.loads(output.decode('utf-8').splitlines()[-1])
+                print('{:>6} {:>8} {:>10.2f} {:>14.1f} {:>12.1f}'.format(
+                    name, str(shared_memory), result['time'],
+                    result['max_rss_mb'], result['nbytes_mb']))
+        finally:
+            shutil.rmtree(image_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark of the image to grid cell assignment of `scatter_grid`.
+
+Compares the original greedy loop over a full distance matrix with the
+assignment strategies of `assign_grid_cells`. Layout quality is the mean
+distance between a grid cell and the point of the image placed in it
+(lower is better). The original loop keeps placing image 0 once all
+images are used, so the number of distinct images is reported as well.
+
+Usage: python benchmarks/bench_scatter_grid.py [--sizes 1000 5000 100000]
+"""
+from __future__ import print_function
+
+import argparse
+import time
+
+import numpy as np
+import sklearn.metrics as metrics
+
+from mosaic.grid.scatter_grid import assign_grid_cells, grid_points
+
+
+# the distance matrix of the original loop takes 8 * n^2 bytes.
+MAX_SIZE_ORIGINAL = 10000
+
+# linear_sum_assignment takes O(n^3) time.
+MAX_SIZE_OPTIMAL = 5000
+
+
+def original_assignment(xy):
+    """The assignment loop of scatter_grid before the strategies were
+    added."""
+    grid_size = int(np.ceil(np.sqrt(len(xy))))
+    grid_1d = np.linspace(0, 1, grid_size)
+    grid_2d = np.dstack(np.meshgrid(grid_1d, grid_1d)).reshape(-1, 2)
+
+    dist = metrics.euclidean_distances(grid_2d, xy)
+    image_order = []
+    for i in range(grid_2d.shape[0]):
+        index = np.argmin(dist[i, :])
+        image_order.append(index)
+        dist[:, index] = np.inf
+    return np.asarray(image_order)
+
+
+def layout_cost(xy, image_order):
+    grid_2d = grid_points(len(image_order))
+    return np.mean(np.linalg.norm(grid_2d - xy[image_order], axis=1))
+
+
+def make_embedding(n_samples, seed=0):
+    """Clustered 2d points scaled to the unit square, similar to a t-SNE
+    embedding."""
+    rng = np.random.RandomState(seed)
+    centers = rng.rand(20, 2)
+    xy = centers[rng.randint(20, size=n_samples)]
+    xy += rng.normal(scale=0.05, size=xy.shape)
+    xy -= xy.min(axis=0)
+    return xy / xy.max(axis=0)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000, 5000, 10000, 100000])
+    args = parser.parse_args()
+
+    print('{:>8} {:>10} {:>10} {:>10} {:>10}'.format(
+        'n', 'method', 'time (s)', 'cost', 'distinct'))
+    for n_samples in args.sizes:
+        xy = make_embedding(n_samples)
+
+        methods = ['kdtree']
+        if n_samples <= MAX_SIZE_ORIGINAL:
+            methods = ['original', 'chunked'] + methods
+        if n_samples <= MAX_SIZE_OPTIMAL:
+            methods.append('optimal')
+
+        for method in methods:
+            tic = time.perf_counter()
+            if method == 'original':
+                image_order = original_assignment(xy)[:n_samples]
+            else:
+                image_order = assign_grid_cells(xy, assignment=method)
+            elapsed = time.perf_counter() - tic
+
+            print('{:>8} {:>10} {:>10.3f} {:>10.4f} {:>10}'.format(
+                n_samples, method, elapsed, layout_cost(xy, image_order),
+                len(np.unique(image_order))))
+
+
+if __name__ == '__main__':
+    main()
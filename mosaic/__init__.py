@@ -4,6 +4,12 @@ from mosaic.grid import *
 from mosaic.barplot import *
 from mosaic.features import *
 from mosaic import image_io
+from mosaic import image_store
+from mosaic import resize
+from mosaic import lazy_images
+from mosaic import manifest
+from mosaic import aio
 from mosaic import data_utils
 from mosaic.contexts import data_context, set_data_context
 from mosaic.datasets import load_dataset
+from mosaic.cache import thumbnail_cache, set_thumbnail_cache
@@ -0,0 +1,289 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import asyncio
+import concurrent.futures
+import functools
+import io
+
+import numpy as np
+
+from mosaic import contexts
+from mosaic import data_utils
+from mosaic import image_io
+from mosaic import image_store
+from mosaic.barplot import image_barplot
+from mosaic.grid import image_grid, scatter_grid
+from mosaic.histogram import image_histogram
+from mosaic.scatter_plot import scatter_plot
+
+
+__all__ = ['load_image_async', 'load_images_async', 'get_images_async',
+           'image_grid_async', 'scatter_grid_async', 'scatter_plot_async',
+           'image_histogram_async', 'image_barplot_async']
+
+
+# pyplot keeps global state and is not thread-safe, so every figure is
+# drawn by the same worker thread.
+_PLOT_EXECUTOR = None
+
+
+def get_plot_executor():
+    """Return the single threaded executor used to draw figures."""
+    global _PLOT_EXECUTOR
+    if _PLOT_EXECUTOR is None:
+        _PLOT_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    return _PLOT_EXECUTOR
+
+
+def read_image_bytes(image_loc):
+    """Read the raw contents of an image file."""
+    with open(image_loc, 'rb') as image_file:
+        return image_file.read()
+
+
+def decode_image_bytes(image_bytes, image_size=None, as_image=False,
+                       dtype=np.uint8, fast_decode=False):
+    """Decode an in-memory image file."""
+    image_size = image_io.check_image_size(image_size)
+    img = image_io.decode_image(io.BytesIO(image_bytes),
+                                image_size=image_size,
+                                fast_decode=fast_decode)
+    if as_image:
+        return img
+
+    return np.asarray(img, dtype)
+
+
+async def load_image_async(image_file,
+                           image_dir='',
+                           image_size=None,
+                           as_image=False,
+                           dtype=np.uint8,
+                           fast_decode=False,
+                           executor=None):
+    """Loads an image from a file on disk without blocking the event loop.
+
+    The file is read and then decoded in `executor`. See
+    :func:`mosaic.image_io.load_image` for a description of the
+    parameters.
+
+    Parameters
+    ----------
+    executor : concurrent.futures.Executor, optional
+        The executor used to read and decode the file. The default uses
+        the event loop's default executor.
+    """
+    loop = asyncio.get_running_loop()
+    image_loc = image_io.image_path(image_file, image_dir=image_dir)
+    image_bytes = await loop.run_in_executor(
+        executor, read_image_bytes, image_loc)
+
+    return await loop.run_in_executor(
+        executor, functools.partial(decode_image_bytes,
+                                    image_bytes,
+                                    image_size=image_size,
+                                    as_image=as_image,
+                                    dtype=dtype,
+                                    fast_decode=fast_decode))
+
+
+async def load_images_async(image_files,
+                            image_dir='',
+                            image_size=None,
+                            as_image=False,
+                            dtype=np.uint8,
+                            fast_decode=False,
+                            max_concurrency=16,
+                            executor=None):
+    """Loads images from disk without blocking the event loop.
+
+    At most `max_concurrency` images are read or decoded at the same time,
+    which bounds the memory used by a single call and lets concurrent
+    calls share the executor fairly.
+
+    Parameters
+    ----------
+    image_files : list of str
+        A list of str pointing to image files on disk.
+    image_dir : str (default='')
+        The directory where the image resides on disk.
+    image_size : tuple (default=None)
+        The target size in pixels. If None then no resizing is performed.
+    as_image : bool (default=False)
+        Whether to return PIL Images instead of a numpy array.
+    dtype : numpy dtype (default=np.uint8)
+        The dtype of the output numpy array.
+    fast_decode : bool (default=False)
+        Whether to decode the images at a reduced resolution before
+        resizing them to `image_size`.
+    max_concurrency : int (default=16)
+        The maximum number of images loaded at the same time.
+    executor : concurrent.futures.Executor, optional
+        The executor used to read and decode the files. The default uses
+        the event loop's default executor.
+
+    Examples
+    --------
+    >>> async def handler(request):
+    >>>     images = await ms.aio.load_images_async(image_files,
+    >>>                                             image_size=50)
+    """
+    image_files = list(image_files)
+    images = [None] * len(image_files)
+    pending = iter(enumerate(image_files))
+
+    async def worker():
+        for index, image_file in pending:
+            images[index] = await load_image_async(image_file,
+                                                   image_dir=image_dir,
+                                                   image_size=image_size,
+                                                   as_image=as_image,
+                                                   dtype=dtype,
+                                                   fast_decode=fast_decode,
+                                                   executor=executor)
+
+    n_workers = max(1, min(max_concurrency, len(image_files)))
+    workers = [asyncio.ensure_future(worker()) for _ in range(n_workers)]
+    try:
+        await asyncio.gather(*workers)
+    except BaseException:
+        for task in workers:
+            task.cancel()
+        raise
+
+    if as_image:
+        return images
+
+    return np.stack(images, axis=0)
+
+
+async def get_images_async(data, images,
+                           image_dir='',
+                           image_size=None,
+                           as_image=False,
+                           index=None,
+                           max_concurrency=16,
+                           executor=None):
+    """Awaitable version of :func:`mosaic.data_utils.get_images`."""
+    if images is None:
+        images = contexts.get_image_data()
+
+    if isinstance(images, (np.ndarray, image_store.ImageStore)):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(data_utils.get_images,
+                                        data, images,
+                                        image_size=image_size,
+                                        as_image=as_image,
+                                        index=index))
+
+    if not image_dir:
+        image_dir = contexts.get_image_dir()
+
+    image_files = data_utils.get_image_files(data, images, index=index)
+
+    return await load_images_async(image_files,
+                                   image_dir=image_dir,
+                                   image_size=image_size,
+                                   as_image=as_image,
+                                   max_concurrency=max_concurrency,
+                                   executor=executor)
+
+
+async def plot_async(plot_func, *args, **kwargs):
+    """Load the images of a plot asynchronously and draw it on the plotting
+    thread. Keyword arguments not used to load the images are passed to
+    `plot_func`."""
+    data = kwargs.pop('data', None)
+    images = await get_images_async(
+        data, kwargs.pop('images', None),
+        image_dir=kwargs.pop('image_dir', ''),
+        image_size=kwargs.pop('image_size', None),
+        max_concurrency=kwargs.pop('max_concurrency', 16),
+        executor=kwargs.pop('executor', None))
+
+    # the images are already resized.
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_plot_executor(), functools.partial(plot_func, *args,
+                                               images=images,
+                                               data=data,
+                                               image_size=None,
+                                               **kwargs))
+
+
+async def image_grid_async(images=None, data=None, image_dir='',
+                           image_size=None, max_concurrency=16,
+                           executor=None, **kwargs):
+    """Awaitable version of :func:`mosaic.image_grid`.
+
+    Images are loaded with at most `max_concurrency` files in flight using
+    `executor`. The remaining keyword arguments are passed to
+    :func:`mosaic.image_grid`.
+    """
+    return await plot_async(image_grid, images=images, data=data,
+                            image_dir=image_dir, image_size=image_size,
+                            max_concurrency=max_concurrency,
+                            executor=executor, **kwargs)
+
+
+async def scatter_grid_async(x, y, images=None, data=None, image_dir='',
+                             image_size=None, max_concurrency=16,
+                             executor=None, **kwargs):
+    """Awaitable version of :func:`mosaic.scatter_grid`.
+
+    Images are loaded with at most `max_concurrency` files in flight using
+    `executor`. The remaining keyword arguments are passed to
+    :func:`mosaic.scatter_grid`.
+    """
+    return await plot_async(scatter_grid, x, y, images=images, data=data,
+                            image_dir=image_dir, image_size=image_size,
+                            max_concurrency=max_concurrency,
+                            executor=executor, **kwargs)
+
+
+async def scatter_plot_async(x, y, images=None, data=None, image_dir='',
+                             image_size=None, max_concurrency=16,
+                             executor=None, **kwargs):
+    """Awaitable version of :func:`mosaic.scatter_plot`.
+
+    Images are loaded with at most `max_concurrency` files in flight using
+    `executor`. The remaining keyword arguments are passed to
+    :func:`mosaic.scatter_plot`.
+    """
+    return await plot_async(scatter_plot, x, y, images=images, data=data,
+                            image_dir=image_dir, image_size=image_size,
+                            max_concurrency=max_concurrency,
+                            executor=executor, **kwargs)
+
+
+async def image_histogram_async(x, images=None, data=None, image_dir='',
+                                image_size=None, max_concurrency=16,
+                                executor=None, **kwargs):
+    """Awaitable version of :func:`mosaic.image_histogram`.
+
+    Images are loaded with at most `max_concurrency` files in flight using
+    `executor`. The remaining keyword arguments are passed to
+    :func:`mosaic.image_histogram`.
+    """
+    return await plot_async(image_histogram, x, images=images, data=data,
+                            image_dir=image_dir, image_size=image_size,
+                            max_concurrency=max_concurrency,
+                            executor=executor, **kwargs)
+
+
+async def image_barplot_async(y, images=None, data=None, image_dir='',
+                              image_size=(40, 40), max_concurrency=16,
+                              executor=None, **kwargs):
+    """Awaitable version of :func:`mosaic.image_barplot`.
+
+    Images are loaded with at most `max_concurrency` files in flight using
+    `executor`. The remaining keyword arguments are passed to
+    :func:`mosaic.image_barplot`.
+    """
+    return await plot_async(image_barplot, y, images=images, data=data,
+                            image_dir=image_dir, image_size=image_size,
+                            max_concurrency=max_concurrency,
+                            executor=executor, **kwargs)
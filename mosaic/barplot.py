@@ -27,13 +27,23 @@ def gen_splits(array, n_elements):
         next_index = min(current_index + n_elements, len(array))
 
 
-def images_to_barplot(images, y, bar_height=30, **kwargs):
+def bar_strip(images):
+    """Place the images of a bar side by side in a single array."""
+    n_images, height, width = images.shape[:3]
+    strip = np.swapaxes(images, 0, 1)
+    return strip.reshape((height, n_images * width) + images.shape[3:])
+
+
+def images_to_barplot(images, y, bar_height=30, render='composite',
+                      **kwargs):
     """Create a image bar plot.
 
     Parameters
     ----------
     images : np.array of shape [n_samples, n_width, n_height, n_channels]
-        A 4D array holding the images to plot.
+        A 4D array holding the images to plot. This may also be a
+        LazyImageArray, in which case the images of each bar are
+        decoded together.
 
     y : np.array of shape [n_samples,]
         The categorical variable to plot on the y-axis
@@ -42,39 +52,59 @@ def images_to_barplot(images, y, bar_height=30, **kwargs):
         The number of images placed in a single horizontal bar before
         creating a new bar.
 
+    render : str {'composite', 'artists'}
+        How the images are drawn. 'composite' places the images of a
+        bar side by side in a single array and draws one image per bar.
+        'artists' draws every image with its own `imshow`.
+
     Returns
     -------
     ax : matplotlib Axes
         Returns the Axes object with the plot for further tweaking.
     """
+    if render not in ('composite', 'artists'):
+        raise ValueError("Unknown render `{}`. Must be one of "
+                         "{{'composite', 'artists'}}.".format(render))
+
     fig, ax = plt.subplots(**kwargs)
 
     img_width, img_height = images.shape[1], images.shape[2]
     vertical_padding = img_width
     horizontal_padding = 1  # this padding is in terms of # of images
 
+    # group the images by label in their original order.
+    labels, label_index = np.unique(y, return_inverse=True)
+    order = np.argsort(label_index, kind='stable')
+    counts = np.bincount(label_index, minlength=labels.shape[0])
+    groups = np.split(order, np.cumsum(counts)[:-1])
+
     total_n_splits = 0
     max_width = 0
     ticks = []
-    labels = np.unique(y)
-    for label_idx, label in enumerate(labels):
-        image_group = np.squeeze(images[y == label])
+    for label_idx, group in enumerate(groups):
         bottom = img_height * total_n_splits + vertical_padding * label_idx
         bottom_start = bottom
-        for image_split in gen_splits(image_group, bar_height):
+        for split in gen_splits(group, bar_height):
             total_n_splits += 1
             bottom += img_height
             top = bottom + img_height
-            for img_idx in range(len(image_split)):
-                img = image_split[img_idx]
-
-                left = img_width * (img_idx + horizontal_padding)
-                right = img_width * (img_idx + horizontal_padding + 1)
-
-                plots.imshow(img, extent=[left, right, bottom, top])
-
-                if right > max_width:
-                    max_width = right
+            bar_images = np.asarray(images[split])
+            if bar_images.ndim == 4 and bar_images.shape[-1] == 1:
+                bar_images = bar_images[..., 0]
+
+            left = img_width * horizontal_padding
+            right = img_width * (len(split) + horizontal_padding)
+            if render == 'composite':
+                plots.imshow(bar_strip(bar_images),
+                             extent=[left, right, bottom, top])
+            else:
+                for img_idx, img in enumerate(bar_images):
+                    left = img_width * (img_idx + horizontal_padding)
+                    plots.imshow(img, extent=[left, left + img_width,
+                                              bottom, top])
+
+            if right > max_width:
+                max_width = right
 
         # the ticks should be in the center of the bar
         ticks.append((top + img_height + bottom_start) / 2.)
@@ -84,10 +114,10 @@ def images_to_barplot(images, y, bar_height=30, **kwargs):
     plt.ylim(0, top)
 
     # labels for y-axis
-    ax.set_yticklabels([str(i) for i in labels])
     sns.despine(ax=ax, top=True, left=True, right=True, bottom=True)
     ax.get_xaxis().set_ticks([])
     ax.get_yaxis().set_ticks(ticks)
+    ax.set_yticklabels([str(i) for i in labels])
 
     return ax
 
@@ -99,6 +129,7 @@ def image_barplot(y,
                   bar_height=50,
                   image_dir='',
                   image_size=(40, 40),
+                  render='composite',
                   n_jobs=1,
                   **kwargs):
     """Create a barplot where the bars are created from images in the dataset.
@@ -140,6 +171,12 @@ def image_barplot(y,
         will be sampled to `image_size` if the size of the images
         do not match `image_size`.
 
+    render : str {'composite', 'artists'}, optional
+        How the images are drawn. 'composite' draws the images of each
+        bar as a single image, so drawing time grows with the number of
+        bars rather than the number of images. 'artists' draws every
+        image with its own `imshow`.
+
     n_jobs : int, optional
         The number of parallel workers to use for loading
         the image files when reading from disk. The default
@@ -163,17 +200,25 @@ def image_barplot(y,
     """
     y = data_utils.get_variable(data, y)
     images = data_utils.get_images(data, images,
+                                   image_dir=image_dir,
                                    as_image=False,
                                    image_size=image_size,
-                                   n_jobs=n_jobs)
+                                   n_jobs=n_jobs,
+                                   lazy=True)
 
     if sort_by is not None:
-        if sort_by in features.HSVFeatures.all_features():
-            hsv = features.extract_hsv_stats(images, n_jobs=n_jobs)
+        if (isinstance(sort_by, str) and
+                sort_by in features.HSVFeatures.all_features()):
+            images, hsv = data_utils.hsv_stats(images, n_jobs=n_jobs)
             sort_by_values = hsv[:, features.HSVFeatures.feature_index(sort_by)]
-            images = images[np.argsort(sort_by_values)]
+            sorted_indices = np.argsort(sort_by_values)
         else:
             sort_by = data_utils.get_variable(data, sort_by)
-            images = images[np.argsort(sort_by)]
+            sorted_indices = np.argsort(sort_by)
+
+        # the labels move with their images.
+        images = data_utils.take_images(images, sorted_indices)
+        y = y[sorted_indices]
 
-    return images_to_barplot(images, y, bar_height=bar_height, **kwargs)
+    return images_to_barplot(images, y, bar_height=bar_height,
+                             render=render, **kwargs)
@@ -0,0 +1,239 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import collections
+import contextlib
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+
+__all__ = ['ThumbnailCache', 'thumbnail_cache', 'set_thumbnail_cache',
+           'get_thumbnail_cache']
+
+
+CacheInfo = collections.namedtuple(
+    'CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def default_cache_dir():
+    """The default location of the thumbnail cache on disk.
+
+    The location can be controlled with the `MOSAIC_CACHE` environment
+    variable. Otherwise the cache lives inside the mosaic data home.
+    """
+    cache_dir = os.environ.get('MOSAIC_CACHE', None)
+    if cache_dir is None:
+        from mosaic.datasets.base import get_data_home
+        cache_dir = os.path.join(get_data_home(), 'thumbnails')
+
+    return os.path.expanduser(cache_dir)
+
+
+class ThumbnailCache(object):
+    """Content addressed on-disk cache of resized images.
+
+    Entries are keyed on the absolute path of the original file, its
+    modification time and size, as well as the target size and resample
+    filter. An edited or replaced file therefore never returns a stale
+    thumbnail. Each thumbnail is stored as a uint8 `.npy` file. When the
+    total size of the cache exceeds `max_size` bytes the least recently
+    used entries are evicted.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        The directory holding the cached thumbnails. If None the
+        directory returned by :func:`default_cache_dir` is used.
+
+    max_size : int (default=1GB)
+        The maximum number of bytes the cache may occupy on disk.
+    """
+    def __init__(self, cache_dir=None, max_size=2 ** 30):
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+
+        self.cache_dir = os.path.expanduser(cache_dir)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = None
+        self._currsize = 0
+
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+
+    def __repr__(self):
+        return '%s(cache_dir=%s, max_size=%d)' % (
+            self.__class__.__name__, self.cache_dir, self.max_size)
+
+    def key(self, image_loc, image_size, resample):
+        """Content address of the thumbnail of `image_loc`."""
+        stat = os.stat(image_loc)
+        payload = '|'.join([os.path.abspath(image_loc),
+                            str(stat.st_mtime_ns),
+                            str(stat.st_size),
+                            '{}x{}'.format(*image_size),
+                            repr(resample)])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + '.npy')
+
+    @property
+    def entries(self):
+        """Mapping key -> number of bytes ordered from least to most
+        recently used. Built from the contents of `cache_dir` the first
+        time it is needed, i.e. when a thumbnail is stored. Reading from
+        the cache does not walk `cache_dir`."""
+        if self._entries is None:
+            entries = []
+            for root, _, files in os.walk(self.cache_dir):
+                for file_name in files:
+                    if not file_name.endswith('.npy'):
+                        continue
+                    stat = os.stat(os.path.join(root, file_name))
+                    entries.append((stat.st_mtime, file_name[:-4],
+                                    stat.st_size))
+
+            self._entries = collections.OrderedDict(
+                (key, size) for _, key, size in sorted(entries))
+            self._currsize = sum(self._entries.values())
+
+        return self._entries
+
+    @property
+    def currsize(self):
+        """Number of bytes currently occupied by the cache."""
+        if self._entries is None:
+            self._currsize = sum(self.entries.values())
+        return self._currsize
+
+    def get(self, key):
+        """Return the cached thumbnail or None on a cache miss."""
+        entry_path = self._entry_path(key)
+        try:
+            image = np.load(entry_path)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # mark the entry as recently used. The mtime persists the
+        # ordering across sessions.
+        os.utime(entry_path, None)
+        if self._entries is not None:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # written by another process after the index was built.
+                try:
+                    self._entries[key] = os.path.getsize(entry_path)
+                    self._currsize += self._entries[key]
+                except OSError:
+                    pass
+
+        self.hits += 1
+        return image
+
+    def put(self, key, image):
+        """Store a thumbnail in the cache evicting old entries if
+        necessary."""
+        image = np.asarray(image, dtype=np.uint8)
+        entry_path = self._entry_path(key)
+        entry_dir = os.path.dirname(entry_path)
+        if not os.path.exists(entry_dir):
+            os.makedirs(entry_dir, exist_ok=True)
+
+        # write to a temporary file first so that concurrent readers
+        # never see a partially written thumbnail.
+        fd, tmp_path = tempfile.mkstemp(dir=entry_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            np.save(tmp_file, image)
+        os.replace(tmp_path, entry_path)
+
+        entries = self.entries
+        self._currsize -= entries.pop(key, 0)
+        entries[key] = os.path.getsize(entry_path)
+        self._currsize += entries[key]
+        self._evict()
+
+    def _evict(self):
+        entries = self.entries
+        while self._currsize > self.max_size and len(entries) > 1:
+            key, size = entries.popitem(last=False)
+            self._currsize -= size
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove all thumbnails from the cache."""
+        for key in list(self.entries):
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+        self._entries = collections.OrderedDict()
+        self._currsize = 0
+
+    def cache_info(self):
+        """Report cache statistics as a named tuple of
+        (hits, misses, maxsize, currsize)."""
+        return CacheInfo(self.hits, self.misses,
+                         self.max_size, self.currsize)
+
+
+_THUMBNAIL_CACHE = None
+
+
+@contextlib.contextmanager
+def thumbnail_cache(cache_dir=None, max_size=2 ** 30):
+    """Cache resized images on disk while inside the context.
+
+    All images loaded with an `image_size`, including those loaded by
+    the plotting functions, are looked up in the cache before being
+    decoded.
+
+    Parameters
+    ----------
+    cache_dir : str, optional
+        The directory holding the cached thumbnails.
+
+    max_size : int (default=1GB)
+        The maximum number of bytes the cache may occupy on disk.
+
+    Examples
+    --------
+    >>> import mosaic as ms
+    >>> with ms.thumbnail_cache(cache_dir='/tmp/thumbnails') as cache:
+    >>>    ms.image_grid(data=data, image_size=50)
+    >>> cache.cache_info()
+    """
+    global _THUMBNAIL_CACHE
+    previous_cache = _THUMBNAIL_CACHE
+    _THUMBNAIL_CACHE = ThumbnailCache(cache_dir=cache_dir, max_size=max_size)
+    try:
+        yield _THUMBNAIL_CACHE
+    finally:
+        _THUMBNAIL_CACHE = previous_cache
+
+
+def set_thumbnail_cache(cache_dir=None, max_size=2 ** 30):
+    """Globally enable the thumbnail cache. Passing `max_size=0`
+    disables it again."""
+    global _THUMBNAIL_CACHE
+    if max_size:
+        _THUMBNAIL_CACHE = ThumbnailCache(
+            cache_dir=cache_dir, max_size=max_size)
+    else:
+        _THUMBNAIL_CACHE = None
+    return _THUMBNAIL_CACHE
+
+
+def get_thumbnail_cache():
+    """Return the active ThumbnailCache or None if caching is disabled."""
+    return _THUMBNAIL_CACHE
@@ -1,9 +1,15 @@
 import numpy as np
 import pandas as pd
-import scipy
+import skimage
+
+from PIL import Image as pil_image
 
 from mosaic import image_io
+from mosaic import image_store
 from mosaic import contexts
+from mosaic import features
+from mosaic import resize
+from mosaic.lazy_images import LazyImageArray
 
 
 def get_variable(data, var):
@@ -36,17 +42,110 @@ def get_variable(data, var):
         raise ValueError('Could not find {}.'.format(var))
 
     if isinstance(var[0], str):
-        var = var.astype(np.unicode)
+        var = var.astype(str)
 
     return var
 
 
+def get_image_files(data, images, index=None):
+    """Helper function to obtain the image file paths either from
+    `data`, `images` or the current data context.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        Tidy ("long-form") dataframe where each column is a variable
+        and each row is an observation.
+
+    images : str or array-like of str, optional
+        Image file paths or the name of the variable containing the
+        image file paths within `data`. If None, the image column of the
+        current data context is used.
+
+    index : array-like, optional
+        The subset of image files to return.
+
+    Returns
+    -------
+    image_files : pandas.Series or np.array of str
+        The image file paths.
+    """
+    if images is None:
+        images = data[contexts.get_image_col()]
+    elif isinstance(images, str):
+        images = data[images]
+
+    if index is not None:
+        if isinstance(images, pd.Series):
+            images = images.iloc[index]
+        else:
+            images = np.asarray(images)[index]
+
+    return images
+
+
+def take_images(images, index):
+    """Select the images at positions `index` from an image array, a
+    list of images or a :class:`LazyImageArray`. A LazyImageArray stays
+    lazy, so no image is decoded."""
+    if isinstance(images, LazyImageArray):
+        return images.subset(index)
+    elif isinstance(images, np.ndarray):
+        return images[index]
+    return [images[i] for i in index]
+
+
+def load_lazy_images(images):
+    """Decode all images of a :class:`LazyImageArray`. Other inputs are
+    returned unchanged."""
+    if isinstance(images, LazyImageArray):
+        return images[:]
+    return images
+
+
+def hsv_stats(images, n_jobs=1, load_images=True):
+    """The mean HSV statistics of each image.
+
+    The statistics of a :class:`LazyImageArray` are read from the active
+    :class:`mosaic.features.FeatureStore`, so no image is decoded.
+    Without a store the images are decoded once and returned as a uint8
+    array, unless `load_images` is False, in which case the statistics
+    are computed one file at a time and the images stay lazy.
+
+    Returns
+    -------
+    images : array-like
+        The images, decoded if the statistics were computed from them.
+    hsv : np.array of shape [n_samples, 3]
+        The hsv statistics of each image.
+    """
+    store = features.get_feature_store()
+    if isinstance(images, LazyImageArray):
+        if store is not None:
+            return images, store.hsv_stats(images.image_files,
+                                           image_dir=images.image_dir,
+                                           image_size=images.image_size,
+                                           n_jobs=n_jobs)
+        elif not load_images:
+            return images, features.extract_hsv_stats_from_files(
+                images.image_files,
+                image_dir=images.image_dir,
+                image_size=images.image_size,
+                n_jobs=n_jobs)
+
+    images = load_lazy_images(images)
+    if isinstance(images, np.ndarray):
+        images = skimage.img_as_ubyte(images)
+    return images, features.extract_hsv_stats(images, n_jobs=n_jobs)
+
+
 def get_images(data, images,
                image_dir='',
                image_size=None,
                as_image=False,
                index=None,
-               n_jobs=1):
+               n_jobs=1,
+               lazy=False):
     """Helper function to load images from disk or properly format
     an already existing image array.
 
@@ -56,9 +155,9 @@ def get_images(data, images,
         Tidy ("long-form") dataframe where each column is a variable
         and each row is an observation.
 
-    images : str or array-like of shape [n_samples, width, height, channels], optional
-        Image array or name of the variable containing the image file
-        paths within `data`.
+    images : str, ImageStore or array-like of shape [n_samples, width, height, channels], optional
+        Image array, a packed image store or name of the variable
+        containing the image file paths within `data`.
 
     image_dir : str, optional
         The location of the image files on disk. Images will
@@ -74,31 +173,63 @@ def get_images(data, images,
         If True, the returned images are converted to PIL.Image
         objects.
 
+    index : array-like, optional
+        The subset of images to load.
+
+    n_jobs : int, optional
+        The number of parallel workers used to load the images.
+
+    lazy : bool, optional
+        If True, image files are not decoded up front. Instead a
+        :class:`mosaic.lazy_images.LazyImageArray` is returned that decodes
+        the images when they are accessed.
+
     Returns
     -------
     images : array-like
-        Either a list of PIL.Images or a np.array of shape
-        [n_samples, width, height, channels].
+        Either a list of PIL.Images, a LazyImageArray or a np.array of
+        shape [n_samples, width, height, channels].
     """
+    if images is None:
+        images = contexts.get_image_data()
+
+    if isinstance(images, image_store.ImageStore):
+        images = images.images
+
     if isinstance(images, np.ndarray):
+        if index is not None:
+            images = images[index]
+
+        if image_size or as_image:
+            # converted once for the whole stack instead of per image.
+            images = skimage.img_as_ubyte(images)
+
+        if image_size:
+            images = resize.resize_images(images, image_size,
+                                          interp='lanczos', n_jobs=n_jobs)
+
         if as_image:
-            return [image_io.to_pillow_image(img, image_size=image_size) for
-                    img in images]
-        elif image_size:
-            return np.asarray([scipy.misc.imresize(img, image_size, interp='lanczos') for
-                    img in images])
+            return [pil_image.fromarray(img) for img in images]
         return images
 
     if not image_dir:
         image_dir = contexts.get_image_dir()
 
-    if not images:
-        images = contexts.get_image_data()
-        if images is None:
-            images = data[contexts.get_image_col()]
-
-    if index is not None:
-        images = images.iloc[index]
+    images = get_image_files(data, images, index=index)
+
+    if lazy:
+        return LazyImageArray(images,
+                              image_dir=image_dir,
+                              image_size=image_size,
+                              as_image=as_image,
+                              n_jobs=n_jobs)
+
+    # arrays are stacked, so the images must all have the same size.
+    # Reading the headers is cheap compared to decoding them. A list of
+    # PIL Images may mix sizes.
+    if not image_size and not as_image:
+        image_io.check_equal_sizes(image_io.probe_images(
+            images, image_dir=image_dir, n_jobs=n_jobs))
 
     images = image_io.load_images(
         images,
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 import numpy as np
 
@@ -38,3 +39,52 @@ def get_data_home(data_home=None):
 
 def get_bucket(file_name):
     return MOSAIC_BUCKET + file_name
+
+
+def save_array(array_path, array):
+    """Write an array to a `.npy` file atomically, so that concurrent
+    readers never see a partially written file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(array_path),
+                                    suffix='.tmp')
+    with os.fdopen(fd, 'wb') as tmp_file:
+        np.save(tmp_file, array)
+    os.replace(tmp_path, array_path)
+
+
+def load_cached_arrays(name, load_arrays, data_home=None):
+    """Load the images and labels of a dataset, decoding them only once.
+
+    On the first call `load_arrays` decodes the dataset and the images
+    and labels are written to `<name>_images.npy` and `<name>_labels.npy`
+    in the data home. The images are stored channels last in C order.
+    Later calls memory-map the images, so loading takes milliseconds,
+    pages are only read when they are accessed, and parallel workers
+    share a single copy.
+
+    Parameters
+    ----------
+    name : str
+        The name of the cached arrays.
+    load_arrays : callable
+        Returns the images and labels of the dataset.
+    data_home : str, optional
+        The directory holding the cached arrays. Defaults to
+        :func:`get_data_home`.
+
+    Returns
+    -------
+    images : np.memmap of shape [n_samples, height, width, ...]
+        The read-only images.
+    labels : np.array of shape [n_samples,]
+        The labels of the images.
+    """
+    data_home = get_data_home(data_home)
+    images_path = os.path.join(data_home, name + '_images.npy')
+    labels_path = os.path.join(data_home, name + '_labels.npy')
+
+    if not (os.path.exists(images_path) and os.path.exists(labels_path)):
+        images, labels = load_arrays()
+        save_array(labels_path, np.asarray(labels))
+        save_array(images_path, np.ascontiguousarray(images))
+
+    return np.load(images_path, mmap_mode='r'), np.load(labels_path)
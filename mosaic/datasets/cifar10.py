@@ -11,7 +11,8 @@ import pandas as pd
 from sklearn.utils import check_random_state
 
 from mosaic import image_io
-from mosaic.datasets.base import get_data_home, ImageDataBundle
+from mosaic.datasets.base import (get_data_home, load_cached_arrays,
+                                  ImageDataBundle)
 from mosaic.datasets.progress_bar import chunk_read
 
 
@@ -39,7 +40,7 @@ def download_cifar10_images(target_dir):
     os.remove(archive_path)
 
 
-def fetch_cifar10_images():
+def load_cifar10_batches():
     data_home = get_data_home()
 
     cifar10_dir = os.path.join(data_home, DATA_NAME)
@@ -52,8 +53,9 @@ def fetch_cifar10_images():
         metadata = pickle.load(metadata_pkl, encoding='bytes')
         label_list = metadata[b'label_names']
 
+    # we expect images in width X height X channel order
     n_train_samples = 50000
-    images = np.zeros((n_train_samples, 3, 32, 32), dtype='uint8')
+    images = np.zeros((n_train_samples, 32, 32, 3), dtype='uint8')
     labels = []
     for i in range(1, 6):
         batch_path = os.path.join(cifar10_dir, 'data_batch_' + str(i))
@@ -64,11 +66,18 @@ def fetch_cifar10_images():
             batch_labels = [str(label_list[label], 'utf-8') for
                             label in batch_data[b'labels']]
 
-            images[(i - 1) * 10000: i * 10000, :, :, :] = batch_images
+            images[(i - 1) * 10000: i * 10000] = batch_images.transpose(
+                0, 2, 3, 1)
             labels.extend(batch_labels)
 
-    # we expect images in width X height X channel order
-    images = images.transpose(0, 2, 3, 1)
-    labels = np.asarray(labels)
+    return images, np.asarray(labels)
+
+
+def fetch_cifar10_images():
+    """The CIFAR-10 training images and their labels.
 
-    return images, labels
+    The batches are only unpickled on the first call. Later calls
+    memory-map the decoded images, see
+    :func:`mosaic.datasets.base.load_cached_arrays`.
+    """
+    return load_cached_arrays('cifar10_train', load_cifar10_batches)
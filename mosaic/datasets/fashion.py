@@ -5,7 +5,7 @@ import gzip
 
 import numpy as np
 
-from mosaic.datasets.base import get_data_home
+from mosaic.datasets.base import get_data_home, load_cached_arrays
 from mosaic.datasets.progress_bar import chunk_read
 
 
@@ -71,13 +71,24 @@ def load_fashion(path, kind='train'):
 
 
 def fetch_fashion_images(kind='train'):
-    data_home = get_data_home()
+    """The Fashion-MNIST images of the `kind` partition and their labels.
 
-    fashion_dir = os.path.join(data_home, DATA_NAME)
+    The IDX files are only decompressed on the first call. Later calls
+    memory-map the decoded images, see
+    :func:`mosaic.datasets.base.load_cached_arrays`.
+    """
+    def load_arrays():
+        data_home = get_data_home()
+
+        fashion_dir = os.path.join(data_home, DATA_NAME)
+
+        if not os.path.exists(fashion_dir):
+            download_fashion_mnist(fashion_dir)
 
-    if not os.path.exists(fashion_dir):
-        download_fashion_mnist(fashion_dir)
+        images, labels = load_fashion(fashion_dir, kind=kind)
 
-    images, labels = load_fashion(fashion_dir, kind=kind)
+        return images, np.array([LABELS_MAP[label] for label in labels])
 
-    return images, np.array([LABELS_MAP[label] for label in labels])
+    # 'test' and 't10k' are the same partition.
+    name = 't10k' if kind == 'test' else kind
+    return load_cached_arrays('fashion_' + name, load_arrays)
@@ -1,3 +1,4 @@
 from mosaic.features.hsv import *
 from mosaic.features.color import *
 from mosaic.features.processing import *
+from mosaic.features.store import *
@@ -1,11 +1,15 @@
+import collections.abc
+import functools
+
 import numpy as np
 from joblib import Parallel, delayed
-from skimage import color
 
 from mosaic import image_io
+from mosaic import parallel
 
 
-__all__ = ['HSVFeatures', 'HUE', 'SATURATION', 'VALUE', 'extract_hsv_stats']
+__all__ = ['HSVFeatures', 'HUE', 'SATURATION', 'VALUE', 'extract_hsv_stats',
+           'extract_hsv_stats_from_files']
 
 
 class HSVFeatures(object):
@@ -39,6 +43,253 @@ SATURATION = HSVFeatures.SATURATION
 VALUE = HSVFeatures.VALUE
 
 
+# The number of pixels converted to HSV at once. A chunk takes about
+# 50 bytes per pixel while it is processed.
+CHUNK_PIXELS = 2 ** 20
+
+# Medians are taken from histograms of the channels quantized to
+# multiples of 1 / HISTOGRAM_LEVELS. A multiple of 255 gives every
+# possible value its own bin.
+HISTOGRAM_LEVELS = 4 * 255
+
+
+def hsv_components(images):
+    """The integer components of the HSV colorspace of uint8 RGB images.
+
+    Returns
+    -------
+    value : np.array of uint8
+        The maximum of the RGB channels.
+    delta : np.array of int16
+        The maximum minus the minimum of the RGB channels.
+    hue : np.array of int16
+        The hue times ``6 * delta``.
+    """
+    images = np.asarray(images, dtype=np.uint8)
+    if images.ndim == 3:
+        images = images[..., np.newaxis]
+    channels = [images[..., min(channel, images.shape[-1] - 1)] for
+                channel in range(3)]
+    red, green, blue = (channel.astype(np.int16) for channel in channels)
+
+    value = np.maximum(np.maximum(channels[0], channels[1]), channels[2])
+    delta = (value - np.minimum(np.minimum(channels[0], channels[1]),
+                                channels[2])).astype(np.int16)
+
+    # like skimage, blue takes precedence over green over red if several
+    # channels are the maximum.
+    hue = green - blue
+    np.copyto(hue, blue - red + 2 * delta, where=channels[1] == value)
+    np.copyto(hue, red - green + 4 * delta, where=channels[2] == value)
+    np.add(hue, 6 * delta, out=hue, where=hue < 0)
+
+    return value, delta, hue
+
+
+def rgb_to_hsv(images):
+    """Convert a batch of uint8 RGB images to the HSV colorspace.
+
+    Follows :func:`skimage.color.rgb2hsv`, but the hue is computed from
+    integer channel differences and the result is float32 instead of
+    float64. Hue, saturation and value agree with skimage to within
+    1e-6, and values that skimage computes exactly (such as zero
+    saturation or full value) are exact here as well.
+
+    Parameters
+    ----------
+    images : np.array of shape [n_samples, height, width, 3]
+        The uint8 RGB images. Grayscale images of shape
+        [n_samples, height, width] are treated as RGB images with
+        equal channels.
+
+    Returns
+    -------
+    np.array of shape [n_samples, height, width, 3]
+        The float32 hue, saturation and value of every pixel in [0, 1].
+    """
+    value, delta, hue = hsv_components(images)
+
+    # hsv is stored channel first, so each channel is contiguous.
+    hsv = np.empty((3,) + value.shape, dtype=np.float32)
+    np.divide(hue, 6 * np.maximum(delta, 1), out=hsv[0], dtype=np.float32)
+    np.divide(delta, np.maximum(value, 1), out=hsv[1], dtype=np.float32)
+    np.divide(value, 255, out=hsv[2], dtype=np.float32)
+
+    return np.moveaxis(hsv, 0, -1)
+
+
+@functools.lru_cache(maxsize=None)
+def quantization_tables(levels=HISTOGRAM_LEVELS):
+    """Lookup tables from the integer HSV components returned by
+    :func:`hsv_components` to codes in [0, levels].
+
+    Returns
+    -------
+    hue : np.array of shape [6 * 255, 256]
+        The code of the hue, indexed by the hue times ``6 * delta`` and
+        by delta.
+    saturation : np.array of shape [256, 256]
+        The code of the saturation, indexed by value and delta.
+    value : np.array of shape [256,]
+        The code of the value.
+    """
+    components = np.arange(256)
+    delta = components[np.newaxis, :]
+
+    # round half up with integer arithmetic.
+    hue_scale = 6 * np.maximum(delta, 1)
+    hue = (2 * levels * np.arange(6 * 255)[:, np.newaxis] + hue_scale) // (
+        2 * hue_scale)
+    value_scale = np.maximum(components[:, np.newaxis], 1)
+    saturation = (2 * levels * delta + value_scale) // (2 * value_scale)
+    value = (2 * levels * components + 255) // 510
+
+    return (hue.astype(np.int32), saturation.astype(np.int32),
+            value.astype(np.int32))
+
+
+def quantize_hsv(images, levels=HISTOGRAM_LEVELS):
+    """Round the hue, saturation and value of uint8 RGB images to
+    multiples of ``1 / levels``.
+
+    The codes are looked up from the integer HSV components, so no
+    floating point conversion is done.
+
+    Returns
+    -------
+    np.array of shape [3, n_samples, height, width]
+        The int32 hue, saturation and value codes in [0, levels].
+    """
+    hue_table, saturation_table, value_table = quantization_tables(levels)
+    value, delta, hue = hsv_components(images)
+    value = value.astype(np.intp)
+    delta = delta.astype(np.intp)
+
+    codes = np.empty((3,) + value.shape, dtype=np.int32)
+    np.take(hue_table, hue.astype(np.intp) * 256 + delta, out=codes[0])
+    np.take(saturation_table, value * 256 + delta, out=codes[1])
+    np.take(value_table, value, out=codes[2])
+
+    return codes
+
+
+def histogram_median(codes, levels=HISTOGRAM_LEVELS, background=None):
+    """The median of every row of integer `codes` in [0, levels] found
+    from the cumulative counts of a histogram with a bin per code.
+
+    Parameters
+    ----------
+    codes : np.array of shape [n_channels, n_samples, n_pixels]
+        The quantized values.
+    levels : int
+        The largest code.
+    background : np.array of shape [n_channels,], optional
+        The code of the background of each channel. Its bin is emptied
+        before the median is taken.
+
+    Returns
+    -------
+    np.array of shape [n_channels, n_samples]
+        The medians divided by `levels`, or NaN if a row has no values
+        outside the background.
+    """
+    n_channels, n_samples, _ = codes.shape
+    n_bins = levels + 1
+
+    # one bincount builds the histograms of every channel of every image.
+    offsets = np.arange(n_channels * n_samples).reshape(
+        n_channels, n_samples, 1) * n_bins
+    counts = np.bincount((codes + offsets).ravel(),
+                         minlength=n_channels * n_samples * n_bins)
+    counts = counts.reshape(n_channels, n_samples, n_bins)
+
+    if background is not None:
+        counts[np.arange(n_channels), :, background] = 0
+
+    # the bins of the two middle values, which are equal for odd counts.
+    totals = counts.sum(axis=-1)
+    cumulative = np.cumsum(counts, axis=-1)
+    lower = (cumulative <= ((totals - 1) // 2)[..., np.newaxis]).sum(axis=-1)
+    upper = (cumulative <= (totals // 2)[..., np.newaxis]).sum(axis=-1)
+
+    median = (lower + upper) / (2. * levels)
+    return np.where(totals > 0, median, np.nan)
+
+
+def hsv_features_batch(images, agg_func=np.mean, background=None):
+    """Calculate an aggregate statistic (`agg_func`) of the hue,
+    saturation and value of a batch of images.
+
+    All images are converted and reduced over their pixels at once.
+    Statistics are computed from the float32 output of
+    :func:`rgb_to_hsv` and match skimage to within 1e-6. Medians that
+    exclude a `background` are instead read off the histograms of the
+    channels quantized to ``1 / HISTOGRAM_LEVELS`` by
+    :func:`quantize_hsv`, so the background is excluded arithmetically
+    in O(pixels) time without masked arrays. Every possible value has
+    its own bin, so medians of the value channel are exact, and medians
+    of hue and saturation are within ``0.5 / HISTOGRAM_LEVELS``
+    (about 5e-4) of the exact median.
+
+    Parameters
+    ----------
+    images : np.array of shape [n_samples, height, width, 3] or list
+        The images. A list of PIL Images or arrays of different sizes is
+        processed one image at a time.
+    agg_func : numpy function {np.mean, np.median} (default=np.mean)
+        The statistic calculated for each channel.
+    background : array-like of shape [3,] (default=None)
+        The background color value for each hsv channel.
+        These values will be masked out in the calculation.
+        If None, then all values are included in the statistics
+        calculation. For medians, all values in the histogram bin of
+        the background are excluded.
+
+    Returns
+    -------
+    np.array of shape [n_samples, 3]
+        The statistics of every image.
+    """
+    if isinstance(images, list):
+        try:
+            images = np.stack([np.asarray(image) for image in images])
+        except ValueError:
+            return np.vstack([hsv_features_batch([image], agg_func,
+                                                 background)
+                              for image in images])
+
+    n_samples = len(images)
+    if n_samples == 0:
+        return np.empty((0, 3))
+
+    if background is not None:
+        background = np.asarray(background, dtype=np.float32)
+
+    if agg_func is np.median and background is not None:
+        # the background is excluded by emptying its histogram bin.
+        codes = quantize_hsv(images).reshape(3, n_samples, -1)
+        background_codes = np.round(
+            background * HISTOGRAM_LEVELS).astype(np.intp)
+        stats = histogram_median(codes, background=background_codes)
+    else:
+        # reduce each channel of each image along its contiguous pixels.
+        hsv = np.moveaxis(rgb_to_hsv(images), -1, 0).reshape(
+            3, n_samples, -1)
+        if background is None:
+            return agg_func(hsv, axis=-1).T.astype(np.float64)
+
+        is_foreground = hsv != background[:, np.newaxis, np.newaxis]
+        counts = is_foreground.sum(axis=-1)
+        sums = np.where(is_foreground, hsv, 0).sum(axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats = sums / counts
+
+    if background is not None:
+        # images that are all background get the background value.
+        stats = np.where(np.isnan(stats), background[:, np.newaxis], stats)
+    return stats.T.astype(np.float64)
+
+
 def hsv_features_single(image, agg_func=np.mean, background=None):
     """For each hsv value (hue, saturation, value) calculate
     an aggregate statistic (`agg_func`) of that value for a image.
@@ -63,39 +314,74 @@ def hsv_features_single(image, agg_func=np.mean, background=None):
         The statistics for each channel (h_mean, s_mean, v_mean).
     """
     image = np.asarray(image, dtype=np.uint8)
+    return tuple(hsv_features_batch(image[np.newaxis], agg_func,
+                                    background)[0])
 
-    if len(image.shape) < 3:
-        image = color.gray2rgb(image)
 
-    hsv_image = color.rgb2hsv(image)
+def iter_chunks(image_list, chunk_pixels=CHUNK_PIXELS):
+    """Split images into chunks of about `chunk_pixels` pixels."""
+    n_samples = len(image_list)
+    if n_samples == 0:
+        return
 
-    if background is not None:
-        h_channel = hsv_image[:, :, 0]
-        h_mean = agg_func(
-            np.ma.array(h_channel, mask=(h_channel == background[0]))
-        )
-        h_mean = background[0] if h_mean is np.ma.masked else h_mean
-
-        s_channel = hsv_image[:, :, 1]
-        s_mean = agg_func(
-            np.ma.array(s_channel, mask=(s_channel == background[1]))
-        )
-        s_mean = background[1] if s_mean is np.ma.masked else s_mean
-
-        v_channel = hsv_image[:, :, 2]
-        v_mean = agg_func(
-            np.ma.array(v_channel, mask=(v_channel == background[2]))
-        )
-        v_mean = background[2] if v_mean is np.ma.masked else v_mean
+    image = image_list[0]
+    if isinstance(image, np.ndarray):
+        n_pixels = np.prod(image.shape[:2])
+    else:
+        n_pixels = np.prod(image.size)
+
+    # the histograms of tiny images are larger than their pixels.
+    n_pixels = max(n_pixels, HISTOGRAM_LEVELS + 1)
+    chunk_size = max(int(chunk_pixels // n_pixels), 1)
+
+    for start in range(0, n_samples, chunk_size):
+        yield image_list[start:start + chunk_size]
+
+
+def check_hsv_params(mode='mean', background=None):
+    """Validate the parameters of the HSV statistics.
+
+    Returns
+    -------
+    agg_func : numpy function
+        The aggregation function corresponding to `mode`.
+    background : np.array of shape [3,] or None
+        The background color in the HSV colorspace.
+    """
+    if isinstance(background, str):
+        if background == 'white':
+            background = np.array([0, 0, 1], dtype=np.uint8)
+        elif background == 'black':
+            background = np.array([0, 0, 0], dtype=np.uint8)
+        else:
+            raise ValueError("Unknown background `{}`.".format(background))
+
+    if mode == 'mean':
+        agg_func = np.mean
+    elif mode == 'median':
+        agg_func = np.median
     else:
-        h_mean = agg_func(hsv_image[:, :, 0])
-        s_mean = agg_func(hsv_image[:, :, 1])
-        v_mean = agg_func(hsv_image[:, :, 2])
+        raise ValueError("Unkown mode `{}`.".format(mode))
 
-    return h_mean, s_mean, v_mean
+    return agg_func, background
 
 
-def extract_hsv_stats(image_list, mode='mean', background=None, n_jobs=1):
+def hsv_features_file(image_file, image_dir='', image_size=None,
+                      agg_func=np.mean, background=None):
+    """Decode an image file and calculate its aggregate hsv statistics.
+
+    Only the statistics leave the worker, not the decoded image.
+    See :func:`hsv_features_single`.
+    """
+    image = image_io.load_image(image_file,
+                                image_dir=image_dir,
+                                image_size=image_size,
+                                cache=False)
+    return hsv_features_single(image, agg_func, background)
+
+
+def extract_hsv_stats(image_list, mode='mean', background=None, n_jobs=1,
+                      backend='auto'):
     """Extract aggregate statistics in the HSV domain of an RGB image.
 
     A useful ordering tool is the HSV values of an RGB image.
@@ -103,10 +389,20 @@ def extract_hsv_stats(image_list, mode='mean', background=None, n_jobs=1):
     their color along the color spectrum. This function extracts
     a scalar statistic for each HSV channel of every image in an array.
 
+    The images are converted and reduced in chunks of about
+    `CHUNK_PIXELS` pixels with :func:`hsv_features_batch`, and the chunks
+    are processed in parallel. The statistics agree with those of
+    :func:`skimage.color.rgb2hsv` to within 1e-6, except for medians
+    with a `background`, which are taken from per image histograms and
+    agree to within ``0.5 / HISTOGRAM_LEVELS``.
+
     Parameters
     ----------
-    image_list : list of lenth [n_samples,]
-        A list of PIL.Images.
+    image_list : list of lenth [n_samples,], np.array or iterator of ImageBatch
+        A list of PIL.Images or a uint8 array (or memmap) of shape
+        [n_samples, height, width, 3]. The images may also be streamed as
+        the batches yielded by :func:`mosaic.image_io.iter_images`, in
+        which case only one batch is processed at a time.
     mode : str {'mean', 'median'} (default='mean')
         The statistic to extract for each channel.
     background : array-like of shape [3,] or str {'white', 'black'], optional
@@ -116,27 +412,91 @@ def extract_hsv_stats(image_list, mode='mean', background=None, n_jobs=1):
         calculation.
     n_jobs : int (default=1)
         Number of jobs to run in parallel.
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to process the images in parallel. 'auto'
+        uses threads for PIL Images and small arrays and processes
+        otherwise.
 
     Returns
     -------
     np.array of shape [n_samples, 3]
         An array containing the hsv statistics for each channel.
     """
-    if background == 'white':
-        background = np.array([0, 0, 1], dtype=np.uint8)
-    elif background == 'black':
-        background = np.array([0, 0, 0], dtype=np.uint8)
+    agg_func, background = check_hsv_params(mode, background)
 
+    if isinstance(image_list, collections.abc.Iterator):
+        result = [extract_hsv_stats(batch.images,
+                                    mode=mode,
+                                    background=background,
+                                    n_jobs=n_jobs,
+                                    backend=backend) for
+                  batch in image_list]
+        return np.vstack(result) if result else np.empty((0, 3))
 
-    if mode == 'mean':
-        agg_func = np.mean
-    elif mode == 'median':
-        agg_func = np.median
-    else:
-        raise ValueError("Unkown mode `{}`.".format(mode))
+    backend = parallel.select_feature_backend(image_list,
+                                              n_jobs=n_jobs,
+                                              backend=backend)
+    result = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(hsv_features_batch)(chunk, agg_func, background)
+        for chunk in iter_chunks(image_list))
+
+    return np.vstack(result) if result else np.empty((0, 3))
+
+
+def extract_hsv_stats_from_files(image_files,
+                                 image_dir='',
+                                 image_size=None,
+                                 mode='mean',
+                                 background=None,
+                                 n_jobs=1,
+                                 backend='auto',
+                                 batch_size='auto'):
+    """Extract aggregate statistics in the HSV domain of image files.
+
+    Each worker decodes an image and reduces it to its statistics in a
+    single pass, so only the statistics are sent between processes and
+    memory scales with the number of images rather than their pixels.
+
+    Parameters
+    ----------
+    image_files : list of str
+        The image files on disk.
+    image_dir : str (default='')
+        The directory the image files are relative to.
+    image_size : tuple, optional
+        The size the images are resized to before calculating the
+        statistics. If None the statistics are computed at full size.
+    mode : str {'mean', 'median'} (default='mean')
+        The statistic to extract for each channel.
+    background : array-like of shape [3,] or str {'white', 'black'], optional
+        The background color value for each hsv channel.
+        These values will be masked out in the calculation.
+    n_jobs : int (default=1)
+        Number of jobs to run in parallel.
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to process the images in parallel. 'auto'
+        selects the backend as :func:`mosaic.image_io.load_images` does.
+    batch_size : int or 'auto' (default='auto')
+        The number of images processed by a worker per dispatch.
+
+    Returns
+    -------
+    np.array of shape [n_samples, 3]
+        An array containing the hsv statistics for each channel.
+    """
+    agg_func, background = check_hsv_params(mode, background)
+    image_size = image_io.check_image_size(image_size)
 
-    result = Parallel(n_jobs=n_jobs)(
-        delayed(hsv_features_single)(image, agg_func, background)
-        for image in image_list)
+    backend = parallel.select_load_backend(image_files,
+                                           image_dir=image_dir,
+                                           n_jobs=n_jobs,
+                                           backend=backend)
+    result = Parallel(n_jobs=n_jobs, backend=backend, batch_size=batch_size)(
+        delayed(hsv_features_file)(image_file,
+                                   image_dir=image_dir,
+                                   image_size=image_size,
+                                   agg_func=agg_func,
+                                   background=background)
+        for image_file in image_files)
 
-    return np.vstack(result)
+    return np.vstack(result) if result else np.empty((0, 3))
@@ -0,0 +1,292 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from mosaic import image_io
+from mosaic.features import hsv
+
+
+__all__ = ['FeatureStore', 'feature_store', 'set_feature_store',
+           'get_feature_store']
+
+
+def default_store_dir():
+    """The default location of the feature store on disk.
+
+    The location can be controlled with the `MOSAIC_FEATURE_STORE`
+    environment variable. Otherwise the store lives inside the mosaic
+    data home.
+    """
+    store_dir = os.environ.get('MOSAIC_FEATURE_STORE', None)
+    if store_dir is None:
+        from mosaic.datasets.base import get_data_home
+        store_dir = os.path.join(get_data_home(), 'features')
+
+    return os.path.expanduser(store_dir)
+
+
+def file_fingerprints(image_files, image_dir=''):
+    """The absolute path, size and modification time of image files.
+
+    Returns
+    -------
+    paths : np.array of shape [n_samples,]
+        The absolute paths of the files.
+    sizes : np.array of shape [n_samples,]
+        The sizes of the files in bytes.
+    mtimes : np.array of shape [n_samples,]
+        The modification times of the files in nanoseconds.
+    """
+    paths = [os.path.abspath(os.path.join(image_dir, image_file)) for
+             image_file in image_files]
+    stats = [os.stat(path) for path in paths]
+    sizes = np.array([stat.st_size for stat in stats], dtype=np.int64)
+    mtimes = np.array([stat.st_mtime_ns for stat in stats], dtype=np.int64)
+    return np.array(paths, dtype=object), sizes, mtimes
+
+
+class FeatureStore(object):
+    """Persistent on-disk table of per image features.
+
+    Features computed with the same parameters are kept in a single
+    columnar `.npz` file holding the absolute path, size and
+    modification time of every image next to its features. Lookups
+    match the fingerprints of all requested files at once, and only the
+    files that are missing or whose size or modification time changed
+    are computed. A repeated lookup therefore costs one `os.stat` per
+    file and a single file read.
+
+    Parameters
+    ----------
+    store_dir : str, optional
+        The directory holding the feature tables. If None the directory
+        returned by :func:`default_store_dir` is used.
+    """
+    def __init__(self, store_dir=None):
+        if store_dir is None:
+            store_dir = default_store_dir()
+
+        self.store_dir = os.path.expanduser(store_dir)
+        self.hits = 0
+        self.misses = 0
+
+        if not os.path.exists(self.store_dir):
+            os.makedirs(self.store_dir)
+
+    def __repr__(self):
+        return '%s(store_dir=%s)' % (self.__class__.__name__, self.store_dir)
+
+    def table_path(self, name, params):
+        """The file holding the `name` features computed with `params`."""
+        payload = json.dumps([name, params], sort_keys=True)
+        key = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.store_dir, '{}-{}.npz'.format(name, key))
+
+    def load_table(self, table_path):
+        """Read a feature table. Returns None if it does not exist."""
+        try:
+            with np.load(table_path) as table:
+                paths = table['paths'].tobytes().decode('utf-8')
+                sizes = table['sizes']
+                mtimes = table['mtimes']
+                values = table['values']
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+        # the paths are stored as a single null separated buffer.
+        paths = paths.split('\0') if sizes.shape[0] else []
+        return np.array(paths, dtype=object), sizes, mtimes, values
+
+    def save_table(self, table_path, paths, sizes, mtimes, values):
+        """Write a feature table atomically."""
+        paths = '\0'.join(paths).encode('utf-8')
+
+        # write to a temporary file first so that concurrent readers
+        # never see a partially written table.
+        fd, tmp_path = tempfile.mkstemp(dir=self.store_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            np.savez(tmp_file,
+                     paths=np.frombuffer(paths, dtype=np.uint8),
+                     sizes=sizes, mtimes=mtimes, values=values)
+        os.replace(tmp_path, table_path)
+
+    def lookup(self, image_files, compute, name, params, image_dir=''):
+        """Features of image files, computing only the missing ones.
+
+        Parameters
+        ----------
+        image_files : list of str
+            The image files on disk.
+        compute : callable
+            Called with a list of absolute file paths and returns an
+            array of shape [n_files, n_features] with their features.
+        name : str
+            The name of the features.
+        params : dict
+            The JSON serializable parameters the features depend on.
+        image_dir : str (default='')
+            The directory the image files are relative to.
+
+        Returns
+        -------
+        np.array of shape [n_samples, n_features]
+            The features of every file.
+        """
+        paths, sizes, mtimes = file_fingerprints(image_files,
+                                                 image_dir=image_dir)
+        table_path = self.table_path(name, params)
+        table = self.load_table(table_path)
+        if table is None:
+            table = (np.array([], dtype=object),
+                     np.array([], dtype=np.int64),
+                     np.array([], dtype=np.int64),
+                     None)
+        table_paths, table_sizes, table_mtimes, table_values = table
+
+        table_index = pd.Index(table_paths)
+        index = table_index.get_indexer(paths)
+        found = np.flatnonzero(index >= 0)
+        is_current = np.zeros(paths.shape[0], dtype=bool)
+        is_current[found] = ((table_sizes[index[found]] == sizes[found]) &
+                             (table_mtimes[index[found]] == mtimes[found]))
+
+        n_missing = paths.shape[0] - np.count_nonzero(is_current)
+        self.hits += paths.shape[0] - n_missing
+        self.misses += n_missing
+        if not n_missing and table_values is not None:
+            return table_values[index]
+
+        # a file requested several times is computed once.
+        missing_paths, missing_index, inverse = np.unique(
+            paths[~is_current], return_index=True, return_inverse=True)
+        missing = np.flatnonzero(~is_current)[missing_index]
+        missing_values = np.asarray(compute(list(missing_paths)))
+
+        # stale rows are replaced and new files are appended.
+        if table_values is None:
+            table_values = np.empty((0,) + missing_values.shape[1:],
+                                    dtype=missing_values.dtype)
+        row = table_index.get_indexer(missing_paths)
+        is_new = row < 0
+        row[is_new] = table_paths.shape[0] + np.arange(
+            np.count_nonzero(is_new))
+
+        n_rows = table_paths.shape[0] + np.count_nonzero(is_new)
+        new_paths = np.empty(n_rows, dtype=object)
+        new_paths[:table_paths.shape[0]] = table_paths
+        new_paths[row] = missing_paths
+        new_sizes = np.zeros(n_rows, dtype=np.int64)
+        new_sizes[:table_paths.shape[0]] = table_sizes
+        new_sizes[row] = sizes[missing]
+        new_mtimes = np.zeros(n_rows, dtype=np.int64)
+        new_mtimes[:table_paths.shape[0]] = table_mtimes
+        new_mtimes[row] = mtimes[missing]
+        new_values = np.empty((n_rows,) + missing_values.shape[1:],
+                              dtype=missing_values.dtype)
+        new_values[:table_paths.shape[0]] = table_values
+        new_values[row] = missing_values
+        self.save_table(table_path, new_paths, new_sizes, new_mtimes,
+                        new_values)
+
+        values = np.empty((paths.shape[0],) + missing_values.shape[1:],
+                          dtype=missing_values.dtype)
+        values[is_current] = table_values[index[is_current]]
+        values[~is_current] = missing_values[inverse]
+        return values
+
+    def hsv_stats(self, image_files, image_dir='', image_size=None,
+                  mode='mean', background=None, n_jobs=1):
+        """The HSV statistics of image files.
+
+        Stored statistics are reused and the rest are computed in
+        parallel with :func:`mosaic.features.extract_hsv_stats_from_files`,
+        which takes the same parameters.
+
+        Returns
+        -------
+        np.array of shape [n_samples, 3]
+            An array containing the hsv statistics for each channel.
+        """
+        _, background_hsv = hsv.check_hsv_params(mode, background)
+        image_size = image_io.check_image_size(image_size)
+        params = {
+            'mode': mode,
+            'background': (None if background_hsv is None else
+                           [float(value) for value in background_hsv]),
+            'image_size': (None if image_size is None else
+                           [int(size) for size in image_size])
+        }
+
+        def compute(paths):
+            return hsv.extract_hsv_stats_from_files(
+                paths, image_size=image_size, mode=mode,
+                background=background, n_jobs=n_jobs)
+
+        return self.lookup(image_files, compute, 'hsv', params,
+                           image_dir=image_dir)
+
+    def clear(self):
+        """Remove all feature tables from the store."""
+        for file_name in os.listdir(self.store_dir):
+            if file_name.endswith('.npz'):
+                try:
+                    os.remove(os.path.join(self.store_dir, file_name))
+                except OSError:
+                    pass
+
+
+_FEATURE_STORE = None
+
+
+@contextlib.contextmanager
+def feature_store(store_dir=None):
+    """Store image features on disk while inside the context.
+
+    Sorting the images of a plot by one of the
+    :class:`mosaic.features.HSVFeatures`, as well as
+    :func:`mosaic.image_io.directory_to_dataframe`, reads the features
+    of images on disk from the store and only computes the missing ones.
+
+    Parameters
+    ----------
+    store_dir : str, optional
+        The directory holding the feature tables.
+
+    Examples
+    --------
+    >>> import mosaic as ms
+    >>> with ms.feature_store(store_dir='/tmp/features') as store:
+    >>>    ms.image_grid(data=data, sort_by=ms.HUE, image_size=50)
+    """
+    global _FEATURE_STORE
+    previous_store = _FEATURE_STORE
+    _FEATURE_STORE = FeatureStore(store_dir=store_dir)
+    try:
+        yield _FEATURE_STORE
+    finally:
+        _FEATURE_STORE = previous_store
+
+
+def set_feature_store(store_dir=None, enabled=True):
+    """Globally enable the feature store. Passing `enabled=False`
+    disables it again."""
+    global _FEATURE_STORE
+    if enabled:
+        _FEATURE_STORE = FeatureStore(store_dir=store_dir)
+    else:
+        _FEATURE_STORE = None
+    return _FEATURE_STORE
+
+
+def get_feature_store():
+    """Return the active FeatureStore or None if it is disabled."""
+    return _FEATURE_STORE
@@ -1,2 +1,3 @@
 from mosaic.grid.image_grid import *
 from mosaic.grid.scatter_grid import *
+from mosaic.grid.deep_zoom import *
@@ -0,0 +1,324 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+
+import numpy as np
+
+from joblib import Parallel, delayed
+from PIL import Image as pil_image
+
+from mosaic import data_utils
+from mosaic.grid.image_grid import (check_grid_images, iter_grid_rows,
+                                    sort_images)
+from mosaic.grid.scatter_grid import scatter_grid_order
+
+
+__all__ = ['deep_zoom_grid']
+
+
+TILE_FORMATS = {'jpeg': 'jpg', 'png': 'png'}
+
+
+DZI_TEMPLATE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008"\n'
+    '       Format="{tile_format}"\n'
+    '       Overlap="{overlap}"\n'
+    '       TileSize="{tile_size}">\n'
+    '  <Size Width="{width}" Height="{height}"/>\n'
+    '</Image>\n')
+
+
+def halve_rows(rows):
+    """Downsample RGB rows by a factor of two by averaging 2 x 2 blocks.
+    An odd last row or column is averaged with itself."""
+    rows = rows.astype(np.uint16)
+    if rows.shape[0] % 2:
+        rows = np.concatenate((rows, rows[-1:]), axis=0)
+    if rows.shape[1] % 2:
+        rows = np.concatenate((rows, rows[:, -1:]), axis=1)
+
+    rows = (rows[0::2, 0::2] + rows[1::2, 0::2] +
+            rows[0::2, 1::2] + rows[1::2, 1::2])
+    return ((rows + 2) // 4).astype(np.uint8)
+
+
+def tile_bounds(index, size, tile_size, overlap):
+    """The start and stop of tile `index` along an axis of length `size`
+    including the overlap with its neighbors."""
+    start = max(index * tile_size - overlap, 0)
+    stop = min((index + 1) * tile_size + overlap, size)
+    return start, stop
+
+
+def save_tile(tile, tile_file, tile_format='jpeg', quality=90):
+    pil_image.fromarray(np.ascontiguousarray(tile)).save(
+        tile_file, format=tile_format.upper(), quality=quality)
+
+
+class PyramidLevel(object):
+    """One level of a deep zoom image pyramid.
+
+    Rows of the level are pushed from top to bottom. A row of tiles is
+    written as soon as all of its rows have arrived and the rows are then
+    dropped, so a level only keeps about one row of tiles in memory. The
+    rows are also passed on at half the resolution to the next smaller
+    level.
+    """
+    def __init__(self, level, width, height, tile_dir, parallel,
+                 tile_size=254, overlap=1, tile_format='jpeg', quality=90):
+        self.level = level
+        self.width = width
+        self.height = height
+        self.tile_dir = os.path.join(tile_dir, str(level))
+        self.parallel = parallel
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.tile_format = tile_format
+        self.quality = quality
+
+        self.n_tile_rows = int(np.ceil(height / tile_size))
+        self.n_tile_cols = int(np.ceil(width / tile_size))
+        self.tile_row = 0
+        self.rows = np.empty((0, width, 3), dtype=np.uint8)
+        self.rows_start = 0
+        self.pending = np.empty((0, width, 3), dtype=np.uint8)
+
+        if not os.path.exists(self.tile_dir):
+            os.makedirs(self.tile_dir)
+
+        self.next_level = None
+        if level > 0:
+            self.next_level = PyramidLevel(
+                level - 1, (width + 1) // 2, (height + 1) // 2, tile_dir,
+                parallel, tile_size=tile_size, overlap=overlap,
+                tile_format=tile_format, quality=quality)
+
+    def write_tile_row(self, rows):
+        extension = TILE_FORMATS[self.tile_format]
+        tiles = []
+        for col in range(self.n_tile_cols):
+            left, right = tile_bounds(col, self.width,
+                                      self.tile_size, self.overlap)
+            tile_file = os.path.join(
+                self.tile_dir,
+                '{}_{}.{}'.format(col, self.tile_row, extension))
+            tiles.append((rows[:, left:right], tile_file))
+
+        self.parallel(delayed(save_tile)(tile, tile_file,
+                                         tile_format=self.tile_format,
+                                         quality=self.quality)
+                      for tile, tile_file in tiles)
+
+    def push(self, rows):
+        self.rows = np.concatenate((self.rows, rows), axis=0)
+        while self.tile_row < self.n_tile_rows:
+            top, bottom = tile_bounds(self.tile_row, self.height,
+                                      self.tile_size, self.overlap)
+            if self.rows_start + self.rows.shape[0] < bottom:
+                break
+
+            self.write_tile_row(
+                self.rows[top - self.rows_start:bottom - self.rows_start])
+            self.tile_row += 1
+
+            # keep the rows shared with the next row of tiles.
+            next_top = min(self.tile_row * self.tile_size - self.overlap,
+                           self.height)
+            self.rows = self.rows[next_top - self.rows_start:]
+            self.rows_start = next_top
+
+        if self.next_level is not None:
+            rows = np.concatenate((self.pending, rows), axis=0)
+            n_even = rows.shape[0] - rows.shape[0] % 2
+            self.pending = rows[n_even:]
+            if n_even:
+                self.next_level.push(halve_rows(rows[:n_even]))
+
+    def finish(self):
+        if self.next_level is not None:
+            if self.pending.shape[0]:
+                self.next_level.push(halve_rows(self.pending))
+            self.next_level.finish()
+
+
+def write_deep_zoom(strips, width, height, output,
+                    tile_size=254,
+                    overlap=1,
+                    tile_format='jpeg',
+                    quality=90,
+                    n_jobs=1):
+    """Write an image given as horizontal strips as a Deep Zoom (DZI)
+    tile pyramid.
+
+    Parameters
+    ----------
+    strips : iterable of np.array of shape [strip_height, width, 3]
+        The uint8 RGB rows of the image from top to bottom.
+
+    width, height : int
+        The size of the image in pixels.
+
+    output : str
+        The path of the .dzi manifest. The tiles are written to the
+        directory '<output without .dzi>_files'.
+
+    tile_size : int (default=254)
+        The size of the tiles without overlap.
+
+    overlap : int (default=1)
+        The number of pixels neighboring tiles share.
+
+    tile_format : str {'jpeg', 'png'} (default='jpeg')
+        The file format of the tiles.
+
+    quality : int (default=90)
+        The quality of JPEG tiles.
+
+    n_jobs : int (default=1)
+        The number of threads encoding the tiles of a row of tiles.
+
+    Returns
+    -------
+    output : str
+        The path of the .dzi manifest.
+    """
+    if tile_format not in TILE_FORMATS:
+        raise ValueError("Unknown tile_format `{}`. Must be one of "
+                         "{}.".format(tile_format, tuple(TILE_FORMATS)))
+
+    if not output.endswith('.dzi'):
+        output += '.dzi'
+    tile_dir = output[:-len('.dzi')] + '_files'
+
+    max_level = int(np.ceil(np.log2(max(width, height, 1))))
+    with Parallel(n_jobs=n_jobs, backend='threading') as parallel:
+        pyramid = PyramidLevel(max_level, width, height, tile_dir, parallel,
+                               tile_size=tile_size,
+                               overlap=overlap,
+                               tile_format=tile_format,
+                               quality=quality)
+        for strip in strips:
+            pyramid.push(strip)
+        pyramid.finish()
+
+    with open(output, 'w') as dzi_file:
+        dzi_file.write(DZI_TEMPLATE.format(
+            tile_format=TILE_FORMATS[tile_format],
+            overlap=overlap,
+            tile_size=tile_size,
+            width=width,
+            height=height))
+
+    return output
+
+
+def deep_zoom_grid(output,
+                   images=None,
+                   data=None,
+                   sort_by=None,
+                   x=None,
+                   y=None,
+                   assignment='kdtree',
+                   image_dir='',
+                   image_size=None,
+                   padding=None,
+                   tile_size=254,
+                   overlap=1,
+                   tile_format='jpeg',
+                   quality=90,
+                   n_jobs=1):
+    """Write a grid of images as a Deep Zoom (DZI) tile pyramid.
+
+    Grids of hundreds of thousands of images are too large to allocate
+    or display in one piece. Instead the grid is generated one row of
+    images at a time and cut into the tiles of every zoom level, which
+    a viewer such as OpenSeadragon loads on demand. Memory use is bounded
+    by a few rows of tiles per level.
+
+    Parameters
+    ----------
+    output : str
+        The path of the .dzi manifest. The tiles are written to the
+        directory '<output without .dzi>_files'.
+
+    images : str or array-like of shape [n_samples, width, height, channels], optional
+        Image array or name of the variable containing the image file
+        paths within `data`.
+
+    data : pandas.DataFrame, optional
+        Tidy ("long-form") dataframe where each column is a variable
+        and each row is an observation.
+
+    sort_by : str or array-like of shape [n_samples,], optional
+        Data or name of the variable to sort images by, as in
+        :func:`mosaic.image_grid`.
+
+    x, y : str or array-like, optional
+        Data or names of variables in `data`. If given, the images are
+        laid out as in :func:`mosaic.scatter_grid`.
+
+    assignment : str {'kdtree', 'chunked', 'optimal'} (default='kdtree')
+        How images are assigned to grid cells when `x` and `y` are given.
+
+    image_dir : str, optional
+        The location of the image files on disk.
+
+    image_size : int, optional
+        The size of each image in the grid.
+
+    padding : int, optional
+        The padding between images in the grid.
+
+    tile_size : int (default=254)
+        The size of the tiles without overlap.
+
+    overlap : int (default=1)
+        The number of pixels neighboring tiles share.
+
+    tile_format : str {'jpeg', 'png'} (default='jpeg')
+        The file format of the tiles.
+
+    quality : int (default=90)
+        The quality of JPEG tiles.
+
+    n_jobs : int (default=1)
+        The number of parallel workers used to decode the images and
+        to encode the tiles.
+
+    Returns
+    -------
+    output : str
+        The path of the .dzi manifest.
+    """
+    images = data_utils.get_images(data, images,
+                                   image_dir=image_dir,
+                                   as_image=False,
+                                   image_size=image_size,
+                                   n_jobs=n_jobs,
+                                   lazy=True)
+
+    if x is not None and y is not None:
+        image_order = scatter_grid_order(data_utils.get_variable(data, x),
+                                         data_utils.get_variable(data, y),
+                                         assignment=assignment)
+        images = data_utils.take_images(images, image_order)
+    elif sort_by is not None:
+        # the images stay lazy, so they are only decoded row by row.
+        images = sort_images(images, data=data, sort_by=sort_by,
+                             n_jobs=n_jobs, load_images=False)
+
+    padding, table_size = check_grid_images(images, padding=padding)
+    image_height, image_width = images.shape[1:3]
+    width = table_size * image_width + (table_size - 1) * padding
+    height = table_size * image_height + (table_size - 1) * padding
+
+    return write_deep_zoom(iter_grid_rows(images, padding=padding),
+                           width, height, output,
+                           tile_size=tile_size,
+                           overlap=overlap,
+                           tile_format=tile_format,
+                           quality=quality,
+                           n_jobs=n_jobs)
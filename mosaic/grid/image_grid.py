@@ -3,6 +3,7 @@ from __future__ import division
 from __future__ import unicode_literals
 
 import numpy as np
+import skimage
 from PIL import Image as pil_image
 
 from mosaic import data_utils
@@ -20,7 +21,8 @@ def images_to_grid(images, padding=None):
     ----------
     images : listof PIL Images.
         Images to display in the grid plot. All images must be
-        the same shape.
+        the same shape. A LazyImageArray of PIL Images is decoded
+        in batches while the grid is filled.
 
     padding : int, optional
         The padding between images in the grid.
@@ -74,6 +76,157 @@ def images_to_grid(images, padding=None):
     return grid_image
 
 
+def check_grid_images(images, padding=None):
+    """Validate the images of an array grid.
+
+    Returns
+    -------
+    padding : int
+        The padding between images in the grid.
+    table_size : int
+        The number of rows and columns of the grid.
+    """
+    n_samples = len(images)
+
+    if n_samples < 1:
+        raise ValueError('Cannot create a sprite image from zero images.')
+
+    if padding is None:
+        padding = 0
+
+    # grid plot should be sqrt(n_samples) x sqrt(n_samples). If
+    # n_samples is not a perfect square then we pad with white images.
+    table_size = int(np.ceil(np.sqrt(n_samples)))
+
+    return padding, table_size
+
+
+def grid_cells(grid_image, image_shape, table_size, padding):
+    """A writable view of the image cells of `grid_image` indexed by
+    (row, column, y, x, channel)."""
+    image_height, image_width = image_shape
+    row_stride, column_stride, channel_stride = grid_image.strides
+    n_rows = (grid_image.shape[0] + padding) // (image_height + padding)
+    return np.lib.stride_tricks.as_strided(
+        grid_image,
+        shape=(n_rows, table_size, image_height, image_width, 3),
+        strides=((image_height + padding) * row_stride,
+                 (image_width + padding) * column_stride,
+                 row_stride, column_stride, channel_stride))
+
+
+def paste_grid_row(cells, images):
+    """Write a row of images into the cells of a grid row. Grayscale
+    images are broadcast to RGB and an alpha channel is dropped."""
+    images = skimage.img_as_ubyte(np.asarray(images))
+    if images.ndim == 3:
+        images = images[..., np.newaxis]
+
+    try:
+        cells[:images.shape[0]] = images[..., :3]
+    except ValueError:
+        raise ValueError(
+            'Not all images have the same width and height. '
+            'You can force even sizes by setting the `image_size`'
+            'argument to the desired dimensions.')
+
+
+def array_to_grid(images, padding=None):
+    """Create a grid plot of images stored in an array.
+
+    The grid is filled one row at a time through a strided view of its
+    cells, so no PIL Image is created for the individual images. The
+    result is identical to :func:`images_to_grid`.
+
+    Parameters
+    ----------
+    images : np.array of shape [n_samples, height, width, n_channels]
+        Images to display in the grid plot. This may also be a memmap or
+        a LazyImageArray, in which case one row of images is read or
+        decoded at a time. Grayscale images are displayed in RGB and
+        an alpha channel is dropped.
+
+    padding : int, optional
+        The padding between images in the grid.
+
+    Returns
+    -------
+    grid : np.array of shape [grid_height, grid_width, 3]
+        The uint8 RGB grid image.
+    """
+    padding, table_size = check_grid_images(images, padding=padding)
+    image_height, image_width = images.shape[1:3]
+
+    grid_shape = (table_size * image_height + (table_size - 1) * padding,
+                  table_size * image_width + (table_size - 1) * padding,
+                  3)
+    grid_image = np.full(grid_shape, 255, dtype=np.uint8)
+
+    cells = grid_cells(grid_image, (image_height, image_width),
+                       table_size, padding)
+    for row_index, start in enumerate(range(0, len(images), table_size)):
+        paste_grid_row(cells[row_index], images[start:start + table_size])
+
+    return grid_image
+
+
+def iter_grid_rows(images, padding=None):
+    """Generate the grid of :func:`array_to_grid` from top to bottom
+    without allocating it.
+
+    Each strip holds one row of images followed by the padding below it,
+    so only one row of the grid is in memory at a time.
+
+    Parameters
+    ----------
+    images : np.array of shape [n_samples, height, width, n_channels]
+        Images to display in the grid plot. See :func:`array_to_grid`.
+
+    padding : int, optional
+        The padding between images in the grid.
+
+    Yields
+    ------
+    strip : np.array of shape [strip_height, grid_width, 3]
+        The next uint8 RGB rows of the grid.
+    """
+    padding, table_size = check_grid_images(images, padding=padding)
+    image_height, image_width = images.shape[1:3]
+    grid_width = table_size * image_width + (table_size - 1) * padding
+
+    for row_index in range(table_size):
+        strip_height = image_height
+        if row_index < table_size - 1:
+            strip_height += padding
+        strip = np.full((strip_height, grid_width, 3), 255, dtype=np.uint8)
+
+        start = row_index * table_size
+        if start < len(images):
+            cells = grid_cells(strip, (image_height, image_width),
+                               table_size, padding)
+            paste_grid_row(cells[0], images[start:start + table_size])
+
+        yield strip
+
+
+def sort_images(images, data=None, sort_by=None, n_jobs=1,
+                load_images=True):
+    """Order images by a variable in `data` or by one of the
+    :class:`mosaic.features.HSVFeatures` of the images.
+
+    If `load_images` is False, the features of a LazyImageArray are
+    computed one file at a time and the sorted images stay lazy, see
+    :func:`mosaic.data_utils.hsv_stats`."""
+    if sort_by in features.HSVFeatures.all_features():
+        images, hsv = data_utils.hsv_stats(images, n_jobs=n_jobs,
+                                           load_images=load_images)
+        sort_by_values = hsv[:, features.HSVFeatures.feature_index(sort_by)]
+        return data_utils.take_images(images, np.argsort(sort_by_values))
+
+    sort_by = data_utils.get_variable(data, sort_by)
+    return data_utils.take_images(images, np.argsort(sort_by))
+
+
 def image_grid(images=None,
                data=None,
                sort_by=None,
@@ -141,20 +294,16 @@ def image_grid(images=None,
     .. plot:: ../examples/image_grid_mnist.py
     """
     images = data_utils.get_images(data, images,
-                                   as_image=True,
+                                   image_dir=image_dir,
+                                   as_image=False,
                                    image_size=image_size,
-                                   n_jobs=n_jobs)
+                                   n_jobs=n_jobs,
+                                   lazy=True)
 
     if sort_by is not None:
-        if sort_by in features.HSVFeatures.all_features():
-            hsv = features.extract_hsv_stats(images, n_jobs=n_jobs)
-            sort_by_values = hsv[:, features.HSVFeatures.feature_index(sort_by)]
-            sorted_indices = np.argsort(sort_by_values)
-            images = [images[i] for i in sorted_indices]
-        else:
-            sort_by = data_utils.get_variable(data, sort_by)
-            images = [images[i] for i in np.argsort(sort_by)]
-
-    grid = images_to_grid(images, padding=padding)
+        images = sort_images(images, data=data, sort_by=sort_by,
+                             n_jobs=n_jobs)
+
+    grid = array_to_grid(images, padding=padding)
 
     return plots.pillow_to_matplotlib(grid, **kwargs)
@@ -3,28 +3,187 @@ from __future__ import division
 from __future__ import unicode_literals
 
 import numpy as np
-import sklearn.metrics as metrics
 import seaborn as sns
 
+from scipy import optimize
+from scipy import spatial
+
 from mosaic import features
 from mosaic import contexts
-from mosaic import image_io
 from mosaic import plots
 from mosaic import data_utils
-from mosaic.grid.image_grid import images_to_grid
+from mosaic.grid.image_grid import array_to_grid, images_to_grid
 
 
 __all__ = ['scatter_grid']
 
 
-def images_to_scatter_grid(images, x_var, y_var, padding=None, **kwargs):
+ASSIGNMENT_METHODS = ('kdtree', 'chunked', 'optimal')
+
+
+def grid_points(n_samples):
+    """The centers of the first `n_samples` cells of a regularly spaced
+    sqrt(n_samples) x sqrt(n_samples) grid on the unit square in the
+    order the cells are filled (row by row)."""
+    grid_size = int(np.ceil(np.sqrt(n_samples)))
+    grid_1d = np.linspace(0, 1, grid_size)
+    grid_2d = np.dstack(np.meshgrid(grid_1d, grid_1d)).reshape(-1, 2)
+    return grid_2d[:n_samples]
+
+
+def assign_kdtree(grid_2d, xy, n_neighbors=32, chunk_size=256,
+                  rebuild_every=256):
+    """Greedily assign each grid cell to the nearest point that is not
+    yet assigned using a KD-tree.
+
+    The `n_neighbors` nearest points of `chunk_size` cells are found with
+    a single batched query. Only when all of them are taken is the tree
+    queried again with twice as many neighbors. The tree is rebuilt from
+    the free points before a chunk once `rebuild_every` of its points are
+    taken, so a query never has to skip more than about `rebuild_every`
+    taken points.
+
+    A cell therefore costs O(rebuild_every * log(n)) in the worst case
+    and the rebuilds cost O(n^2 / rebuild_every) in total. The rebuilds
+    are cheap enough that the time grows about linearly up to a few
+    hundred thousand points, but they dominate for much larger inputs.
+    """
+    n_samples = xy.shape[0]
+    image_order = np.empty(grid_2d.shape[0], dtype=np.intp)
+    is_used = np.zeros(n_samples, dtype=bool)
+
+    # the tree is rebuilt often, so it is built quickly rather than
+    # balanced for fast queries.
+    tree_options = dict(balanced_tree=False, compact_nodes=False)
+    tree_points = np.arange(n_samples)
+    tree = spatial.cKDTree(xy, **tree_options)
+    n_used_in_tree = 0
+    for start in range(0, grid_2d.shape[0], chunk_size):
+        if n_used_in_tree >= rebuild_every:
+            tree_points = np.flatnonzero(~is_used)
+            tree = spatial.cKDTree(xy[tree_points], **tree_options)
+            n_used_in_tree = 0
+
+        n_candidates = tree_points.shape[0]
+        n_chunk_neighbors = min(n_neighbors, n_candidates)
+        distances, neighbors = tree.query(
+            grid_2d[start:start + chunk_size], k=n_chunk_neighbors)
+        distances = distances.reshape(-1, n_chunk_neighbors)
+        neighbors = tree_points[neighbors.reshape(-1, n_chunk_neighbors)]
+
+        for cell in range(distances.shape[0]):
+            dist, index = distances[cell], neighbors[cell]
+            k = n_chunk_neighbors
+            while True:
+                is_free = ~is_used[index]
+                # the nearest free point is only known if a point further
+                # away than it was found as well.
+                if is_free.any():
+                    min_dist = dist[is_free][0]
+                    if dist[-1] > min_dist or k >= n_candidates:
+                        break
+
+                k = min(2 * k, n_candidates)
+                dist, index = tree.query(grid_2d[start + cell], k=k)
+                dist = np.atleast_1d(dist)
+                index = tree_points[np.atleast_1d(index)]
+
+            # ties are broken by the index of the point.
+            best = index[is_free & (dist == min_dist)].min()
+            image_order[start + cell] = best
+            is_used[best] = True
+            n_used_in_tree += 1
+
+    return image_order
+
+
+def assign_chunked(grid_2d, xy, chunk_size=1024):
+    """Greedily assign each grid cell to the nearest point that is not
+    yet assigned. Distances are computed for `chunk_size` cells at a time
+    to bound the memory used."""
+    image_order = np.empty(grid_2d.shape[0], dtype=np.intp)
+    is_used = np.zeros(xy.shape[0], dtype=bool)
+    for start in range(0, grid_2d.shape[0], chunk_size):
+        dist = spatial.distance.cdist(grid_2d[start:start + chunk_size], xy)
+        dist[:, is_used] = np.inf
+        for row in range(dist.shape[0]):
+            index = np.argmin(dist[row])
+            image_order[start + row] = index
+            is_used[index] = True
+            dist[row:, index] = np.inf
+
+    return image_order
+
+
+def assign_optimal(grid_2d, xy):
+    """Assign grid cells to points so that the total distance between the
+    cells and their points is minimal. This takes O(n^3) time and O(n^2)
+    memory and is only practical for a few thousand images."""
+    dist = spatial.distance.cdist(grid_2d, xy)
+    cells, points = optimize.linear_sum_assignment(dist)
+    return points[np.argsort(cells)]
+
+
+def assign_grid_cells(xy, assignment='kdtree'):
+    """Determine which point fills each cell of a regularly spaced grid.
+
+    Parameters
+    ----------
+    xy : np.array of shape [n_samples, 2]
+        The coordinates of the points scaled to the unit square.
+
+    assignment : str {'kdtree', 'chunked', 'optimal'}
+        The assignment strategy. 'kdtree' and 'chunked' visit the cells
+        row by row and assign each cell the nearest point that is not
+        yet assigned. Both give the same layout, but 'kdtree' only
+        searches the neighborhood of each cell, which is about linear
+        in practice (see :func:`assign_kdtree`), while 'chunked'
+        computes the distances to all points in O(n^2) time and bounded
+        memory. 'optimal' minimizes the total distance between cells and
+        points, which is only feasible for small datasets.
+
+    Returns
+    -------
+    np.array of shape [n_samples,]
+        The index of the point placed in each cell. Every point is
+        placed exactly once.
+    """
+    if assignment not in ASSIGNMENT_METHODS:
+        raise ValueError("Unknown assignment `{}`. Must be one of "
+                         "{}.".format(assignment, ASSIGNMENT_METHODS))
+
+    grid_2d = grid_points(xy.shape[0])
+    if xy.shape[0] == 0:
+        return np.empty(0, dtype=np.intp)
+    elif assignment == 'kdtree':
+        return assign_kdtree(grid_2d, xy)
+    elif assignment == 'chunked':
+        return assign_chunked(grid_2d, xy)
+    return assign_optimal(grid_2d, xy)
+
+
+def scatter_grid_order(x_var, y_var, assignment='kdtree'):
+    """The order in which images fill the grid of a scatter grid, i.e.
+    the index of the image placed in each cell row by row."""
+    # scale the variables between 0-1 (subtract off min?)
+    xy = np.c_[x_var, y_var].astype(np.float64)
+    features.minmax_scale(xy[:, 0])
+    features.minmax_scale(xy[:, 1])
+
+    # place the images on a grid of evenly spaced points of size
+    # sqrt(n_samples) x sqrt(n_samples) based on their nearest neighbors
+    return assign_grid_cells(xy, assignment=assignment)
+
+
+def images_to_scatter_grid(images, x_var, y_var, padding=None,
+                           assignment='kdtree', **kwargs):
     """Creates a grid plot from a scatter plot.
 
     Parameters
     ----------
-    images : list of length [n_samples,]
-        A List of PIL Image objects. All images must be
-        the same shape NxWx3.
+    images : list of length [n_samples,] or np.array
+        A List of PIL Image objects or an array of images. All images
+        must be the same shape NxWx3.
 
     x_var : np.array of shape [n_samples,]
         The x-coordinate in euclidean space.
@@ -35,33 +194,21 @@ def images_to_scatter_grid(images, x_var, y_var, padding=None, **kwargs):
     padding : int, optional
         The padding between images in the grid.
 
+    assignment : str {'kdtree', 'chunked', 'optimal'}
+        How images are assigned to grid cells.
+        See :func:`assign_grid_cells`.
+
     Returns
     -------
     A properly shaped width x height x 3 PIL Image.
     """
-    # scale the variables between 0-1 (subtract off min?)
-    features.minmax_scale(x_var)
-    features.minmax_scale(y_var)
-    xy = np.c_[x_var, y_var]
-
-    # make a grid of evenly spaced points on the grid.
-    # The grid is of size sqrt(n_samples) x sqrt(n_samples)
-    grid_size = int(np.ceil(np.sqrt(len(images))))
-    grid_1d = np.linspace(0, 1, grid_size)
-    grid_2d = np.dstack(np.meshgrid(grid_1d, grid_1d)).reshape(-1, 2)
-
-    # distances between the evenly spaced grid and the points
-    dist = metrics.euclidean_distances(grid_2d, xy)
-
-    # determine order based on nearest neighbors
-    image_order = []
-    for i in range(grid_2d.shape[0]):
-        index = np.argmin(dist[i, :])
-        image_order.append(index)
-        dist[:, index] = np.inf  # set to inf so we don't pick this point again
-    images = [images[index] for index in image_order]
+    image_order = scatter_grid_order(x_var, y_var, assignment=assignment)
+    images = data_utils.take_images(images, image_order)
 
-    grid = images_to_grid(images, padding=padding)
+    if isinstance(images, list):
+        grid = images_to_grid(images, padding=padding)
+    else:
+        grid = array_to_grid(images, padding=padding)
     return plots.pillow_to_matplotlib(grid, **kwargs)
 
 
@@ -72,6 +219,7 @@ def scatter_grid(x, y,
                   image_dir='',
                   image_size=None,
                   padding=None,
+                  assignment='kdtree',
                   n_jobs=1,
                   **kwargs):
     """Draw a plot ordering images in a regularly spaced 2-d grid
@@ -105,6 +253,13 @@ def scatter_grid(x, y,
     padding : int, optional
         The padding between images in the grid.
 
+    assignment : str {'kdtree', 'chunked', 'optimal'} (default='kdtree')
+        How images are assigned to grid cells. 'kdtree' and 'chunked'
+        greedily fill the cells row by row with the nearest remaining
+        image. 'kdtree' handles hundreds of thousands of images.
+        'optimal' minimizes the total distance between the images and
+        their cells, but takes O(n^3) time.
+
     n_jobs : int (default=1)
         The number of parallel workers to use for loading
         the image files.
@@ -135,16 +290,16 @@ def scatter_grid(x, y,
         hue = data_utils.get_variable(data, hue)
         values, value_map = np.unique(hue, return_inverse=True)
         palette = sns.husl_palette(len(values))
-        images = [features.color_image(img, hue=palette[val]) for
-                  img, val in zip(images, value_map)]
-        images = [image_io.to_pillow_image(img) for img in images]
+        images = features.color_images(images, value_map, palette)
     else:
-        # load images
+        # images are decoded while the grid is filled.
         images = data_utils.get_images(
             data, images,
             image_dir=image_dir,
-            as_image=True,
+            as_image=False,
             image_size=image_size,
-            n_jobs=n_jobs)
+            n_jobs=n_jobs,
+            lazy=True)
 
-    return images_to_scatter_grid(images, x_var, y_var, padding=padding, **kwargs)
+    return images_to_scatter_grid(images, x_var, y_var, padding=padding,
+                                  assignment=assignment, **kwargs)
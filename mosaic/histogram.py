@@ -20,6 +20,55 @@ from mosaic import plots
 __all__ = ['image_histogram']
 
 
+def histogram_bins(x, n_bins=None, sort_by=None, max_per_bin=None):
+    """Assign each sample to a histogram bin.
+
+    Parameters
+    ----------
+    x : np.array of shape [n_samples,]
+        The variable whose histogram is displayed.
+
+    n_bins : int or None, optional
+        Specification of the number of bins. If None, then the
+        Freedman-Diaconis estimator is used to determine the number of bins.
+
+    sort_by : np.array of shape [n_samples,], optional
+        The values images are sorted by within a bin.
+
+    max_per_bin : int, optional
+        The maximum number of samples kept in a bin. Larger bins are
+        thinned to evenly spaced samples in sorted order.
+
+    Returns
+    -------
+    bin_edges : np.array of shape [n_bins + 1,]
+        The edges of the bins as returned by `np.histogram`.
+
+    bins : list of np.array
+        The indices of the samples in each bin, sorted by `sort_by`.
+    """
+    n_bins = n_bins if n_bins is not None else 'fd'
+    bin_edges = np.histogram_bin_edges(x, bins=n_bins)
+
+    # like np.histogram the last bin includes its right edge.
+    bin_index = np.digitize(x, bin_edges[1:-1])
+    if sort_by is not None:
+        order = np.lexsort((sort_by, bin_index))
+    else:
+        order = np.argsort(bin_index, kind='stable')
+
+    counts = np.bincount(bin_index, minlength=bin_edges.shape[0] - 1)
+    bins = np.split(order, np.cumsum(counts)[:-1])
+
+    if max_per_bin is not None:
+        bins = [index[np.linspace(0, index.shape[0] - 1,
+                                  max_per_bin).round().astype(np.intp)]
+                if index.shape[0] > max_per_bin else index for
+                index in bins]
+
+    return bin_edges, bins
+
+
 def images_to_histogram(images, x, n_bins=None, sort_by=None):
     """Create an image histogram.
 
@@ -43,10 +92,9 @@ def images_to_histogram(images, x, n_bins=None, sort_by=None):
     -------
     A properly shaped width x height x 3 PIL Image.
     """
-    n_bins = n_bins if n_bins is not None else 'fd'
-    hist, bin_edges = np.histogram(x, bins=n_bins)
-    n_bins = hist.shape[0]
-    bin_max = hist.max()
+    bin_edges, bins = histogram_bins(x, n_bins=n_bins, sort_by=sort_by)
+    n_bins = len(bins)
+    bin_max = max(index.shape[0] for index in bins)
 
     width, height = images[0].size
     px_w = width * n_bins
@@ -56,48 +104,34 @@ def images_to_histogram(images, x, n_bins=None, sort_by=None):
     background_color = (255, 255, 255)
     canvas = pil_image.new('RGB', (px_w, px_h), background_color)
 
-    thumbnail_px = (width, height)
-
-    for bin_idx, edge in enumerate(zip(bin_edges, bin_edges[1:])):
-        edge_mask = (x >= edge[0]) & (x < edge[1])
-        tmp_sort = sort_by[edge_mask]
-        tmp = [images[index] for index in np.where(edge_mask)[0]]
-
+    for bin_idx, index in enumerate(bins):
         # sort y values if present
         if sort_by is not None:
-            tmp = [tmp[index] for index in np.argsort(tmp_sort)[::-1]]
+            index = index[::-1]
 
-        y_coord = px_h
+        y_coord = px_h - height
         x_coord = width * bin_idx
 
-        for thumbnail in tmp:
-            canvas.paste(thumbnail, (x_coord, y_coord))
+        for image_index in index:
+            canvas.paste(images[image_index], (x_coord, y_coord))
             y_coord -= height
 
     return canvas
 
 
-def histogram_matplotlib(images, x, n_bins=None, sort_by=None, **kwargs):
-    fig, ax = plt.subplots(**kwargs)
+def histogram_matplotlib(images, bin_edges, bins, **kwargs):
+    """Draw an image histogram with one `imshow` per image.
 
-    n_bins = n_bins if n_bins is not None else 'fd'
-    hist, bin_edges = np.histogram(x, bins=n_bins)
-    n_bins = hist.shape[0]
-    bin_max = hist.max()
+    The images of bin `i` are ``images[bins[i]]`` and are stacked from
+    the bottom up."""
+    fig, ax = plt.subplots(**kwargs)
 
     y_max = 0
-    for bin_idx, edge in enumerate(zip(bin_edges, bin_edges[1:])):
+    for index, edge in zip(bins, zip(bin_edges, bin_edges[1:])):
         img_height = abs(edge[1] - edge[0])
-        edge_mask = (x >= edge[0]) & (x < edge[1])
-        bin_images = images[edge_mask]
-
-        # sort y values if present
-        if sort_by is not None:
-            bin_sort = sort_by[edge_mask]
-            bin_images = bin_images[np.argsort(bin_sort)]
 
         left, right = edge
-        for i, img in enumerate(bin_images):
+        for i, img in enumerate(images[index]):
             bottom = img_height * i
             top = bottom + img_height
             plots.imshow(img, extent=[left, right, bottom, top], interpolation='lanczos')
@@ -108,7 +142,53 @@ def histogram_matplotlib(images, x, n_bins=None, sort_by=None, **kwargs):
     ax.set_ylim(0, y_max)
     ax.yaxis.set_visible(False)
 
-    return sns.despine(ax=ax, left=True)
+    sns.despine(ax=ax, left=True)
+    return ax
+
+
+def histogram_canvas(images, bins):
+    """Stack the images of each bin into a column of a single RGBA image.
+    The first image of a bin is at the bottom and pixels above the
+    top image of a bin are transparent."""
+    image_height, image_width = images.shape[1:3]
+    n_rows = max(index.shape[0] for index in bins)
+    canvas = np.zeros((n_rows * image_height, len(bins) * image_width, 4),
+                      dtype=np.uint8)
+
+    for bin_idx, index in enumerate(bins):
+        if not index.shape[0]:
+            continue
+
+        column = plots.as_ubyte_rgb(images[index[::-1]])
+        column = column.reshape(-1, image_width, 3)
+        left = bin_idx * image_width
+        canvas[-column.shape[0]:, left:left + image_width, :3] = column
+        canvas[-column.shape[0]:, left:left + image_width, 3] = 255
+
+    return canvas
+
+
+def histogram_raster(images, bin_edges, bins, **kwargs):
+    """Draw an image histogram as a single raster image.
+
+    The layout is the same as :func:`histogram_matplotlib`, but the
+    images are stacked into one array with :func:`histogram_canvas` and
+    drawn with a single `imshow`."""
+    fig, ax = plt.subplots(**kwargs)
+
+    img_height = abs(bin_edges[1] - bin_edges[0])
+    y_max = img_height * max(index.shape[0] for index in bins)
+    if y_max:
+        ax.imshow(histogram_canvas(images, bins),
+                  extent=[bin_edges[0], bin_edges[-1], 0, y_max],
+                  interpolation='lanczos')
+
+    ax.set_xlim(bin_edges[0], bin_edges[-1])
+    ax.set_ylim(0, y_max)
+    ax.yaxis.set_visible(False)
+
+    sns.despine(ax=ax, left=True)
+    return ax
 
 
 def image_histogram(x,
@@ -118,6 +198,8 @@ def image_histogram(x,
                     sort_by=features.HSVFeatures.SATURATION,
                     image_dir='',
                     image_size=None,
+                    max_per_bin=None,
+                    render='raster',
                     n_jobs=1,
                     **kwargs):
     """Create an univariate image histogram binned by the `x`
@@ -150,6 +232,17 @@ def image_histogram(x,
     image_size : int
         The size of each image in the scatter plot.
 
+    max_per_bin : int, optional
+        The maximum number of images stacked in a bin. Larger bins show
+        evenly spaced images in sorted order. Only the displayed images
+        are loaded.
+
+    render : str {'raster', 'artists'} (default='raster')
+        How the images are drawn. 'raster' stacks all images into a
+        single image drawn with one `imshow`. 'artists' draws each image
+        with its own `imshow`, which becomes slow for thousands of
+        images.
+
     n_jobs : int (default=1)
         The number of parallel workers to use for loading
         the image files.
@@ -167,24 +260,42 @@ def image_histogram(x,
 
     .. plot:: ../examples/image_histogram.py
     """
+    if render not in ('raster', 'artists'):
+        raise ValueError("Unknown render `{}`. Must be one of "
+                         "{{'raster', 'artists'}}.".format(render))
+
     images = data_utils.get_images(
         data, images,
         image_dir=image_dir,
         image_size=image_size,
-        index=None,#x.index,
         as_image=False,
-        n_jobs=n_jobs)
+        n_jobs=n_jobs,
+        lazy=True)
 
     x = data_utils.get_variable(data, x)
 
     if sort_by is not None:
         if sort_by in features.HSVFeatures.all_features():
-            hsv = features.extract_hsv_stats(images, n_jobs=n_jobs)
+            # with `max_per_bin` the features are computed one image at a
+            # time, so only the displayed images are kept in memory.
+            images, hsv = data_utils.hsv_stats(
+                images, n_jobs=n_jobs, load_images=max_per_bin is None)
             sort_by = hsv[:, features.HSVFeatures.feature_index(sort_by)]
         else:
             sort_by = data_utils.get_variable(data, sort_by)
 
+    bin_edges, bins = histogram_bins(x, n_bins=n_bins, sort_by=sort_by,
+                                     max_per_bin=max_per_bin)
+
+    # decode the displayed images in one batch and index them by position.
+    shown = np.concatenate(bins)
+    images = data_utils.load_lazy_images(data_utils.take_images(images, shown))
+    bins = np.split(np.arange(shown.shape[0]),
+                    np.cumsum([index.shape[0] for index in bins])[:-1])
+
     #histo = images_to_histogram(images, x, n_bins=n_bins, sort_by=sort_by)
     #return plots.pillow_to_matplotlib(histo, **kwargs)
 
-    return histogram_matplotlib(images, x, n_bins=n_bins, sort_by=sort_by, **kwargs)
+    if render == 'raster':
+        return histogram_raster(images, bin_edges, bins, **kwargs)
+    return histogram_matplotlib(images, bin_edges, bins, **kwargs)
@@ -2,24 +2,50 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import unicode_literals
 
+import collections
+import concurrent.futures
 import glob
 import os
 import itertools
 import numbers
+import queue
+import tempfile
+import threading
 
 import pandas as pd
 import numpy as np
 import skimage
 
-from joblib import Parallel, delayed
+from joblib import Parallel, delayed, effective_n_jobs
 from PIL import Image as pil_image
 
+from mosaic import cache as cache_lib
 from mosaic import contexts
 from mosaic import features as feature_lib
+from mosaic import manifest
+from mosaic import parallel
 
 
 image_extensions = {'jpg', 'jpeg', 'png'}
 
+#: A batch of decoded images yielded by :func:`iter_images`. `indices`
+#: are the positions of the images in the original sequence of files.
+ImageBatch = collections.namedtuple(
+    'ImageBatch', ['images', 'image_files', 'indices'])
+
+# EXIF tag holding the orientation of the camera.
+EXIF_ORIENTATION = 0x0112
+
+# Sentinel marking the end of an iterator.
+_EXHAUSTED = object()
+
+# Minimum ratio between the size of an image after the fast integer
+# pre-reduction and the requested thumbnail size.
+REDUCING_GAP = 2
+
+# Image modes supported by `PIL.Image.reduce`
+REDUCE_MODES = {'L', 'LA', 'RGB', 'RGBA'}
+
 
 def image_path(image_file, image_dir=''):
     """Construct the full image path to a file.
@@ -78,6 +104,37 @@ def image_glob(image_directory, ext):
     return glob.glob(image_glob_pattern(image_directory, ext))
 
 
+def find_images(image_dir, recursive=False, manifest_path=None):
+    """List the image files in a directory.
+
+    The directory is walked with `os.scandir` and extensions are matched
+    regardless of case.
+
+    Parameters
+    ----------
+    image_dir : str
+        The directory where the images are located.
+    recursive : bool (default=False)
+        Whether to include images in sub-directories.
+    manifest_path : str, optional
+        A JSON file used to record the contents of the directory. Later
+        calls only list the directories that changed since. See
+        :func:`mosaic.manifest.scan_directory`.
+
+    Returns
+    -------
+    list of str:
+        The image paths relative to `image_dir`.
+    """
+    if manifest_path is not None:
+        return list(manifest.scan_directory(
+            image_dir, recursive=recursive,
+            manifest_path=manifest_path)['image_path'])
+
+    return [image_file for image_file, _, _ in
+            manifest.iter_directory(image_dir, recursive=recursive)]
+
+
 def sample_images(images, n_samples, seed=123):
     """Take a random sample without replacement of images from a list of
     images.
@@ -114,11 +171,108 @@ def to_pillow_image(img_array, image_size=None):
     return img
 
 
+def check_image_size(image_size):
+    """Convert an integer `image_size` to a square (width, height) tuple."""
+    if isinstance(image_size, (numbers.Integral, np.integer)):
+        image_size = (image_size, image_size)
+    return image_size
+
+
+def resolve_cache(cache, image_size):
+    """Determine the ThumbnailCache to use for loading images.
+
+    `cache=None` selects the globally active cache (if any) while
+    `cache=False` disables caching. Only resized images are cached.
+    """
+    if cache is None:
+        cache = cache_lib.get_thumbnail_cache()
+
+    if not cache or not image_size:
+        return None
+
+    return cache
+
+
+def resample_key(fast_decode=False):
+    """The resampling pipeline used to produce a thumbnail. Thumbnails
+    produced by different pipelines are cached separately."""
+    if fast_decode:
+        return (pil_image.LANCZOS, 'fast_decode', REDUCING_GAP)
+    return pil_image.LANCZOS
+
+
+def decode_image(fp, image_size=None, fast_decode=False):
+    """Decode an image file into an RGB PIL Image of size `image_size`.
+
+    Parameters
+    ----------
+    fp : str, file object or PIL.Image
+        The image file to decode or an image opened with
+        `PIL.Image.open` whose pixels have not been loaded yet.
+    image_size : tuple (default=None)
+        The target size in pixels. If None then no resizing is performed.
+    fast_decode : bool (default=False)
+        Whether to decode JPEGs at a reduced resolution using the DCT
+        scaling of the decoder (1/2, 1/4 or 1/8 of the original size) and
+        to reduce all other formats by an integer factor before the final
+        LANCZOS resample. The result is visually indistinguishable from the
+        full resolution path for thumbnails, but is not bit-identical.
+
+    Returns
+    -------
+    PIL.Image in RGB mode.
+    """
+    img = fp if isinstance(fp, pil_image.Image) else pil_image.open(fp)
+
+    if image_size and fast_decode:
+        target_size = (image_size[1], image_size[0])
+
+        # only affects JPEGs. The decoder picks the largest DCT scale
+        # that keeps the image at least as large as `target_size`.
+        img.draft('RGB', (target_size[0] * REDUCING_GAP,
+                          target_size[1] * REDUCING_GAP))
+
+        # the header of a small file can still describe a huge image.
+        # Refuse to decode anything that would not fit in memory.
+        if img.size[0] * img.size[1] > (pil_image.MAX_IMAGE_PIXELS or np.inf):
+            raise pil_image.DecompressionBombError(
+                'Image size ({} pixels) exceeds limit of {} pixels, could '
+                'be a decompression bomb DOS attack.'.format(
+                    img.size[0] * img.size[1], pil_image.MAX_IMAGE_PIXELS))
+
+        if img.mode not in REDUCE_MODES:
+            img = img.convert('RGB')
+
+        # cheap box reduction by an integer factor. This keeps at least
+        # REDUCING_GAP times the target size for the final resample.
+        factor = min(img.size[0] // (target_size[0] * REDUCING_GAP),
+                     img.size[1] // (target_size[1] * REDUCING_GAP))
+        if factor > 1:
+            img = img.reduce(int(factor))
+
+    img = img.convert('RGB')
+
+    if image_size:
+        img = img.resize((image_size[1], image_size[0]), pil_image.LANCZOS)
+
+    return img
+
+
+def format_image(img_array, as_image=False, dtype=np.uint8):
+    """Format a decoded uint8 image array as the requested output type."""
+    if as_image:
+        return pil_image.fromarray(img_array)
+
+    return np.asarray(img_array, dtype)
+
+
 def load_image(image_file,
                image_dir='',
                image_size=None,
                as_image=False,
-               dtype=np.uint8):
+               dtype=np.uint8,
+               cache=None,
+               fast_decode=False):
     """Loads an image from a file on disk.
 
     Support formats are `jpg`, `png`, or `gif`.
@@ -138,15 +292,29 @@ def load_image(image_file,
         otherwise the output is a numpy array.
     dtype : numpy dtype (default=np.uint8)
         The dtype of the output numpy array.
+    cache : ThumbnailCache or bool, optional
+        The thumbnail cache consulted before decoding the image. The
+        default (None) uses the cache activated with
+        :func:`mosaic.thumbnail_cache`. False disables caching.
+    fast_decode : bool (default=False)
+        Whether to decode the image at a reduced resolution before
+        resizing it to `image_size`. See :func:`decode_image`.
     """
     image_loc = image_path(image_file, image_dir=image_dir)
-    img = pil_image.open(image_loc).convert('RGB')
+    image_size = check_image_size(image_size)
 
-    if isinstance(image_size, (numbers.Integral, np.integer)):
-        image_size = (image_size, image_size)
+    cache = resolve_cache(cache, image_size)
+    if cache is not None:
+        key = cache.key(image_loc, image_size, resample_key(fast_decode))
+        img = cache.get(key)
+        if img is None:
+            img = load_image(image_loc, image_size=image_size, cache=False,
+                             fast_decode=fast_decode)
+            cache.put(key, img)
+        return format_image(img, as_image=as_image, dtype=dtype)
 
-    if image_size:
-        img = img.resize((image_size[1], image_size[0]), pil_image.LANCZOS)
+    img = decode_image(image_loc, image_size=image_size,
+                       fast_decode=fast_decode)
 
     if as_image:
         return img
@@ -161,7 +329,12 @@ def load_images(image_files,
                 as_image=False,
                 random_state=123,
                 n_jobs=1,
-                dtype=np.uint8):
+                dtype=np.uint8,
+                cache=None,
+                fast_decode=False,
+                shared_memory=False,
+                store=None,
+                backend='auto'):
     """Loads images from a file on disk.
 
     Support formats are `jpg`, `png`, or `gif`.
@@ -189,18 +362,78 @@ def load_images(image_files,
         specified then all cores are utilized.
     dtype : numpy dtype (default=np.uint8)
         The dtype of the output numpy array.
+    cache : ThumbnailCache or bool, optional
+        The thumbnail cache consulted before decoding the images. The
+        default (None) uses the cache activated with
+        :func:`mosaic.thumbnail_cache`. False disables caching.
+    fast_decode : bool (default=False)
+        Whether to decode the images at a reduced resolution before
+        resizing them to `image_size`. See :func:`decode_image`.
+    shared_memory : bool (default=False)
+        Whether the workers decode the images directly into a single
+        preallocated array shared with the parent process instead of
+        sending each image back. The shared array is returned without a
+        copy. All images must have the same size. Ignored if `as_image`
+        is True.
+    store : ImageStore, optional
+        A packed store of pre-resized images built with
+        :func:`mosaic.image_store.build_image_store`. If given, the images
+        are read from the memory mapped store without any decoding.
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to decode the images in parallel. Pillow
+        releases the GIL while decoding, so threads avoid the cost of
+        starting processes and pickling the results. 'auto' picks threads
+        or processes based on the number and size of the files and the
+        output type.
     """
     if n_samples is not None and n_samples < len(image_files):
         image_files = sample_images(image_files, n_samples, seed=random_state)
 
-    # perform this in parallel with joblib
-    images = Parallel(n_jobs=n_jobs)(
-                delayed(load_image)(img,
+    image_size = check_image_size(image_size)
+    if store is not None:
+        return load_images_from_store(image_files,
+                                      store,
+                                      image_dir=image_dir,
+                                      image_size=image_size,
+                                      as_image=as_image,
+                                      dtype=dtype)
+
+    cache = resolve_cache(cache, image_size)
+    backend = parallel.select_load_backend(image_files,
+                                           image_dir=image_dir,
+                                           as_image=as_image,
+                                           n_jobs=n_jobs,
+                                           backend=backend)
+    if shared_memory and not as_image:
+        return load_images_shared(image_files,
+                                  image_dir=image_dir,
+                                  image_size=image_size,
+                                  n_jobs=n_jobs,
+                                  dtype=dtype,
+                                  cache=cache,
+                                  fast_decode=fast_decode,
+                                  backend=backend)
+    elif cache is not None:
+        images = load_images_cached(image_files,
+                                    cache,
                                     image_dir=image_dir,
                                     image_size=image_size,
-                                    as_image=as_image,
-                                    dtype=dtype)
-                for img in image_files)
+                                    n_jobs=n_jobs,
+                                    fast_decode=fast_decode,
+                                    backend=backend)
+        images = [format_image(img, as_image=as_image, dtype=dtype) for
+                  img in images]
+    else:
+        # perform this in parallel with joblib
+        images = Parallel(n_jobs=n_jobs, backend=backend)(
+                    delayed(load_image)(img,
+                                        image_dir=image_dir,
+                                        image_size=image_size,
+                                        as_image=as_image,
+                                        dtype=dtype,
+                                        cache=False,
+                                        fast_decode=fast_decode)
+                    for img in image_files)
 
     if as_image:
         return images
@@ -208,13 +441,168 @@ def load_images(image_files,
     return np.stack(images, axis=0)
 
 
+def load_images_cached(image_files, cache, image_dir='', image_size=None,
+                       n_jobs=1, fast_decode=False, backend=None):
+    """Load uint8 thumbnails going through a ThumbnailCache.
+
+    Cache lookups and writes happen in the calling process so that the hit
+    and miss counters as well as the LRU bookkeeping stay consistent. Only
+    the cache misses are decoded in parallel.
+    """
+    image_locs = [image_path(image_file, image_dir=image_dir) for
+                  image_file in image_files]
+    keys = [cache.key(image_loc, image_size, resample_key(fast_decode)) for
+            image_loc in image_locs]
+    images = [cache.get(key) for key in keys]
+
+    missing = [index for index, img in enumerate(images) if img is None]
+    decoded = Parallel(n_jobs=n_jobs, backend=backend)(
+                delayed(load_image)(image_locs[index],
+                                    image_size=image_size,
+                                    cache=False,
+                                    fast_decode=fast_decode)
+                for index in missing)
+
+    for index, img in zip(missing, decoded):
+        cache.put(keys[index], img)
+        images[index] = img
+
+    return images
+
+
+def load_images_from_store(image_files, store, image_dir='', image_size=None,
+                           as_image=False, dtype=np.uint8):
+    """Read images from an ImageStore instead of decoding them."""
+    if image_size and tuple(image_size) != tuple(store.image_size):
+        raise ValueError(
+            'The images in the store have size {}, but `image_size` is '
+            '{}.'.format(tuple(store.image_size), tuple(image_size)))
+
+    images = store.take(image_files, image_dir=image_dir)
+    if as_image:
+        return [pil_image.fromarray(img) for img in images]
+
+    return images.astype(dtype, copy=False)
+
+
+def shared_memory_dir():
+    """The directory used to back shared image buffers. Prefers the
+    RAM backed /dev/shm if it is available."""
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm'
+    return tempfile.gettempdir()
+
+
+def allocate_images(shape, dtype=np.uint8, n_jobs=1, backend=None):
+    """Allocate an uninitialized image array of `shape`.
+
+    For loading in parallel processes the array is a memory map in shared
+    memory, so that the workers can write into it without sending the
+    images back to the parent process. joblib passes np.memmap instances
+    to the workers by reference. Threads share the parent's memory, so
+    a regular array is used for them.
+    """
+    if effective_n_jobs(n_jobs) == 1 or backend == 'threading':
+        return np.empty(shape, dtype=dtype)
+
+    fd, filename = tempfile.mkstemp(prefix='mosaic-', suffix='.mmap',
+                                    dir=shared_memory_dir())
+    os.close(fd)
+    return np.memmap(filename, dtype=dtype, mode='w+', shape=shape)
+
+
+def release_images(images):
+    """Unlink the file backing a shared image array. The memory stays
+    valid until the array is garbage collected."""
+    if isinstance(images, np.memmap) and images.filename is not None:
+        try:
+            os.unlink(images.filename)
+        except OSError:
+            # windows does not allow removing a mapped file.
+            pass
+
+
+def load_image_into(images, index, image_file, **kwargs):
+    """Decode an image directly into the slot `index` of `images`."""
+    img = load_image(image_file, dtype=images.dtype, **kwargs)
+    try:
+        images[index] = img
+    except ValueError:
+        raise ValueError(
+            'Not all images have the same width and height. '
+            'You can force even sizes by setting the `image_size` '
+            'argument to the desired dimensions.')
+
+
+def load_images_shared(image_files,
+                       image_dir='',
+                       image_size=None,
+                       n_jobs=1,
+                       dtype=np.uint8,
+                       cache=None,
+                       fast_decode=False,
+                       backend=None):
+    """Load images into a single preallocated array.
+
+    Instead of pickling every image back to the parent and stacking them,
+    the parallel workers write into their slot of an array in shared
+    memory. This avoids the inter-process copies and halves the peak
+    memory compared to `np.stack`.
+    """
+    image_locs = [image_path(image_file, image_dir=image_dir) for
+                  image_file in image_files]
+
+    if image_size:
+        image_shape = (image_size[0], image_size[1], 3)
+    else:
+        image_shape = load_image(image_locs[0], cache=False).shape
+
+    images = allocate_images((len(image_locs),) + image_shape,
+                             dtype=dtype, n_jobs=n_jobs, backend=backend)
+
+    missing = range(len(image_locs))
+    if cache is not None:
+        keys = [cache.key(image_loc, image_size, resample_key(fast_decode)) for
+                image_loc in image_locs]
+        missing = []
+        for index, key in enumerate(keys):
+            img = cache.get(key)
+            if img is None:
+                missing.append(index)
+            else:
+                images[index] = img
+
+    try:
+        Parallel(n_jobs=n_jobs, backend=backend)(
+            delayed(load_image_into)(images, index, image_locs[index],
+                                     image_size=image_size,
+                                     cache=False,
+                                     fast_decode=fast_decode)
+            for index in missing)
+    finally:
+        release_images(images)
+
+    if cache is not None:
+        for index in missing:
+            cache.put(keys[index], images[index])
+
+    return images
+
+
 def load_from_directory(image_directory,
                         n_samples=None,
                         image_size=None,
                         as_image=False,
                         random_state=123,
                         n_jobs=1,
-                        dtype=np.uint8):
+                        dtype=np.uint8,
+                        fast_decode=False,
+                        shared_memory=False,
+                        store=None,
+                        backend='auto',
+                        recursive=False,
+                        manifest_path=None,
+                        sampling='choice'):
     """Loads images from a directory on disk.
 
     Support image formats are `jpg`, `png`, or `gif`.
@@ -239,21 +627,421 @@ def load_from_directory(image_directory,
         specified then all cores are utilized.
     dtype : numpy dtype (default=np.uint8)
         The dtype of the output numpy array.
+    fast_decode : bool (default=False)
+        Whether to decode the images at a reduced resolution before
+        resizing them to `image_size`. See :func:`decode_image`.
+    shared_memory : bool (default=False)
+        Whether the workers decode the images directly into a single
+        array shared with the parent process. See :func:`load_images`.
+    store : ImageStore, optional
+        A packed store of pre-resized images. If given, the images are read
+        from the store instead of being decoded.
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to decode the images in parallel.
+        See :func:`load_images`.
+    recursive : bool (default=False)
+        Whether to include images in sub-directories.
+    manifest_path : str, optional
+        A JSON file recording the contents of the directory, so that
+        later calls only list the directories that changed.
+        See :func:`find_images`.
+    sampling : str {'choice', 'reservoir'} (default='choice')
+        How the `n_samples` images are drawn. 'choice' lists the whole
+        directory before sampling. 'reservoir' draws a uniform sample
+        while the directory is walked and starts decoding sampled images
+        before the walk finishes. Both are reproducible given
+        `random_state`, but they select different images. 'reservoir'
+        decodes the images with its own thread pool while walking the
+        directory, so with `n_samples` it cannot be combined with
+        `store`, `shared_memory`, a `backend` other than 'auto' or a
+        `manifest_path`. Without `n_samples` all images are loaded and
+        'reservoir' behaves like 'choice'.
     """
-    image_files = list(itertools.chain.from_iterable(
-        [image_glob(image_directory, ext) for ext in image_extensions]))
+    if sampling not in ('choice', 'reservoir'):
+        raise ValueError("Unknown sampling `{}`. Must be one of "
+                         "{{'choice', 'reservoir'}}.".format(sampling))
+
+    if n_samples is not None and sampling == 'reservoir':
+        unsupported = [name for name, is_set in [
+            ('store', store is not None),
+            ('shared_memory', shared_memory),
+            ('backend', backend != 'auto'),
+            ('manifest_path', manifest_path is not None)] if is_set]
+        if unsupported:
+            raise ValueError("sampling='reservoir' does not support {}. "
+                             "Use sampling='choice' instead.".format(
+                                 ', '.join(unsupported)))
+
+        image_files = (image_file for image_file, _, _ in
+                       manifest.iter_directory(image_directory,
+                                               recursive=recursive))
+        return load_images_reservoir(image_files,
+                                     n_samples,
+                                     image_dir=image_directory,
+                                     image_size=image_size,
+                                     as_image=as_image,
+                                     random_state=random_state,
+                                     n_jobs=n_jobs,
+                                     dtype=dtype,
+                                     fast_decode=fast_decode)
+
+    image_files = find_images(image_directory,
+                              recursive=recursive,
+                              manifest_path=manifest_path)
     return load_images(image_files,
+                       image_dir=image_directory,
                        n_samples=n_samples,
                        image_size=image_size,
                        as_image=as_image,
                        random_state=random_state,
                        n_jobs=n_jobs,
-                       dtype=dtype)
+                       dtype=dtype,
+                       fast_decode=fast_decode,
+                       shared_memory=shared_memory,
+                       store=store,
+                       backend=backend)
+
+
+def iter_reservoir(iterable, n_samples, random_state=123):
+    """Draw a uniform sample without replacement from an iterable of
+    unknown length in a single pass.
+
+    This is Li's reservoir sampling Algorithm L, which only draws random
+    numbers for the items that enter the reservoir. Items that are
+    skipped cost nothing but the iteration.
+
+    Parameters
+    ----------
+    iterable : iterable
+        The population to sample from.
+    n_samples : int
+        Number of samples to take.
+    random_state : int
+        Seed for the random number generator.
+
+    Yields
+    ------
+    (slot, item) : tuple
+        Each time an item enters the reservoir, the slot in
+        [0, n_samples) that it occupies. An item replaces the previous
+        occupant of its slot. After the iterable is exhausted each slot
+        holds one sampled item.
+    """
+    if n_samples < 1:
+        return
+
+    rng = np.random.RandomState(random_state)
+    iterator = iter(iterable)
+
+    for slot, item in enumerate(itertools.islice(iterator, n_samples)):
+        yield slot, item
+
+    weight = np.exp(np.log(rng.random_sample()) / n_samples)
+    while True:
+        n_skip = int(np.floor(np.log(rng.random_sample()) /
+                              np.log(1 - weight)))
+        item = next(itertools.islice(iterator, n_skip, None), _EXHAUSTED)
+        if item is _EXHAUSTED:
+            break
+        yield rng.randint(n_samples), item
+        weight *= np.exp(np.log(rng.random_sample()) / n_samples)
+
+
+def reservoir_sample(iterable, n_samples, random_state=123):
+    """Take a uniform random sample without replacement from an iterable
+    of unknown length in a single pass.
+
+    Returns
+    -------
+    list :
+        The sampled items. Fewer than `n_samples` if the iterable is
+        shorter.
+    """
+    reservoir = []
+    for slot, item in iter_reservoir(iterable, n_samples,
+                                     random_state=random_state):
+        if slot == len(reservoir):
+            reservoir.append(item)
+        else:
+            reservoir[slot] = item
+    return reservoir
+
+
+def load_images_reservoir(image_files,
+                          n_samples,
+                          image_dir='',
+                          image_size=None,
+                          as_image=False,
+                          random_state=123,
+                          n_jobs=1,
+                          dtype=np.uint8,
+                          fast_decode=False):
+    """Load a reservoir sample of `image_files` while they are generated.
+
+    Images are decoded by a thread pool as soon as they enter the
+    reservoir. An image evicted from the reservoir before its decode
+    started is cancelled, otherwise its result is dropped. Decoding
+    therefore overlaps with a slow directory walk.
+    """
+    futures = []
+    n_workers = max(1, effective_n_jobs(n_jobs))
+    with concurrent.futures.ThreadPoolExecutor(n_workers) as executor:
+        for slot, image_file in iter_reservoir(image_files, n_samples,
+                                               random_state=random_state):
+            future = executor.submit(load_image, image_file,
+                                     image_dir=image_dir,
+                                     image_size=image_size,
+                                     as_image=as_image,
+                                     dtype=dtype,
+                                     cache=False,
+                                     fast_decode=fast_decode)
+            if slot == len(futures):
+                futures.append(future)
+            else:
+                futures[slot].cancel()
+                futures[slot] = future
+
+        images = [future.result() for future in futures]
+
+    if as_image:
+        return images
+
+    return np.stack(images, axis=0)
+
+
+def probe_image(image_file, image_dir=''):
+    """Read the header of an image file without decoding the pixels.
+
+    Returns
+    -------
+    tuple :
+        (width, height, mode, format, orientation) where orientation is
+        the EXIF orientation tag (1 if the image has none).
+    """
+    image_loc = image_path(image_file, image_dir=image_dir)
+    with pil_image.open(image_loc) as img:
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+        return img.size[0], img.size[1], img.mode, img.format, orientation
+
+
+def probe_images(images, image_dir='', recursive=False, n_jobs=1,
+                 backend='auto'):
+    """Report the size and color mode of images by only reading their
+    headers.
+
+    This is much faster than decoding the images and can be used to
+    validate inputs, choose an `image_size` or estimate the memory
+    needed to load the images.
+
+    Parameters
+    ----------
+    images : list of str or str
+        The image files or a directory containing the image files.
+    image_dir : str (default='')
+        The directory the image files are relative to.
+    recursive : bool (default=False)
+        Whether to include sub-directories if `images` is a directory.
+    n_jobs : int (default=1)
+        The number of parallel jobs used to read the headers.
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to read the headers in parallel.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A dataframe with columns `image_path`, `width`, `height`, `mode`,
+        `format` and `orientation` (the EXIF orientation tag).
+    """
+    if isinstance(images, str):
+        image_dir = image_path(images, image_dir=image_dir)
+        images = find_images(image_dir, recursive=recursive)
+    images = list(images)
+
+    # headers are small, so threads are used unless requested otherwise.
+    backend = 'threading' if backend == 'auto' else backend
+    parallel.check_backend(backend)
+    headers = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(probe_image)(image_file, image_dir=image_dir)
+        for image_file in images)
+
+    columns = ['width', 'height', 'mode', 'format', 'orientation']
+    data = pd.DataFrame(headers, columns=columns)
+    data.insert(0, 'image_path', images)
+    return data
+
+
+def estimate_memory(probe, image_size=None, dtype=np.uint8):
+    """Estimate the number of bytes needed to load the probed images
+    as RGB arrays.
+
+    Parameters
+    ----------
+    probe : pandas.DataFrame
+        The output of :func:`probe_images`.
+    image_size : tuple (default=None)
+        The size the images are resized to. If None the original sizes
+        are used.
+    dtype : numpy dtype (default=np.uint8)
+        The dtype of the loaded arrays.
+    """
+    image_size = check_image_size(image_size)
+    if image_size:
+        n_pixels = len(probe) * image_size[0] * image_size[1]
+    else:
+        n_pixels = int((probe['width'] * probe['height']).sum())
+
+    return n_pixels * 3 * np.dtype(dtype).itemsize
+
+
+def check_equal_sizes(probe):
+    """Raise a ValueError if the probed images differ in size."""
+    sizes = probe.groupby(['width', 'height']).size()
+    if len(sizes) > 1:
+        sizes = sizes.sort_values(ascending=False)
+        raise ValueError(
+            'Not all images have the same width and height. Found {} '
+            'different sizes, e.g. {}. You can force even sizes by setting '
+            'the `image_size` argument to the desired dimensions.'.format(
+                len(sizes),
+                ', '.join('{}x{}'.format(*size) for size in sizes.index[:3])))
+
+
+def iter_batches(iterable, batch_size):
+    """Split an iterable into lists of length `batch_size`. The last
+    batch may be shorter."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            break
+        yield batch
+
+
+def iter_images(image_files,
+                image_dir='',
+                batch_size=256,
+                image_size=None,
+                as_image=False,
+                n_jobs=1,
+                dtype=np.uint8,
+                cache=None,
+                fast_decode=False,
+                prefetch=1,
+                backend='auto'):
+    """Lazily load images from disk in batches of a fixed size.
+
+    Each batch is loaded with :func:`load_images`. While a batch is
+    consumed, the next `prefetch` batches are loaded in a background
+    thread. At most `prefetch + 2` batches are held in memory at any time,
+    no matter how many files are loaded.
+
+    Parameters
+    ----------
+    image_files : iterable of str
+        The image files on disk. This may be a generator, which is
+        consumed one batch at a time.
+    image_dir : str (default='')
+        The directory where the images reside on disk. This string will
+        be appended to the beginning of each image file.
+    batch_size : int (default=256)
+        The number of images in each batch.
+    image_size : tuple (default=None)
+        The target size in pixels. This is a 2-tuple (width, height).
+        If None then no resizing is performed.
+    as_image : bool (default=False)
+        Whether to return PIL Images. If True a list of PIL Images is
+        returned for each batch otherwise a numpy array.
+    n_jobs : int (default=1)
+        The number parallel jobs to use for loading each batch.
+    dtype : numpy dtype (default=np.uint8)
+        The dtype of the output numpy arrays.
+    cache : ThumbnailCache or bool, optional
+        The thumbnail cache consulted before decoding the images.
+    fast_decode : bool (default=False)
+        Whether to decode the images at a reduced resolution before
+        resizing them to `image_size`. See :func:`decode_image`.
+    prefetch : int (default=1)
+        The number of batches loaded ahead of the consumer. If zero, the
+        batches are loaded on demand in the calling thread.
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to decode each batch in parallel.
+        See :func:`load_images`.
+
+    Yields
+    ------
+    ImageBatch
+        A named tuple (images, image_files, indices).
+
+    Examples
+    --------
+    >>> for batch in image_io.iter_images(image_files, batch_size=1024):
+    >>>    process(batch.images)
+    """
+    def load_batch(batch):
+        indices, batch_files = zip(*batch)
+        images = load_images(list(batch_files),
+                             image_dir=image_dir,
+                             image_size=image_size,
+                             as_image=as_image,
+                             n_jobs=n_jobs,
+                             dtype=dtype,
+                             cache=cache,
+                             fast_decode=fast_decode,
+                             backend=backend)
+        return ImageBatch(images, list(batch_files), np.array(indices))
+
+    batches = iter_batches(enumerate(image_files), batch_size)
+
+    if not prefetch:
+        for batch in batches:
+            yield load_batch(batch)
+        return
+
+    batch_queue = queue.Queue(maxsize=prefetch)
+    stop_event = threading.Event()
+    end_of_batches = object()
+
+    def put(item):
+        while not stop_event.is_set():
+            try:
+                batch_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def producer():
+        try:
+            for batch in batches:
+                if not put(load_batch(batch)):
+                    return
+            put(end_of_batches)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=producer)
+    thread.daemon = True
+    thread.start()
+
+    try:
+        while True:
+            item = batch_queue.get()
+            if item is end_of_batches:
+                break
+            elif isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop_event.set()
+        thread.join()
 
 
 def directory_to_dataframe(image_dir='',
                            features=None,
-                           n_jobs=-1):
+                           n_jobs=-1,
+                           batch_size=256,
+                           recursive=False,
+                           manifest_path=None):
     """Create a pandas.DataFrame containing the path to all images in
     a directory.
 
@@ -272,12 +1060,27 @@ def directory_to_dataframe(image_dir='',
 
     features : list or None
         A list of features to include in the dataframe. The default (None)
-        includes no additional features.
+        includes no additional features. The features are read from the
+        active :func:`mosaic.features.feature_store` if there is one.
 
     n_jobs : int
         The number of parallel jobs used to load the
         images from disk.
 
+    batch_size : int
+        The number of images a worker decodes and reduces to `features`
+        per dispatch. Only the features are sent back to the parent, so
+        memory scales with the number of features rather than pixels.
+
+    recursive : bool
+        Whether to include images in sub-directories. The paths of these
+        images include the sub-directory.
+
+    manifest_path : str, optional
+        A JSON file recording the contents of the directory, so that
+        later calls only list the directories that changed.
+        See :func:`find_images`.
+
     Returns
     -------
     pandas.DataFrame
@@ -286,20 +1089,24 @@ def directory_to_dataframe(image_dir='',
     if not image_dir:
         image_dir = contexts.get_image_dir()
 
-    image_files = list(itertools.chain.from_iterable(
-        [image_glob(image_dir, ext) for ext in image_extensions]))
-    image_files = [f.split(image_dir + os.path.sep)[1] for
-                   f in image_files]
+    image_files = find_images(image_dir,
+                              recursive=recursive,
+                              manifest_path=manifest_path)
     data = pd.DataFrame({'image_path': image_files})
 
     if features:
         if set(features) & set(feature_lib.HSVFeatures.all_features()):
-            images = load_images(
-                data['image_path'],
-                image_dir=image_dir,
-                as_image=True,
-                n_jobs=n_jobs)
-            hsv = feature_lib.extract_hsv_stats(images, n_jobs=n_jobs)
+            store = feature_lib.get_feature_store()
+            if store is not None:
+                hsv = store.hsv_stats(data['image_path'],
+                                      image_dir=image_dir,
+                                      n_jobs=n_jobs)
+            else:
+                hsv = feature_lib.extract_hsv_stats_from_files(
+                    data['image_path'],
+                    image_dir=image_dir,
+                    n_jobs=n_jobs,
+                    batch_size=batch_size)
             for feature in features:
                 feature_idx = feature_lib.HSVFeatures.feature_index(feature)
                 data[feature] = hsv[:, feature_idx]
@@ -0,0 +1,259 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from joblib import Parallel, delayed
+from PIL import Image as pil_image
+
+from mosaic import contexts
+from mosaic import image_io
+from mosaic import parallel
+
+
+__all__ = ['ImageStore', 'build_image_store', 'open_image_store']
+
+
+IMAGES_FILE = 'images.npy'
+INDEX_FILE = 'index.csv'
+METADATA_FILE = 'metadata.json'
+
+
+class ImageStore(object):
+    """A packed store of pre-resized images on disk.
+
+    The store is a directory holding a single contiguous uint8 array of
+    shape [n_samples, height, width, 3] in `.npy` format together with an
+    index of the original files. The array is memory mapped when opened,
+    so opening a store and slicing a subset of it does not decode or even
+    read the remaining images.
+
+    Parameters
+    ----------
+    store_dir : str
+        The directory of the store as created by :func:`build_image_store`.
+
+    Attributes
+    ----------
+    images : np.memmap of shape [n_samples, height, width, 3]
+        The read-only memory mapped image array.
+
+    index : pandas.DataFrame
+        The path of each image relative to `image_dir`, the width and
+        height of the original image and the byte offset of the image
+        within the images file. The index is read on first access.
+    """
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self._images = None
+        self._index = None
+        self._path_index = None
+
+        with open(os.path.join(store_dir, METADATA_FILE)) as metadata_file:
+            metadata = json.load(metadata_file)
+        self.image_dir = metadata['image_dir']
+
+    def __repr__(self):
+        return '%s(store_dir=%s, n_samples=%d, image_size=%s)' % (
+            self.__class__.__name__, self.store_dir, len(self),
+            self.image_size)
+
+    def __len__(self):
+        return self.images.shape[0]
+
+    def __getitem__(self, key):
+        return self.images[key]
+
+    @property
+    def images(self):
+        if self._images is None:
+            self._images = np.load(os.path.join(self.store_dir, IMAGES_FILE),
+                                   mmap_mode='r')
+        return self._images
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = pd.read_csv(os.path.join(self.store_dir, INDEX_FILE),
+                                      keep_default_na=False)
+        return self._index
+
+    @property
+    def image_size(self):
+        return self.images.shape[1:3]
+
+    def locate(self, image_files, image_dir=''):
+        """Find the positions of `image_files` in the store.
+
+        Parameters
+        ----------
+        image_files : list of str
+            The image files to locate.
+
+        image_dir : str (default='')
+            The directory the image files are relative to. Files are
+            matched on their absolute path if it differs from the
+            `image_dir` the store was built from.
+
+        Returns
+        -------
+        np.array of int
+            The row of each image in `images`.
+        """
+        image_files = np.asarray(image_files)
+        if os.path.abspath(image_dir) != os.path.abspath(self.image_dir):
+            image_files = [
+                os.path.abspath(image_io.image_path(image_file, image_dir))
+                for image_file in image_files]
+            paths = [
+                os.path.abspath(image_io.image_path(path, self.image_dir))
+                for path in self.index['image_path']]
+            rows = pd.Index(paths).get_indexer(image_files)
+        else:
+            if self._path_index is None:
+                self._path_index = pd.Index(self.index['image_path'])
+            rows = self._path_index.get_indexer(image_files)
+
+        if np.any(rows < 0):
+            missing = np.asarray(image_files)[rows < 0]
+            raise KeyError('{} image(s) not found in the image store, '
+                           'e.g. {}.'.format(len(missing), missing[0]))
+
+        return rows
+
+    def take(self, image_files, image_dir=''):
+        """Return the images corresponding to `image_files`."""
+        return self.images[self.locate(image_files, image_dir=image_dir)]
+
+
+def store_image(images, index, image_file, image_size=None,
+                fast_decode=False):
+    """Decode an image into slot `index` of the store and return the
+    size of the original image."""
+    # the size is read from the header before the image is decoded, so
+    # the file is only opened once.
+    with pil_image.open(image_file) as img:
+        original_size = img.size
+        images[index] = image_io.decode_image(img,
+                                              image_size=image_size,
+                                              fast_decode=fast_decode)
+
+    return original_size
+
+
+def build_image_store(store_dir,
+                      images=None,
+                      data=None,
+                      image_dir='',
+                      image_size=64,
+                      fast_decode=False,
+                      n_jobs=1,
+                      backend='auto'):
+    """Decode and resize a collection of images once into a packed
+    :class:`ImageStore`.
+
+    Parameters
+    ----------
+    store_dir : str
+        The directory where the store is written.
+
+    images : str or list of str, optional
+        The image files or the name of the variable containing the image
+        file paths within `data`. If None and no `data` is given, every
+        image in `image_dir` is stored. If None and `data` is given, the
+        image column of the current data context is used.
+
+    data : pandas.DataFrame, optional
+        Tidy ("long-form") dataframe where each column is a variable
+        and each row is an observation.
+
+    image_dir : str, optional
+        The location of the image files on disk.
+
+    image_size : int or tuple (default=64)
+        The size of the stored images. All images in a store have
+        the same size.
+
+    fast_decode : bool (default=False)
+        Whether to decode the images at a reduced resolution before
+        resizing them. See :func:`mosaic.image_io.decode_image`.
+
+    n_jobs : int (default=1)
+        The number of parallel workers used to decode the images. The
+        workers write directly into the memory mapped store.
+
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to decode the images in parallel.
+        See :func:`mosaic.image_io.load_images`.
+
+    Returns
+    -------
+    ImageStore
+        The newly built store.
+    """
+    from mosaic.data_utils import get_image_files
+
+    if not image_dir:
+        image_dir = contexts.get_image_dir()
+
+    if images is None and data is None:
+        image_files = image_io.directory_to_dataframe(image_dir)['image_path']
+    elif isinstance(images, str) and data is None:
+        raise ValueError('`images` = {} is the name of a variable, but no '
+                         '`data` was given.'.format(images))
+    else:
+        # like `get_images`, a string is the name of a variable in `data`.
+        image_files = get_image_files(data, images)
+    image_files = list(image_files)
+
+    if not image_files:
+        raise ValueError('Cannot create an image store from zero images.')
+
+    image_size = image_io.check_image_size(image_size)
+    if not image_size:
+        raise ValueError('`image_size` is required to build an image store.')
+
+    if not os.path.exists(store_dir):
+        os.makedirs(store_dir)
+
+    store_images = np.lib.format.open_memmap(
+        os.path.join(store_dir, IMAGES_FILE), mode='w+', dtype=np.uint8,
+        shape=(len(image_files), image_size[0], image_size[1], 3))
+
+    backend = parallel.select_load_backend(image_files,
+                                           image_dir=image_dir,
+                                           n_jobs=n_jobs,
+                                           backend=backend)
+    original_sizes = Parallel(n_jobs=n_jobs, backend=backend)(
+        delayed(store_image)(store_images, index,
+                             image_io.image_path(image_file, image_dir),
+                             image_size=image_size,
+                             fast_decode=fast_decode)
+        for index, image_file in enumerate(image_files))
+    store_images.flush()
+
+    original_sizes = np.asarray(original_sizes).reshape(-1, 2)
+    image_nbytes = np.prod(store_images.shape[1:])
+    index = pd.DataFrame({
+        'image_path': image_files,
+        'width': original_sizes[:, 0],
+        'height': original_sizes[:, 1],
+        'offset': store_images.offset + image_nbytes * np.arange(
+            len(image_files))
+    }, columns=['image_path', 'width', 'height', 'offset'])
+    index.to_csv(os.path.join(store_dir, INDEX_FILE), index=False)
+
+    with open(os.path.join(store_dir, METADATA_FILE), 'w') as metadata_file:
+        json.dump({'image_dir': image_dir}, metadata_file)
+
+    return ImageStore(store_dir)
+
+
+def open_image_store(store_dir):
+    """Open an image store created with :func:`build_image_store`."""
+    return ImageStore(store_dir)
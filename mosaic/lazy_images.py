@@ -0,0 +1,174 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import numbers
+
+import numpy as np
+
+from mosaic import image_io
+
+
+__all__ = ['LazyImageArray']
+
+
+class LazyImageArray(object):
+    """An array-like collection of images that are decoded on access.
+
+    Only the file paths and decoding parameters are kept in memory.
+    Indexing with an integer decodes a single image. Indexing with a
+    slice, a boolean mask or an array of integers decodes the selected
+    images in one parallel batch with :func:`mosaic.image_io.load_images`.
+    Iterating over the array streams the images in batches, so the
+    cost of a plot is proportional to the number of images it shows
+    instead of the size of the dataset.
+
+    Parameters
+    ----------
+    image_files : array-like of str
+        The image files on disk.
+    image_dir : str (default='')
+        The directory the image files are relative to.
+    image_size : int or tuple, optional
+        The size the images are resized to when decoded. If None, the
+        images keep their original size, which must be the same for all
+        images.
+    as_image : bool (default=False)
+        Whether indexing returns PIL Images instead of numpy arrays.
+    dtype : numpy dtype (default=np.uint8)
+        The dtype of the decoded arrays.
+    cache : ThumbnailCache or bool, optional
+        The thumbnail cache consulted before decoding an image.
+    fast_decode : bool (default=False)
+        Whether to decode the images at a reduced resolution before
+        resizing them to `image_size`.
+    n_jobs : int (default=1)
+        The number of parallel jobs used to decode a batch of images.
+    backend : str {'auto', 'threading', 'loky', 'multiprocessing'}
+        The joblib backend used to decode a batch of images.
+    batch_size : int (default=256)
+        The number of images decoded at once while iterating.
+
+    Examples
+    --------
+    >>> images = LazyImageArray(data['image_path'], image_size=32)
+    >>> images.shape
+    (70000, 32, 32, 3)
+    >>> visible = images[[0, 10, 20]]  # only decodes three images
+    """
+    def __init__(self, image_files,
+                 image_dir='',
+                 image_size=None,
+                 as_image=False,
+                 dtype=np.uint8,
+                 cache=None,
+                 fast_decode=False,
+                 n_jobs=1,
+                 backend='auto',
+                 batch_size=256):
+        self.image_files = np.asarray(image_files)
+        self.image_dir = image_dir
+        self.image_size = image_io.check_image_size(image_size)
+        self.as_image = as_image
+        self.dtype = dtype
+        self.cache = cache
+        self.fast_decode = fast_decode
+        self.n_jobs = n_jobs
+        self.backend = backend
+        self.batch_size = batch_size
+        self._image_shape = None
+
+    def __repr__(self):
+        return '%s(n_samples=%d, image_dir=%s, image_size=%s)' % (
+            self.__class__.__name__, len(self), self.image_dir,
+            self.image_size)
+
+    def __len__(self):
+        return self.image_files.shape[0]
+
+    @property
+    def image_shape(self):
+        """The shape (height, width, 3) of a single decoded image. Without
+        an `image_size`, the header of the first image is read."""
+        if self._image_shape is None:
+            if self.image_size:
+                height, width = self.image_size
+            elif len(self):
+                width, height = image_io.probe_image(
+                    self.image_files[0], image_dir=self.image_dir)[:2]
+            else:
+                height, width = 0, 0
+            self._image_shape = (height, width, 3)
+        return self._image_shape
+
+    @property
+    def shape(self):
+        return (len(self),) + self.image_shape
+
+    @property
+    def ndim(self):
+        return 4
+
+    def _load(self, image_files):
+        if len(image_files) == 0:
+            if self.as_image:
+                return []
+            return np.empty((0,) + self.image_shape, dtype=self.dtype)
+
+        return image_io.load_images(list(image_files),
+                                    image_dir=self.image_dir,
+                                    image_size=self.image_size,
+                                    as_image=self.as_image,
+                                    n_jobs=self.n_jobs,
+                                    dtype=self.dtype,
+                                    cache=self.cache,
+                                    fast_decode=self.fast_decode,
+                                    backend=self.backend)
+
+    def __getitem__(self, key):
+        if isinstance(key, (numbers.Integral, np.integer)):
+            return image_io.load_image(self.image_files[key],
+                                       image_dir=self.image_dir,
+                                       image_size=self.image_size,
+                                       as_image=self.as_image,
+                                       dtype=self.dtype,
+                                       cache=self.cache,
+                                       fast_decode=self.fast_decode)
+
+        return self._load(self.image_files[key])
+
+    def __iter__(self):
+        for batch in image_io.iter_images(self.image_files,
+                                          image_dir=self.image_dir,
+                                          batch_size=self.batch_size,
+                                          image_size=self.image_size,
+                                          as_image=self.as_image,
+                                          n_jobs=self.n_jobs,
+                                          dtype=self.dtype,
+                                          cache=self.cache,
+                                          fast_decode=self.fast_decode,
+                                          backend=self.backend):
+            for image in batch.images:
+                yield image
+
+    def __array__(self, dtype=None, copy=None):
+        images = self[:]
+        if self.as_image:
+            images = np.stack([np.asarray(img) for img in images])
+        return np.asarray(images, dtype=dtype)
+
+    def subset(self, index):
+        """Return a LazyImageArray of the images selected by `index`
+        without decoding any of them."""
+        images = LazyImageArray(self.image_files[index],
+                                image_dir=self.image_dir,
+                                image_size=self.image_size,
+                                as_image=self.as_image,
+                                dtype=self.dtype,
+                                cache=self.cache,
+                                fast_decode=self.fast_decode,
+                                n_jobs=self.n_jobs,
+                                backend=self.backend,
+                                batch_size=self.batch_size)
+        images._image_shape = self._image_shape
+        return images
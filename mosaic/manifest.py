@@ -0,0 +1,273 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+
+__all__ = ['DirectoryManifest', 'iter_directory', 'scan_directory']
+
+
+MANIFEST_VERSION = 1
+
+
+def is_image_file(file_name, extensions):
+    """Whether `file_name` has one of the `extensions`. The comparison
+    ignores case, so `.JPG` files are found as well."""
+    ext = os.path.splitext(file_name)[1][1:].lower()
+    return ext in extensions
+
+
+def default_extensions():
+    from mosaic.image_io import image_extensions
+    return image_extensions
+
+
+def list_directory(image_dir, rel_dir='', extensions=None, stat=True):
+    """List the image files and sub-directories of a single directory
+    with one call to `os.scandir`.
+
+    Returns
+    -------
+    files : list
+        Sorted [name, size, mtime_ns] entries of the image files. The
+        size and mtime are None if `stat` is False.
+    subdirs : list of str
+        The sorted names of the sub-directories.
+    """
+    if extensions is None:
+        extensions = default_extensions()
+    extensions = {ext.lower() for ext in extensions}
+
+    files = []
+    subdirs = []
+    with os.scandir(os.path.join(image_dir, rel_dir)) as entries:
+        for entry in entries:
+            try:
+                # symlinked directories are skipped to avoid cycles.
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                elif (entry.is_file() and
+                        is_image_file(entry.name, extensions)):
+                    if stat:
+                        entry_stat = entry.stat()
+                        files.append([entry.name,
+                                      entry_stat.st_size,
+                                      entry_stat.st_mtime_ns])
+                    else:
+                        files.append([entry.name, None, None])
+            except OSError:
+                # the entry vanished while listing the directory.
+                continue
+
+    return sorted(files), sorted(subdirs)
+
+
+def iter_directory(image_dir, recursive=True, extensions=None, stat=False):
+    """Walk a directory tree and yield the image files as they are found.
+
+    Each directory is listed exactly once with `os.scandir`.
+    Sub-directories are visited depth-first in sorted order, so the order
+    of the files is deterministic.
+
+    Parameters
+    ----------
+    image_dir : str
+        The root directory of the walk.
+    recursive : bool (default=True)
+        Whether to descend into sub-directories.
+    extensions : set of str, optional
+        The file extensions considered images. Matched regardless of case.
+        Defaults to :data:`mosaic.image_io.image_extensions`.
+    stat : bool (default=False)
+        Whether to report the size and modification time of each file.
+        This requires an extra system call per file on POSIX systems.
+
+    Yields
+    ------
+    (image_path, size, mtime_ns) : tuple
+        The path of the image relative to `image_dir`, its size in bytes
+        and its modification time in nanoseconds. The latter two are None
+        if `stat` is False.
+    """
+    stack = ['']
+    while stack:
+        rel_dir = stack.pop()
+        files, subdirs = list_directory(image_dir, rel_dir,
+                                        extensions=extensions, stat=stat)
+        for name, size, mtime in files:
+            yield os.path.join(rel_dir, name), size, mtime
+
+        if recursive:
+            stack.extend(os.path.join(rel_dir, subdir) for
+                         subdir in reversed(subdirs))
+
+
+class DirectoryManifest(object):
+    """A record of the path, size and modification time of all images in
+    a directory tree.
+
+    Besides the files, the manifest records the modification time of each
+    directory. Creating, deleting or renaming a file changes the
+    modification time of its directory. An update of the manifest
+    therefore only lists the directories whose modification time changed
+    and reuses the recorded files of all others. Note that overwriting
+    a file in place does not change its directory, so such edits are only
+    picked up by `update(full=True)`.
+
+    Parameters
+    ----------
+    image_dir : str
+        The root directory of the manifest.
+    recursive : bool (default=True)
+        Whether to include sub-directories.
+    extensions : set of str, optional
+        The file extensions considered images.
+    """
+    def __init__(self, image_dir, recursive=True, extensions=None):
+        if extensions is None:
+            extensions = default_extensions()
+
+        self.image_dir = image_dir
+        self.recursive = recursive
+        self.extensions = sorted({ext.lower() for ext in extensions})
+        self.directories = {}
+
+    def __repr__(self):
+        return '%s(image_dir=%s, n_directories=%d, n_files=%d)' % (
+            self.__class__.__name__, self.image_dir,
+            len(self.directories), len(self))
+
+    def __len__(self):
+        return sum(len(directory['files']) for
+                   directory in self.directories.values())
+
+    def update(self, full=False):
+        """Bring the manifest up to date with the directory on disk.
+
+        Parameters
+        ----------
+        full : bool (default=False)
+            Whether to list every directory instead of only the
+            directories that changed since the last update.
+
+        Returns
+        -------
+        n_scanned : int
+            The number of directories that were listed.
+        """
+        directories = {}
+        n_scanned = 0
+        stack = ['']
+        while stack:
+            rel_dir = stack.pop()
+            try:
+                # stat before listing. A change during the listing is then
+                # picked up by the next update.
+                mtime = os.stat(os.path.join(self.image_dir,
+                                             rel_dir)).st_mtime_ns
+            except OSError:
+                continue
+
+            directory = self.directories.get(rel_dir)
+            if full or directory is None or directory['mtime'] != mtime:
+                try:
+                    files, subdirs = list_directory(
+                        self.image_dir, rel_dir, extensions=self.extensions)
+                except OSError:
+                    continue
+                directory = {'mtime': mtime, 'files': files,
+                             'subdirs': subdirs}
+                n_scanned += 1
+            directories[rel_dir] = directory
+
+            if self.recursive:
+                stack.extend(os.path.join(rel_dir, subdir) for
+                             subdir in reversed(directory['subdirs']))
+
+        self.directories = directories
+        return n_scanned
+
+    def to_dataframe(self):
+        """A pandas.DataFrame with columns `image_path`, `size` and `mtime`
+        (in nanoseconds). Image paths are relative to `image_dir`."""
+        records = [(os.path.join(rel_dir, name), size, mtime) for
+                   rel_dir, directory in self.directories.items() for
+                   name, size, mtime in directory['files']]
+        return pd.DataFrame(records, columns=['image_path', 'size', 'mtime'])
+
+    def save(self, manifest_path):
+        """Atomically write the manifest to a JSON file."""
+        manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+        fd, tmp_path = tempfile.mkstemp(dir=manifest_dir, suffix='.tmp')
+        with os.fdopen(fd, 'w') as manifest_file:
+            json.dump({'version': MANIFEST_VERSION,
+                       'image_dir': self.image_dir,
+                       'recursive': self.recursive,
+                       'extensions': self.extensions,
+                       'directories': self.directories}, manifest_file)
+        os.replace(tmp_path, manifest_path)
+
+    @classmethod
+    def load(cls, manifest_path):
+        """Read a manifest written by :meth:`save`."""
+        with open(manifest_path) as manifest_file:
+            state = json.load(manifest_file)
+
+        if state.get('version') != MANIFEST_VERSION:
+            raise ValueError('Unsupported manifest version {}.'.format(
+                state.get('version')))
+
+        manifest = cls(state['image_dir'],
+                       recursive=state['recursive'],
+                       extensions=state['extensions'])
+        manifest.directories = state['directories']
+        return manifest
+
+
+def scan_directory(image_dir, recursive=True, extensions=None,
+                   manifest_path=None):
+    """Find all images in a directory tree together with their size and
+    modification time.
+
+    Parameters
+    ----------
+    image_dir : str
+        The directory to scan.
+    recursive : bool (default=True)
+        Whether to include sub-directories.
+    extensions : set of str, optional
+        The file extensions considered images. Matched regardless of case.
+    manifest_path : str, optional
+        A JSON file holding the manifest of a previous scan. If it exists
+        and matches the arguments, only directories that changed since
+        the previous scan are listed. The updated manifest is written back
+        to `manifest_path`.
+
+    Returns
+    -------
+    pandas.DataFrame
+        A dataframe with columns `image_path` (relative to `image_dir`),
+        `size` and `mtime` (in nanoseconds).
+    """
+    manifest = DirectoryManifest(image_dir, recursive=recursive,
+                                 extensions=extensions)
+
+    if manifest_path is not None and os.path.exists(manifest_path):
+        saved = DirectoryManifest.load(manifest_path)
+        if (os.path.abspath(saved.image_dir) ==
+                os.path.abspath(manifest.image_dir) and
+                saved.recursive == manifest.recursive and
+                saved.extensions == manifest.extensions):
+            manifest = saved
+
+    manifest.update()
+
+    if manifest_path is not None:
+        manifest.save(manifest_path)
+
+    return manifest.to_dataframe()
@@ -0,0 +1,115 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import os
+
+import numpy as np
+
+from joblib import effective_n_jobs
+
+
+# Files smaller than this (in bytes) decode faster than a process can
+# receive the task and send back the result.
+SMALL_FILE_SIZE = 512 * 1024
+
+# Images with fewer pixels than this are cheaper to process than to pickle.
+SMALL_IMAGE_PIXELS = 128 * 128
+
+# Number of files inspected to estimate the average file size.
+N_PROBE_FILES = 32
+
+
+def check_backend(backend):
+    """Validate the name of a joblib backend."""
+    if backend not in ('auto', 'threading', 'loky', 'multiprocessing', None):
+        raise ValueError("Unknown backend `{}`. Must be one of "
+                         "{{'auto', 'threading', 'loky', "
+                         "'multiprocessing'}}.".format(backend))
+
+
+def average_file_size(image_files, image_dir='', n_probe=N_PROBE_FILES,
+                      random_state=123):
+    """Estimate the average size in bytes of the files in `image_files`
+    by stating a small random subset of them."""
+    image_files = list(image_files)
+    n_files = len(image_files)
+    if n_files > n_probe:
+        rng = np.random.RandomState(random_state)
+        probe_index = rng.choice(n_files, size=n_probe, replace=False)
+    else:
+        probe_index = range(n_files)
+
+    sizes = []
+    for index in probe_index:
+        try:
+            sizes.append(os.path.getsize(
+                os.path.join(image_dir, image_files[index])))
+        except OSError:
+            pass
+
+    return np.mean(sizes) if sizes else 0.
+
+
+def select_load_backend(image_files, image_dir='', as_image=False,
+                        n_jobs=1, backend='auto'):
+    """Choose the joblib backend used to decode `image_files`.
+
+    Pillow releases the GIL while decoding and resizing, so threads
+    achieve parallelism without the cost of starting processes and
+    pickling the decoded images back to the parent. Processes are only
+    preferred for large files decoded into numpy arrays, where the Python
+    overhead of each task is non-negligible and the transfer cost is
+    amortized over a long decode.
+
+    Parameters
+    ----------
+    image_files : list of str
+        The image files that will be loaded.
+    image_dir : str (default='')
+        The directory the image files are relative to.
+    as_image : bool (default=False)
+        Whether the images are returned as PIL Images. PIL Images are
+        expensive to pickle.
+    n_jobs : int (default=1)
+        The number of parallel jobs.
+    backend : str (default='auto')
+        The requested backend. Anything other than 'auto' is returned
+        unchanged.
+
+    Returns
+    -------
+    backend : str or None
+        The name of the joblib backend. None selects joblib's default.
+    """
+    check_backend(backend)
+    if backend != 'auto':
+        return backend
+
+    if effective_n_jobs(n_jobs) == 1 or as_image:
+        return 'threading'
+
+    if average_file_size(image_files, image_dir) < SMALL_FILE_SIZE:
+        return 'threading'
+
+    return 'loky'
+
+
+def select_feature_backend(images, n_jobs=1, backend='auto'):
+    """Choose the joblib backend used to compute features of `images`.
+
+    PIL Images and small arrays cost more to send to a process than to
+    process, so threads are used unless the images are large arrays.
+    """
+    check_backend(backend)
+    if backend != 'auto':
+        return backend
+
+    if effective_n_jobs(n_jobs) == 1 or not isinstance(images, np.ndarray):
+        return 'threading'
+
+    n_pixels = np.prod(images.shape[1:3]) if images.ndim > 2 else 0
+    if n_pixels < SMALL_IMAGE_PIXELS:
+        return 'threading'
+
+    return 'loky'
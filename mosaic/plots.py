@@ -1,4 +1,6 @@
+import numpy as np
 import matplotlib.pyplot as plt
+import skimage
 
 
 def remove_axis(fig=None, ax=None):
@@ -33,3 +35,118 @@ def imshow(img, **kwargs):
         plt.imshow(img, cmap='gray', **kwargs)
     else:
         plt.imshow(img, **kwargs)
+
+
+def as_float_rgb(images):
+    """Convert a stack of RGB or grayscale images to float32 RGB values
+    in [0, 1]."""
+    images = np.asarray(images)
+    if np.issubdtype(images.dtype, np.integer):
+        images = images.astype(np.float32) / np.iinfo(images.dtype).max
+    else:
+        images = images.astype(np.float32)
+
+    if images.ndim == 3:
+        images = np.repeat(images[..., np.newaxis], 3, axis=-1)
+
+    return images[..., :3]
+
+
+def as_ubyte_rgb(images):
+    """Convert a stack of RGB or grayscale images to uint8 RGB values."""
+    images = skimage.img_as_ubyte(np.asarray(images))
+    if images.ndim == 3:
+        images = np.repeat(images[..., np.newaxis], 3, axis=-1)
+
+    return images[..., :3]
+
+
+def composite_images(images, rows, cols, canvas_shape, alpha=1.0,
+                     canvas=None, chunk_size=1024):
+    """Composite images onto an RGBA canvas with the "over" operator.
+
+    Images are drawn in order, so later images end up on top of earlier
+    ones, exactly as if each image was drawn by its own artist. The
+    images are placed in chunks with vectorized scatter-adds, so the
+    cost is proportional to the number of pixels drawn.
+
+    Parameters
+    ----------
+    images : np.array of shape [n_samples, height, width, channels]
+        The images to draw. Grayscale images are drawn in gray.
+
+    rows, cols : np.array of shape [n_samples,]
+        The canvas position of the upper left corner of each image.
+        Images may extend beyond the canvas, in which case they are
+        cropped.
+
+    canvas_shape : tuple
+        The (height, width) of the canvas in pixels.
+
+    alpha : float
+        The opacity of the images.
+
+    canvas : np.array of shape [height, width, 4], optional
+        An existing canvas with straight (not premultiplied) alpha to
+        draw on. A new transparent canvas is created by default.
+
+    chunk_size : int
+        The number of images placed at once.
+
+    Returns
+    -------
+    np.array of shape [height, width, 4]
+        The float32 RGBA canvas with values in [0, 1].
+    """
+    canvas_height, canvas_width = canvas_shape
+    n_pixels = canvas_height * canvas_width
+    if canvas is None:
+        canvas = np.zeros((canvas_height, canvas_width, 4), dtype=np.float32)
+
+    # work with premultiplied colors, since these compose linearly.
+    color = (canvas[..., :3] * canvas[..., 3:]).reshape(-1, 3)
+    coverage = canvas[..., 3].reshape(-1).copy()
+    transparency = 1. - alpha
+
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    for start in range(0, len(images), chunk_size):
+        chunk = as_float_rgb(images[start:start + chunk_size])
+        n_images, height, width = chunk.shape[:3]
+
+        pixel_rows = (rows[start:start + n_images, np.newaxis, np.newaxis] +
+                      np.arange(height)[:, np.newaxis])
+        pixel_cols = (cols[start:start + n_images, np.newaxis, np.newaxis] +
+                      np.arange(width))
+        pixel_rows, pixel_cols = np.broadcast_arrays(pixel_rows, pixel_cols)
+        inside = ((pixel_rows >= 0) & (pixel_rows < canvas_height) &
+                  (pixel_cols >= 0) & (pixel_cols < canvas_width))
+        pixels = pixel_rows[inside] * canvas_width + pixel_cols[inside]
+        values = chunk[inside]
+
+        # the number of images covering each pixel and the position of
+        # each image among them. Pixels are visited in drawing order.
+        order = np.argsort(pixels, kind='stable')
+        pixels, values = pixels[order], values[order]
+        n_layers = np.bincount(pixels, minlength=n_pixels)
+        first = np.cumsum(n_layers) - n_layers
+        rank = np.arange(pixels.shape[0]) - first[pixels]
+
+        # an image is attenuated by every image drawn on top of it.
+        weights = alpha * transparency ** (n_layers[pixels] - 1 - rank)
+        attenuation = transparency ** n_layers
+
+        color *= attenuation[:, np.newaxis]
+        for channel in range(3):
+            color[:, channel] += np.bincount(
+                pixels, weights=weights * values[:, channel],
+                minlength=n_pixels)
+        coverage = coverage * attenuation + (1. - attenuation)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        color = np.where(coverage[:, np.newaxis] > 0,
+                         color / coverage[:, np.newaxis], 0.)
+
+    canvas = np.concatenate([color, coverage[:, np.newaxis]], axis=1)
+    return np.clip(canvas, 0, 1).astype(np.float32).reshape(
+        canvas_height, canvas_width, 4)
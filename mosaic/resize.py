@@ -0,0 +1,156 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import numpy as np
+
+from joblib import Parallel, delayed
+
+from mosaic import image_io
+
+
+__all__ = ['resize_images']
+
+
+def box_filter(x):
+    return ((x > -0.5) & (x <= 0.5)).astype(np.float64)
+
+
+def triangle_filter(x):
+    return np.clip(1.0 - np.abs(x), 0, None)
+
+
+def cubic_filter(x, a=-0.5):
+    x = np.abs(x)
+    return np.where(
+        x < 1.0, ((a + 2.0) * x - (a + 3.0)) * x * x + 1,
+        np.where(x < 2.0, (((x - 5) * x + 8) * x - 4) * a, 0.0))
+
+
+def lanczos_filter(x):
+    return np.where(np.abs(x) < 3.0, np.sinc(x) * np.sinc(x / 3.0), 0.0)
+
+
+#: The separable resampling filters and their support. These are the
+#: filters used by Pillow.
+FILTERS = {
+    'box': (box_filter, 0.5),
+    'bilinear': (triangle_filter, 1.0),
+    'bicubic': (cubic_filter, 2.0),
+    'lanczos': (lanczos_filter, 3.0),
+}
+
+
+def filter_weights(in_size, out_size, interp='lanczos'):
+    """The [out_size, in_size] matrix resampling a signal of length
+    `in_size` to length `out_size` along one axis.
+
+    When downsampling, the filter is stretched by the scale factor so
+    that it also acts as an anti-aliasing filter. Each row is normalized
+    to sum to one.
+    """
+    if interp not in FILTERS:
+        raise ValueError("Unknown interpolation `{}`. Must be one of "
+                         "{}.".format(interp, sorted(FILTERS)))
+    kernel, support = FILTERS[interp]
+
+    scale = in_size / out_size
+    filter_scale = max(scale, 1.0)
+    support = support * filter_scale
+    centers = (np.arange(out_size) + 0.5) * scale
+
+    # the input pixels within the support of each output pixel. Computed
+    # the same way as Pillow so that ties at the border agree.
+    pixels = np.arange(in_size)
+    window = ((pixels >= (centers - support + 0.5).astype(int)[:, None]) &
+              (pixels < (centers + support + 0.5).astype(int)[:, None]))
+
+    x = (pixels - centers[:, np.newaxis] + 0.5) * (1.0 / filter_scale)
+    weights = np.where(window, kernel(x), 0.0)
+    weights /= weights.sum(axis=1, keepdims=True)
+    return weights.astype(np.float32)
+
+
+def resize_chunk(images, out, weights_y, weights_x):
+    """Resize a [n, height, width, channels] chunk into `out` with one
+    matrix product per axis."""
+    is_integer = np.issubdtype(out.dtype, np.integer)
+    if is_integer:
+        info = np.iinfo(out.dtype)
+
+    # like Pillow, the columns are resampled first.
+    # [n, height, channels, out_width]
+    chunk = np.tensordot(images.astype(np.float32), weights_x,
+                         axes=([2], [1]))
+    if is_integer:
+        # the overshoot of the filter is clipped after each pass.
+        np.clip(chunk, info.min, info.max, out=chunk)
+
+    # [n, channels, out_width, out_height]
+    chunk = np.tensordot(chunk, weights_y, axes=([1], [1]))
+    chunk = chunk.transpose(0, 3, 2, 1)
+
+    if is_integer:
+        chunk = np.clip(np.rint(chunk), info.min, info.max)
+    out[...] = chunk
+
+
+def resize_images(images, image_size, interp='lanczos', chunk_size=1024,
+                  n_jobs=1):
+    """Resize a stack of images at once.
+
+    The resampling filters are separable, so the whole stack is resized
+    with one matrix product along the rows and one along the columns.
+    The filters match the ones used by Pillow and the results agree with
+    `PIL.Image.resize` up to rounding.
+    The images are processed in chunks of `chunk_size` to bound the
+    memory used by intermediate float32 results.
+
+    Parameters
+    ----------
+    images : np.array of shape [n_samples, height, width, channels]
+        The images to resize. Grayscale images of shape
+        [n_samples, height, width] are supported as well.
+    image_size : int or tuple
+        The target size (height, width) of the images.
+    interp : str {'lanczos', 'bicubic', 'bilinear', 'box'}
+        The resampling filter.
+    chunk_size : int (default=1024)
+        The number of images resized together.
+    n_jobs : int (default=1)
+        The number of chunks resized in parallel. NumPy releases the GIL
+        during the matrix products, so threads are used.
+
+    Returns
+    -------
+    np.array of shape [n_samples, image_size[0], image_size[1], channels]
+        The resized images with the same dtype as `images`. Images that
+        already have the requested size are returned without a copy, so
+        a memory-mapped stack stays on disk.
+    """
+    image_size = image_io.check_image_size(image_size)
+    images = np.asarray(images)
+    if images.shape[1:3] == tuple(image_size):
+        return images
+
+    is_gray = images.ndim == 3
+    if is_gray:
+        images = images[..., np.newaxis]
+
+    n_samples, height, width, n_channels = images.shape
+    out = np.empty((n_samples, image_size[0], image_size[1], n_channels),
+                   dtype=images.dtype)
+
+    weights_y = filter_weights(height, image_size[0], interp=interp)
+    weights_x = filter_weights(width, image_size[1], interp=interp)
+
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(resize_chunk)(images[start:start + chunk_size],
+                              out[start:start + chunk_size],
+                              weights_y, weights_x)
+        for start in range(0, n_samples, chunk_size))
+
+    if is_gray:
+        out = out[..., 0]
+
+    return out
@@ -13,19 +13,130 @@ from mosaic import contexts
 from mosaic import features
 from mosaic import image_io
 from mosaic import plots
+from mosaic import resize
 
 
 __all__ = ['scatter_plot']
 
 
+# cell coordinates are clipped to this range so that the keys of the grid
+# hash fit into 64-bit integers. Clipping merges far away cells but never
+# separates neighboring ones, so the selected points are unchanged.
+MAX_CELL = 2 ** 30
+
+
+def select_points(xy, threshold=None):
+    """Greedily select the points to display so that no point is within
+    a ball of radius `threshold` of a previously selected point.
+
+    Points are visited in order and a point is hidden if its squared
+    distance to a selected point is less than `threshold`. The selected
+    points are stored in a grid hash with cells the size of the radius,
+    so only the selected points in the 3 x 3 neighboring cells are
+    compared against each point.
+
+    Parameters
+    ----------
+    xy : np.array of shape [n_samples, 2]
+        The coordinates of the points.
+
+    threshold : float, optional
+        The squared distance below which a point is hidden by a
+        previously selected point. If None, all points are selected.
+
+    Returns
+    -------
+    np.array of int
+        The indices of the selected points in increasing order.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    if not threshold or xy.shape[0] == 0:
+        return np.arange(xy.shape[0])
+
+    with np.errstate(invalid='ignore'):
+        cells = np.floor(xy / np.sqrt(threshold))
+    cells = np.clip(np.nan_to_num(cells), -MAX_CELL, MAX_CELL)
+    cells = (cells - cells.min(axis=0) + 1).astype(np.int64)
+
+    # flatten the cells into a single integer key.
+    n_rows = int(cells[:, 1].max()) + 2
+    keys = cells[:, 0] * n_rows + cells[:, 1]
+    neighbors = [0] + [dx * n_rows + dy for dx in (-1, 0, 1) for
+                       dy in (-1, 0, 1) if dx or dy]
+
+    grid = {}
+    shown = []
+    for i, (x, y), key in zip(range(xy.shape[0]), xy.tolist(),
+                              keys.tolist()):
+        for neighbor in neighbors:
+            points = grid.get(key + neighbor)
+            if points is not None and any(
+                    (x - shown_x) ** 2 + (y - shown_y) ** 2 < threshold
+                    for shown_x, shown_y in points):
+                break
+        else:
+            grid.setdefault(key, []).append((x, y))
+            shown.append(i)
+
+    return np.asarray(shown, dtype=np.intp)
+
+
+def images_to_raster(ax, images, xy, alpha=0.9):
+    """Composite the images of a scatter plot into a single raster image
+    at the resolution of the figure and draw it with one `imshow`.
+
+    Like an `OffsetImage`, every pixel of an image covers one point on
+    the figure and the image is centered on its xy coordinate. The
+    limits of `ax` must already be set.
+    """
+    xlim, ylim = ax.get_xlim(), ax.get_ylim()
+    bbox = ax.get_window_extent()
+    canvas_shape = (max(int(round(bbox.height)), 1),
+                    max(int(round(bbox.width)), 1))
+
+    is_finite = np.all(np.isfinite(xy), axis=1)
+    xy = xy[is_finite]
+    images = np.asarray(data_utils.take_images(images,
+                                               np.flatnonzero(is_finite)))
+
+    if images.shape[0]:
+        # convert the size of the images from points to pixels.
+        zoom = ax.figure.dpi / 72.
+        image_size = (max(int(round(images.shape[1] * zoom)), 1),
+                      max(int(round(images.shape[2] * zoom)), 1))
+        if image_size != images.shape[1:3]:
+            images = resize.resize_images(images, image_size)
+
+        x_span = (xlim[1] - xlim[0]) or 1.
+        y_span = (ylim[1] - ylim[0]) or 1.
+        cols = (xy[:, 0] - xlim[0]) / x_span * canvas_shape[1]
+        rows = (ylim[1] - xy[:, 1]) / y_span * canvas_shape[0]
+        rows = np.floor(rows - image_size[0] / 2. + 0.5)
+        cols = np.floor(cols - image_size[1] / 2. + 0.5)
+        canvas = plots.composite_images(images, rows, cols, canvas_shape,
+                                        alpha=alpha)
+    else:
+        canvas = np.zeros(canvas_shape + (4,), dtype=np.float32)
+
+    ax.imshow(canvas, extent=(xlim[0], xlim[1], ylim[0], ylim[1]),
+              aspect='auto')
+
+    # imshow adjusts the limits to the extent of the image.
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+
+
 def images_to_scatter(images, x, y, threshold=None, alpha=0.9,
+                      colors=None, render='artists', xlim=None, ylim=None,
                       **kwargs):
     """Creates a scatter plot.
 
     Parameters
     ----------
     images : np.array of shape [n_samples, n_width, n_height, n_channels]
-        A 4D array holding the images to plot.
+        A 4D array holding the images to plot. This may also be a
+        LazyImageArray, in which case only the displayed images
+        are decoded.
 
     x : np.array of shape [n_samples,]
         The variable to plot on the x-axis
@@ -41,32 +152,61 @@ def images_to_scatter(images, x, y, threshold=None, alpha=0.9,
     alpha : float
         The alpha level for each image.
 
+    colors : array-like of shape [n_samples, 3], optional
+        The color each image is tinted with.
+
+    render : str {'artists', 'raster'}
+        How the images are drawn. 'artists' adds one matplotlib artist
+        per image. 'raster' composites all images into a single image
+        at the resolution of the figure, so that drawing the plot is
+        fast no matter how many images it shows.
+
+    xlim, ylim : tuple, optional
+        The limits of the x and y axes. Defaults to the range of `x`
+        and `y`.
+
     Returns
     -------
     ax : matplotlib Axes
         Returns the Axes object with the plot for further tweaking.
     """
+    if render not in ('artists', 'raster'):
+        raise ValueError("Unknown render `{}`. Must be one of "
+                         "{{'artists', 'raster'}}.".format(render))
+
     # scale the variables between 0-1
     xy = np.c_[x, y]
 
     fig, ax = plt.subplots(**kwargs)
 
-    # something big. points lie in [0, 1] x [0, 1].
-    shown_points = np.array([[np.inf, np.inf]])
-
-    for i in range(len(images)):
-        dist = np.sum((xy[i] - shown_points) ** 2, axis=1)
-        if threshold and np.min(dist) < threshold:
-            continue
-        shown_points = np.r_[shown_points, [xy[i]]]
+    shown = select_points(xy, threshold=threshold)
+    images = data_utils.take_images(images, shown)
+
+    if colors is not None:
+        colors = np.asarray(colors)[shown]
+        if isinstance(images, np.ndarray):
+            # a stack of images is colored in one batch.
+            palette, labels = np.unique(colors, axis=0, return_inverse=True)
+            images = features.color_images(images, labels.ravel(), palette)
+        else:
+            # lists may mix image sizes and lazy images are decoded in
+            # batches, so they are colored one image at a time.
+            images = [features.color_images(np.asarray(img)[np.newaxis],
+                                            [0], [hue])[0] for
+                      img, hue in zip(images, colors)]
+
+    plt.xlim(xlim if xlim is not None else (x.min(), x.max()))
+    plt.ylim(ylim if ylim is not None else (y.min(), y.max()))
+
+    if render == 'raster':
+        images_to_raster(ax, images, xy[shown], alpha=alpha)
+    else:
+        for i, img in zip(shown, images):
+            ab = AnnotationBbox(OffsetImage(img, alpha=alpha),
+                                xy[i, :],
+                                frameon=False, xycoords='data')
+            ax.add_artist(ab)
 
-        ab = AnnotationBbox(OffsetImage(images[i], alpha=alpha),
-                            xy[i, :],
-                            frameon=False, xycoords='data')
-        ax.add_artist(ab)
-
-    plt.xlim(x.min(), x.max())
-    plt.ylim(y.min(), y.max())
     return plots.remove_axis(ax=ax)
 
 
@@ -79,6 +219,7 @@ def scatter_plot(x, y,
                  threshold=None,
                  alpha=0.9,
                  color=None,
+                 render='artists',
                  n_jobs=1,
                  **kwargs):
     """Create an image scatter plot based on columns `x` vs. `y`.
@@ -117,6 +258,12 @@ def scatter_plot(x, y,
     alpha : float, optional
         Alpha level used when displaying images.
 
+    render : str {'artists', 'raster'}, optional
+        How the images are drawn. 'artists' adds one matplotlib artist
+        per image. 'raster' composites all images into a single image
+        at the resolution of the figure, which draws and saves much
+        faster when showing thousands of images.
+
     n_jobs : int
         The number of parallel jobs used to load the
         images from disk.
@@ -132,24 +279,29 @@ def scatter_plot(x, y,
     x = data_utils.get_variable(data, x)
     y = data_utils.get_variable(data, y)
 
-    # load images
+    # only the images of the displayed points are loaded and colored.
+    shown = select_points(np.c_[x, y], threshold=threshold)
     images = data_utils.get_images(
         data, images,
         image_dir=image_dir,
         as_image=False,
         image_size=image_size,
-        n_jobs=n_jobs)
+        index=shown,
+        n_jobs=n_jobs,
+        lazy=True)
 
     # TODO (seaborn is only required for a color palette. Remove this)
+    colors = None
     if hue is not None:
         hue = data_utils.get_variable(data, hue)
         values, value_map = np.unique(hue, return_inverse=True)
         palette = sns.husl_palette(len(values))
-        images = [features.color_image(img, hue=palette[val]) for
-                  img, val in zip(images, value_map)]
+        colors = [palette[value_map[i]] for i in shown]
     elif color is not None:
-        images = [features.color_image(img, hue=color) for
-                  img in images]
+        colors = [color] * len(shown)
 
-    return images_to_scatter(images, x, y, threshold=threshold,
-                             alpha=alpha, **kwargs)
+    # the limits include the hidden points.
+    return images_to_scatter(images, x[shown], y[shown], alpha=alpha,
+                             colors=colors, render=render,
+                             xlim=(x.min(), x.max()),
+                             ylim=(y.min(), y.max()), **kwargs)
@@ -0,0 +1,115 @@
+import asyncio
+import concurrent.futures as concurrent_futures
+import threading
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+
+from mosaic import aio
+from mosaic import image_io
+
+
+def test_load_images_async(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    images = image_io.load_images(image_list, image_dir=image_dir,
+                                  image_size=10, cache=False)
+
+    async_images = asyncio.run(aio.load_images_async(
+        image_list, image_dir=image_dir, image_size=10, max_concurrency=3))
+
+    np.testing.assert_array_equal(images, async_images)
+
+
+def test_image_grid_async(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    ax = asyncio.run(aio.image_grid_async(images=image_list,
+                                          image_dir=image_dir,
+                                          image_size=10))
+
+    assert ax.get_images()[0].get_array().shape == (30, 30, 3)
+
+
+def test_stand_in_server_concurrency(rgb_image_data, monkeypatch):
+    """Requests served concurrently overlap their (slow) file reads."""
+    image_dir, image_list = rgb_image_data
+    read_image_bytes = aio.read_image_bytes
+
+    lock = threading.Lock()
+    in_flight = [0]
+    max_in_flight = [0]
+
+    def slow_read_image_bytes(image_loc):
+        with lock:
+            in_flight[0] += 1
+            max_in_flight[0] = max(max_in_flight[0], in_flight[0])
+        try:
+            # simulate the latency of a network share
+            time.sleep(0.05)
+            return read_image_bytes(image_loc)
+        finally:
+            with lock:
+                in_flight[0] -= 1
+
+    monkeypatch.setattr(aio, 'read_image_bytes', slow_read_image_bytes)
+
+    async def handle(reader, writer):
+        n_images = int((await reader.readline()).decode())
+        images = await aio.load_images_async(image_list[:n_images],
+                                             image_dir=image_dir,
+                                             image_size=10,
+                                             max_concurrency=2)
+        writer.write('{}\n'.format(images.shape[0]).encode())
+        await writer.drain()
+        writer.close()
+
+    async def request(port, n_images):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write('{}\n'.format(n_images).encode())
+        response = int((await reader.readline()).decode())
+        writer.close()
+        return response
+
+    async def serve(n_requests, concurrent):
+        asyncio.get_running_loop().set_default_executor(
+            concurrent_futures.ThreadPoolExecutor(max_workers=16))
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+
+        # ticks of the event loop that happened while reads were running.
+        busy_heartbeats = [0]
+
+        async def heartbeat():
+            while True:
+                if in_flight[0]:
+                    busy_heartbeats[0] += 1
+                await asyncio.sleep(0.005)
+
+        max_in_flight[0] = 0
+        ticker = asyncio.ensure_future(heartbeat())
+        if concurrent:
+            responses = await asyncio.gather(
+                *[request(port, 4) for _ in range(n_requests)])
+        else:
+            responses = [await request(port, 4) for _ in range(n_requests)]
+
+        ticker.cancel()
+        server.close()
+        await server.wait_closed()
+        return responses, max_in_flight[0], busy_heartbeats[0]
+
+    sequential, sequential_reads, _ = asyncio.run(serve(4, concurrent=False))
+    responses, concurrent_reads, heartbeats = asyncio.run(
+        serve(4, concurrent=True))
+
+    assert responses == sequential == [4] * 4
+
+    # a single request reads at most `max_concurrency` files at once,
+    # while concurrent requests overlap their reads.
+    assert 1 < sequential_reads <= 2
+    assert concurrent_reads > 2
+
+    # the event loop kept running while the reads were in flight.
+    assert heartbeats > 0
@@ -0,0 +1,59 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from matplotlib import pyplot as plt
+
+from mosaic import image_barplot
+from mosaic.barplot import bar_strip
+
+
+def test_bar_strip():
+    images = np.random.RandomState(0).rand(3, 4, 5, 3)
+
+    strip = bar_strip(images)
+
+    assert strip.shape == (4, 15, 3)
+    np.testing.assert_array_equal(strip, np.concatenate(images, axis=1))
+
+
+@pytest.mark.parametrize('image_shape', [(4, 4, 3), (4, 4)])
+def test_composite_matches_artists(image_shape):
+    rng = np.random.RandomState(0)
+    images = rng.randint(0, 256, size=(25,) + image_shape).astype(np.uint8)
+    y = rng.choice(['cat', 'dog', 'frog'], size=25)
+
+    axes = {}
+    for render in ('composite', 'artists'):
+        axes[render] = image_barplot(y, images=images, bar_height=4,
+                                     image_size=None, render=render)
+
+    composite, artists = axes['composite'], axes['artists']
+    np.testing.assert_allclose(composite.get_yticks(), artists.get_yticks())
+    assert ([label.get_text() for label in composite.get_yticklabels()] ==
+            ['cat', 'dog', 'frog'])
+    assert composite.get_xlim() == artists.get_xlim()
+    assert composite.get_ylim() == artists.get_ylim()
+
+    # one image per bar.
+    n_bars = sum(int(np.ceil(np.sum(y == label) / 4.)) for
+                 label in np.unique(y))
+    assert len(composite.get_images()) == n_bars
+    assert len(artists.get_images()) == 25
+    plt.close('all')
+
+
+def test_sort_by_keeps_labels():
+    images = np.zeros((4, 2, 2, 3), dtype=np.uint8)
+    images[:, :, :, 0] = np.arange(4)[:, None, None]
+    y = np.array(['a', 'b', 'a', 'b'])
+
+    ax = image_barplot(y, images=images, image_size=None,
+                       sort_by=np.array([3, 2, 1, 0]))
+
+    bars = [np.asarray(image.get_array()) for image in ax.get_images()]
+    np.testing.assert_array_equal(bars[0][0, ::2, 0], [2, 0])
+    np.testing.assert_array_equal(bars[1][0, ::2, 0], [3, 1])
+    plt.close('all')
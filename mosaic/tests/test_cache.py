@@ -0,0 +1,79 @@
+import numpy as np
+
+from mosaic import cache as cache_lib
+from mosaic import image_io
+
+
+def test_thumbnail_cache_hits(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    cache = cache_lib.ThumbnailCache(cache_dir=str(tmpdir))
+
+    images = image_io.load_images(image_list,
+                                  image_dir=image_dir,
+                                  image_size=10,
+                                  cache=cache)
+    assert cache.cache_info().misses == len(image_list)
+    assert cache.cache_info().hits == 0
+
+    cached_images = image_io.load_images(image_list,
+                                         image_dir=image_dir,
+                                         image_size=10,
+                                         cache=cache)
+    assert cache.cache_info().hits == len(image_list)
+    np.testing.assert_array_equal(images, cached_images)
+
+    uncached_images = image_io.load_images(image_list,
+                                           image_dir=image_dir,
+                                           image_size=10,
+                                           cache=False)
+    np.testing.assert_array_equal(images, uncached_images)
+
+
+def test_thumbnail_cache_eviction(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    cache = cache_lib.ThumbnailCache(cache_dir=str(tmpdir), max_size=1000)
+
+    image_io.load_images(image_list, image_dir=image_dir, image_size=10,
+                         cache=cache)
+    assert cache.cache_info().currsize <= 1000
+
+    # the most recently used thumbnail survives eviction
+    image_io.load_image(image_list[-1], image_dir=image_dir, image_size=10,
+                        cache=cache)
+    assert cache.cache_info().hits == 1
+
+
+def test_thumbnail_cache_context(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+
+    with cache_lib.thumbnail_cache(cache_dir=str(tmpdir)) as cache:
+        image_io.load_images(image_list, image_dir=image_dir,
+                             image_size=10, as_image=True)
+        assert cache_lib.get_thumbnail_cache() is cache
+        assert cache.cache_info().misses == len(image_list)
+
+    assert cache_lib.get_thumbnail_cache() is None
+
+
+def test_thumbnail_cache_shared_dir(tmpdir):
+    image = np.zeros((10, 10, 3), dtype=np.uint8)
+    cache = cache_lib.ThumbnailCache(cache_dir=str(tmpdir), max_size=2000)
+    cache.put('a' * 40, image)
+    entry_size = cache.cache_info().currsize
+
+    # thumbnails written by another process are accounted for once read.
+    other_cache = cache_lib.ThumbnailCache(cache_dir=str(tmpdir))
+    for key in ['b' * 40, 'c' * 40, 'd' * 40]:
+        other_cache.put(key, image)
+        assert cache.get(key) is not None
+    assert cache.cache_info().currsize == 4 * entry_size
+
+    # the least recently used thumbnail is evicted.
+    cache.put('e' * 40, image)
+    assert cache.cache_info().currsize <= 2000
+    assert cache.get('a' * 40) is None
+
+    # reading from a new cache does not walk the cache directory.
+    new_cache = cache_lib.ThumbnailCache(cache_dir=str(tmpdir))
+    assert new_cache.get('e' * 40) is not None
+    assert new_cache._entries is None
@@ -0,0 +1,28 @@
+import numpy as np
+
+from mosaic.datasets.base import load_cached_arrays
+
+
+def test_load_cached_arrays(tmpdir):
+    images = np.arange(2 * 3 * 4 * 5, dtype=np.uint8).reshape(2, 5, 3, 4)
+    images = images.transpose(0, 2, 3, 1)
+    labels = np.array(['cat', 'dog'])
+    calls = []
+
+    def load_arrays():
+        calls.append(True)
+        return images, labels
+
+    for _ in range(2):
+        cached_images, cached_labels = load_cached_arrays(
+            'toy', load_arrays, data_home=str(tmpdir))
+
+        assert isinstance(cached_images, np.memmap)
+        assert cached_images.flags['C_CONTIGUOUS']
+        np.testing.assert_array_equal(cached_images, images)
+        np.testing.assert_array_equal(cached_labels, labels)
+
+    # the dataset is only decoded once.
+    assert len(calls) == 1
+    assert sorted(tmpdir.listdir()) == [tmpdir.join('toy_images.npy'),
+                                        tmpdir.join('toy_labels.npy')]
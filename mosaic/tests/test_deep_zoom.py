@@ -0,0 +1,119 @@
+import os
+
+import numpy as np
+import pytest
+
+from PIL import Image as pil_image
+
+from mosaic import deep_zoom_grid
+from mosaic import features
+from mosaic import image_io
+from mosaic.grid.deep_zoom import halve_rows, tile_bounds, write_deep_zoom
+from mosaic.grid.image_grid import array_to_grid
+
+
+def read_level(tile_dir, level, tile_size, overlap):
+    """Stitch the tiles of a level back together without their overlap."""
+    level_dir = os.path.join(tile_dir, str(level))
+    n_cols = 1 + max(int(f.split('_')[0]) for f in os.listdir(level_dir))
+    n_rows = 1 + max(int(f.split('_')[1].split('.')[0]) for
+                     f in os.listdir(level_dir))
+
+    rows = []
+    for row in range(n_rows):
+        tiles = []
+        for col in range(n_cols):
+            tile = np.asarray(pil_image.open(
+                os.path.join(level_dir, '{}_{}.png'.format(col, row))))
+            top = overlap if row else 0
+            left = overlap if col else 0
+            tiles.append(tile[top:top + tile_size, left:left + tile_size])
+        rows.append(np.concatenate(tiles, axis=1))
+    return np.concatenate(rows, axis=0)
+
+
+@pytest.mark.parametrize('n_samples, padding', [(1, None), (10, 1), (30, 2)])
+def test_deep_zoom_grid(tmpdir, n_samples, padding):
+    images = np.random.RandomState(0).randint(
+        0, 256, size=(n_samples, 7, 5, 3)).astype(np.uint8)
+    output = str(tmpdir.join('grid.dzi'))
+
+    assert deep_zoom_grid(output, images=images, padding=padding,
+                          tile_size=8, overlap=1, tile_format='png') == output
+
+    expected = array_to_grid(images, padding=padding)
+    with open(output) as dzi_file:
+        manifest = dzi_file.read()
+    assert 'Width="{}"'.format(expected.shape[1]) in manifest
+    assert 'Height="{}"'.format(expected.shape[0]) in manifest
+    assert 'TileSize="8"' in manifest
+
+    tile_dir = str(tmpdir.join('grid_files'))
+    max_level = int(np.ceil(np.log2(max(expected.shape[:2]))))
+    assert sorted(map(int, os.listdir(tile_dir))) == list(
+        range(max_level + 1))
+
+    for level in range(max_level, -1, -1):
+        np.testing.assert_array_equal(
+            read_level(tile_dir, level, tile_size=8, overlap=1), expected)
+
+        # the overlap is copied from the neighboring tiles.
+        if expected.shape[1] > 8:
+            tile = np.asarray(pil_image.open(
+                os.path.join(tile_dir, str(level), '1_0.png')))
+            left, right = tile_bounds(1, expected.shape[1], 8, 1)
+            top, bottom = tile_bounds(0, expected.shape[0], 8, 1)
+            np.testing.assert_array_equal(
+                tile, expected[top:bottom, left:right])
+
+        expected = halve_rows(expected)
+
+
+def test_write_deep_zoom_streams_strips(tmpdir):
+    image = np.random.RandomState(0).randint(
+        0, 256, size=(37, 21, 3)).astype(np.uint8)
+    strips = (image[start:start + 3] for start in range(0, 37, 3))
+
+    output = write_deep_zoom(strips, 21, 37, str(tmpdir.join('image')),
+                             tile_size=16, overlap=2, tile_format='png')
+
+    assert output.endswith('image.dzi')
+    np.testing.assert_array_equal(
+        read_level(str(tmpdir.join('image_files')), 6, 16, 2), image)
+    np.testing.assert_array_equal(
+        read_level(str(tmpdir.join('image_files')), 0, 16, 2),
+        halve_rows(halve_rows(halve_rows(halve_rows(halve_rows(
+            halve_rows(image)))))))
+
+    with pytest.raises(ValueError):
+        write_deep_zoom([], 1, 1, str(tmpdir.join('bad')), tile_format='gif')
+
+
+def test_deep_zoom_grid_sort_by_hsv_stays_lazy(rgb_image_data, tmpdir,
+                                               monkeypatch):
+    image_dir, image_list = rgb_image_data
+    images = image_io.load_images(image_list, image_dir=image_dir,
+                                  image_size=6, cache=False)
+    hsv = features.extract_hsv_stats(images)
+    expected = array_to_grid(images[np.argsort(hsv[:, 0])], padding=1)
+
+    # the images are only decoded while the rows of the grid are written.
+    largest_batch = []
+    load_images = image_io.load_images
+
+    def counting_load_images(image_files, *args, **kwargs):
+        largest_batch.append(len(image_files))
+        return load_images(image_files, *args, **kwargs)
+
+    monkeypatch.setattr(image_io, 'load_images', counting_load_images)
+
+    output = str(tmpdir.join('grid.dzi'))
+    deep_zoom_grid(output, images=list(image_list), image_dir=image_dir,
+                   image_size=6, sort_by=features.HUE, padding=1,
+                   tile_size=256, tile_format='png')
+
+    assert max(largest_batch) < len(image_list)
+    max_level = int(np.ceil(np.log2(max(expected.shape[:2]))))
+    np.testing.assert_array_equal(
+        read_level(str(tmpdir.join('grid_files')), max_level, 256, 1),
+        expected)
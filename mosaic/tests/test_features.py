@@ -0,0 +1,184 @@
+import os
+
+import numpy as np
+import pytest
+import skimage
+
+from mosaic import features
+from mosaic import image_io
+from mosaic.features import hsv
+
+
+@pytest.mark.parametrize('backend', ['threading', 'loky'])
+def test_extract_hsv_stats_from_files(rgb_image_data, backend):
+    image_dir, image_list = rgb_image_data
+    images = image_io.load_images(image_list, image_dir=image_dir,
+                                  image_size=10, cache=False)
+    hsv = features.extract_hsv_stats(images, mode='median',
+                                     background='white')
+
+    file_hsv = features.extract_hsv_stats_from_files(
+        image_list, image_dir=image_dir, image_size=10, mode='median',
+        background='white', n_jobs=2, backend=backend)
+
+    np.testing.assert_allclose(file_hsv, hsv)
+
+
+def skimage_hsv_stats(image, agg_func, background=None):
+    from skimage import color
+
+    hsv = color.rgb2hsv(image).reshape(-1, 3)
+    if background is None:
+        return agg_func(hsv, axis=0)
+
+    stats = []
+    for channel in range(3):
+        values = hsv[hsv[:, channel] != background[channel], channel]
+        stats.append(agg_func(values) if values.size else
+                     background[channel])
+    return stats
+
+
+@pytest.mark.parametrize('mode', ['mean', 'median'])
+@pytest.mark.parametrize('background', [None, 'white', 'black'])
+def test_extract_hsv_stats_matches_skimage(mode, background):
+    rng = np.random.RandomState(0)
+    images = rng.randint(0, 256, size=(20, 8, 8, 3)).astype(np.uint8)
+    # ties between channels and images that are all background.
+    images[:5] = rng.randint(0, 3, size=(5, 8, 8, 3)) * 127
+    images[5] = 255
+    images[6] = 0
+
+    agg_func, background_hsv = hsv.check_hsv_params(mode, background)
+    # medians with a background are computed from histograms of the
+    # quantized channels.
+    atol = 1e-6
+    if mode == 'median' and background is not None:
+        atol = 0.5 / hsv.HISTOGRAM_LEVELS
+    expected = np.array([skimage_hsv_stats(image, agg_func, background_hsv)
+                         for image in images])
+
+    np.testing.assert_allclose(
+        features.extract_hsv_stats(images, mode=mode, background=background),
+        expected, atol=atol)
+    np.testing.assert_allclose(
+        features.extract_hsv_stats(list(images[..., 0]), mode=mode,
+                                   background=background),
+        [skimage_hsv_stats(np.repeat(image[..., np.newaxis], 3, axis=-1),
+                           agg_func, background_hsv) for
+         image in images[..., 0]], atol=atol)
+
+
+def test_histogram_median():
+    rng = np.random.RandomState(0)
+    codes = rng.randint(0, 11, size=(3, 6, 25))
+    codes[:, 0, ::2] = 10
+    codes[:, 1] = 10
+
+    np.testing.assert_allclose(hsv.histogram_median(codes, levels=10),
+                               np.median(codes, axis=-1) / 10.)
+
+    background = np.array([10, 10, 10])
+    expected = [[np.median(row[row != 10]) / 10. if np.any(row != 10) else
+                 np.nan for row in channel] for channel in codes]
+    np.testing.assert_allclose(
+        hsv.histogram_median(codes, levels=10, background=background),
+        expected)
+
+
+def test_histogram_median_matches_median():
+    """The histogram median used with a background agrees with the
+    exact median used without one."""
+    rng = np.random.RandomState(1)
+    images = rng.randint(0, 256, size=(10, 9, 7, 3)).astype(np.uint8)
+    images[:3] = rng.randint(0, 3, size=(3, 9, 7, 3)) * 127
+
+    codes = hsv.quantize_hsv(images).reshape(3, images.shape[0], -1)
+    np.testing.assert_allclose(
+        hsv.histogram_median(codes).T,
+        hsv.hsv_features_batch(images, agg_func=np.median),
+        atol=0.5 / hsv.HISTOGRAM_LEVELS)
+
+
+def test_feature_store(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    store = features.FeatureStore(store_dir=str(tmpdir))
+    expected = features.extract_hsv_stats_from_files(
+        image_list, image_dir=image_dir, image_size=10, mode='median')
+
+    hsv_stats = store.hsv_stats(image_list, image_dir=image_dir,
+                                image_size=10, mode='median')
+    np.testing.assert_allclose(hsv_stats, expected)
+    assert (store.hits, store.misses) == (0, len(image_list))
+
+    # only the files that are new or changed are computed again.
+    computed = []
+
+    def compute(paths):
+        computed.extend(paths)
+        return features.extract_hsv_stats_from_files(
+            paths, image_size=10, mode='median')
+
+    params = {'mode': 'median', 'background': None, 'image_size': [10, 10]}
+    changed = os.path.join(image_dir, image_list[0])
+    stat = os.stat(changed)
+    os.utime(changed, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    image_files = list(image_list[::-1]) + [image_list[0]]
+    hsv_stats = store.lookup(image_files, compute, 'hsv', params,
+                             image_dir=image_dir)
+
+    assert computed == [os.path.abspath(changed)]
+    np.testing.assert_allclose(hsv_stats,
+                               np.vstack([expected[::-1], expected[:1]]))
+    np.testing.assert_allclose(
+        store.hsv_stats(image_list, image_dir=image_dir, image_size=10,
+                        mode='median'), expected)
+    assert store.misses == len(image_list) + 2
+
+    # the statistics of different parameters are stored separately.
+    store.hsv_stats(image_list, image_dir=image_dir)
+    assert len(os.listdir(str(tmpdir))) == 2
+
+
+def test_feature_store_context(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    data = image_io.directory_to_dataframe(image_dir,
+                                           features=[features.HUE])
+
+    with features.feature_store(store_dir=str(tmpdir)) as store:
+        assert features.get_feature_store() is store
+        for _ in range(2):
+            stored = image_io.directory_to_dataframe(
+                image_dir, features=[features.HUE])
+            np.testing.assert_allclose(stored[features.HUE],
+                                       data[features.HUE])
+        assert store.hits == store.misses == len(image_list)
+
+    assert features.get_feature_store() is None
+
+
+def test_color_images_matches_color_image():
+    rng = np.random.RandomState(0)
+    images = rng.randint(0, 256, size=(6, 5, 4, 3)).astype(np.uint8)
+    labels = np.array([0, 1, 2, 1, 0, 2])
+    palette = [[1, 0, 0], [0.2, 0.6, 0.4], [0, 0, 0]]
+
+    expected = np.asarray([skimage.img_as_ubyte(
+        features.color_image(image, hue=palette[label])) for
+        image, label in zip(images, labels)])
+    np.testing.assert_array_equal(
+        features.color_images(images, labels, palette), expected)
+
+    # grayscale images and coloring in place.
+    gray = images[..., 0]
+    np.testing.assert_array_equal(
+        features.color_images(gray, labels, palette),
+        [skimage.img_as_ubyte(features.color_image(image,
+                                                   hue=palette[label])) for
+         image, label in zip(gray, labels)])
+    out = features.color_images(images, labels, palette, out=images)
+    assert out is images
+    np.testing.assert_array_equal(images, expected)
+
+    with pytest.raises(ValueError):
+        features.color_images(images, labels, palette, out=gray)
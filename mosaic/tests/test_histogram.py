@@ -0,0 +1,100 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from matplotlib import pyplot as plt
+from PIL import Image as pil_image
+
+from mosaic import image_histogram
+from mosaic import image_io
+from mosaic.histogram import (histogram_bins, histogram_canvas,
+                              images_to_histogram)
+
+
+def test_histogram_bins():
+    rng = np.random.RandomState(0)
+    x = rng.randn(500)
+    sort_by = rng.rand(500)
+
+    bin_edges, bins = histogram_bins(x, n_bins=7, sort_by=sort_by)
+
+    counts, expected_edges = np.histogram(x, bins=7)
+    np.testing.assert_allclose(bin_edges, expected_edges)
+    np.testing.assert_array_equal([len(index) for index in bins], counts)
+    for index, left, right in zip(bins, bin_edges, bin_edges[1:]):
+        assert np.all((x[index] >= left) & (x[index] <= right))
+        assert np.all(np.diff(sort_by[index]) >= 0)
+
+    _, capped = histogram_bins(x, n_bins=7, sort_by=sort_by, max_per_bin=10)
+    for index, capped_index in zip(bins, capped):
+        assert len(capped_index) == min(len(index), 10)
+        assert np.all(np.isin(capped_index, index))
+        assert np.all(np.diff(sort_by[capped_index]) >= 0)
+
+
+def test_histogram_canvas():
+    images = np.arange(5, dtype=np.uint8)[:, None, None, None] * np.ones(
+        (1, 2, 3, 3), dtype=np.uint8)
+    bins = [np.array([0, 1, 2]), np.array([], dtype=np.intp), np.array([4])]
+
+    canvas = histogram_canvas(images, bins)
+
+    assert canvas.shape == (6, 9, 4)
+    # the first image of a bin is at the bottom.
+    np.testing.assert_array_equal(canvas[::2, 0, 0], [2, 1, 0])
+    np.testing.assert_array_equal(canvas[:, 3:6, 3], 0)
+    np.testing.assert_array_equal(canvas[:4, 6:, 3], 0)
+    np.testing.assert_array_equal(canvas[4:, 6:, :3], 4)
+    np.testing.assert_array_equal(canvas[4:, 6:, 3], 255)
+
+
+def test_images_to_histogram_without_sort_by():
+    images = [pil_image.new('RGB', (2, 2), (i, i, i)) for i in range(4)]
+    x = np.array([0., 0., 1., 1.])
+
+    canvas = np.asarray(images_to_histogram(images, x, n_bins=2))
+
+    assert canvas.shape == (4, 4, 3)
+    np.testing.assert_array_equal(canvas[[2, 0], 0, 0], [0, 1])
+    np.testing.assert_array_equal(canvas[[2, 0], 2, 0], [2, 3])
+
+
+def test_image_histogram_max_per_bin(rgb_image_data, monkeypatch):
+    image_dir, image_list = rgb_image_data
+    decoded = []
+    decode_image = image_io.decode_image
+
+    def counting_decode_image(fp, *args, **kwargs):
+        decoded.append(fp)
+        return decode_image(fp, *args, **kwargs)
+
+    monkeypatch.setattr(image_io, 'decode_image', counting_decode_image)
+
+    x = np.array([0., 0., 0., 0., 0., 1., 1., 1.])
+    ax = image_histogram(x, images=list(image_list),
+                         image_dir=image_dir, image_size=4, n_bins=2,
+                         sort_by=None, max_per_bin=2)
+
+    assert len(decoded) == 4
+    assert len(ax.get_images()) == 1
+    assert ax.get_images()[0].get_array().shape == (8, 8, 4)
+    plt.close('all')
+
+
+@pytest.mark.parametrize('render', ['raster', 'artists'])
+def test_image_histogram_render(render):
+    images = np.random.RandomState(0).randint(
+        0, 256, size=(6, 4, 4, 3)).astype(np.uint8)
+    x = np.arange(6, dtype=np.float64)
+
+    ax = image_histogram(x, images=images, n_bins=3, sort_by=None,
+                         render=render)
+
+    assert ax.get_ylim() == (0, 2 * 5. / 3)
+    assert len(ax.get_images()) == (1 if render == 'raster' else 6)
+    plt.close('all')
+
+    with pytest.raises(ValueError):
+        image_histogram(x, images=images, render='pillow')
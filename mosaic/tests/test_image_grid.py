@@ -0,0 +1,67 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from matplotlib import pyplot as plt
+from PIL import Image as pil_image
+
+from mosaic import image_grid
+from mosaic.grid.image_grid import array_to_grid, images_to_grid
+from mosaic.lazy_images import LazyImageArray
+
+
+@pytest.mark.parametrize('n_samples', [1, 7, 9])
+@pytest.mark.parametrize('padding', [None, 3])
+@pytest.mark.parametrize('n_channels', [None, 3, 4])
+def test_array_to_grid_matches_pillow(n_samples, padding, n_channels):
+    shape = (n_samples, 5, 4) + ((n_channels,) if n_channels else ())
+    images = np.random.RandomState(0).randint(
+        0, 256, size=shape).astype(np.uint8)
+
+    expected = images_to_grid([pil_image.fromarray(img) for img in images],
+                              padding=padding)
+    grid = array_to_grid(images, padding=padding)
+
+    assert grid.dtype == np.uint8
+    np.testing.assert_array_equal(grid, np.asarray(expected))
+
+
+def test_array_to_grid_float_and_memmap(tmpdir):
+    images = np.random.RandomState(0).rand(5, 4, 4, 3)
+    expected = images_to_grid(
+        [pil_image.fromarray((img * 255).round().astype(np.uint8))
+         for img in images])
+    np.testing.assert_array_equal(array_to_grid(images), np.asarray(expected))
+
+    memmap = np.lib.format.open_memmap(str(tmpdir.join('images.npy')),
+                                       mode='w+', dtype=np.uint8,
+                                       shape=(5, 4, 4, 3))
+    memmap[:] = (images * 255).round().astype(np.uint8)
+    np.testing.assert_array_equal(
+        array_to_grid(memmap),
+        array_to_grid(np.asarray(memmap)))
+
+    with pytest.raises(ValueError):
+        array_to_grid(images[:0])
+
+
+def test_array_to_grid_lazy(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    images = LazyImageArray(image_list, image_dir=image_dir, image_size=6,
+                            cache=False)
+
+    np.testing.assert_array_equal(array_to_grid(images, padding=1),
+                                  array_to_grid(images[:], padding=1))
+
+
+def test_image_grid_arrays():
+    images = np.random.RandomState(0).randint(
+        0, 256, size=(6, 4, 4, 3)).astype(np.uint8)
+
+    ax = image_grid(images=images, padding=2)
+
+    grid = np.asarray(ax.get_images()[0].get_array())
+    np.testing.assert_array_equal(grid, array_to_grid(images, padding=2))
+    plt.close('all')
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mosaic import data_utils
+from mosaic import image_io
+from mosaic import image_store
+
+
+def test_build_image_store(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    store = image_store.build_image_store(str(tmpdir), images=image_list,
+                                          image_dir=image_dir,
+                                          image_size=10)
+    images = image_io.load_images(image_list, image_dir=image_dir,
+                                  image_size=10, cache=False)
+
+    store = image_store.open_image_store(str(tmpdir))
+    assert isinstance(store.images, np.memmap)
+    assert store.image_size == (10, 10)
+    np.testing.assert_array_equal(store.images, images)
+    np.testing.assert_array_equal(store.index['width'], 20)
+    assert store.index['offset'][1] - store.index['offset'][0] == 300
+
+
+def test_build_image_store_opens_files_once(rgb_image_data, tmpdir,
+                                            monkeypatch):
+    image_dir, image_list = rgb_image_data
+    opened = []
+    open_image = image_store.pil_image.open
+
+    def counting_open(fp, *args, **kwargs):
+        opened.append(fp)
+        return open_image(fp, *args, **kwargs)
+
+    monkeypatch.setattr(image_store.pil_image, 'open', counting_open)
+    store = image_store.build_image_store(str(tmpdir), images=image_list,
+                                          image_dir=image_dir,
+                                          image_size=10, fast_decode=True)
+
+    assert len(opened) == len(image_list)
+    np.testing.assert_array_equal(store.index['height'], 20)
+
+
+def test_build_image_store_from_dataframe(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    data = pd.DataFrame({'path': image_list[::-1]})
+    store = image_store.build_image_store(str(tmpdir), images='path',
+                                          data=data, image_dir=image_dir,
+                                          image_size=10, n_jobs=2)
+
+    assert list(store.index['image_path']) == image_list[::-1]
+
+    # a string always names a variable in `data`.
+    with pytest.raises(ValueError, match='no `data`'):
+        image_store.build_image_store(str(tmpdir), images='path',
+                                      image_dir=image_dir, image_size=10)
+
+
+def test_load_images_from_store(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    store = image_store.build_image_store(str(tmpdir), image_dir=image_dir,
+                                          image_size=10)
+    images = image_io.load_images(image_list[:3], image_dir=image_dir,
+                                  image_size=10, cache=False)
+
+    np.testing.assert_array_equal(
+        image_io.load_images(image_list[:3], image_dir=image_dir,
+                             store=store),
+        images)
+    assert len(image_io.load_from_directory(image_dir, store=store)) == 8
+    np.testing.assert_array_equal(
+        data_utils.get_images(None, store, index=[0, 1]), store.images[:2])
+
+    with pytest.raises(ValueError):
+        image_io.load_images(image_list, image_dir=image_dir,
+                             image_size=5, store=store)
+
+    with pytest.raises(KeyError):
+        image_io.load_images(['missing.jpeg'], image_dir=image_dir,
+                             store=store)
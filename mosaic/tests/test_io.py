@@ -1,3 +1,11 @@
+import os
+
+import numpy as np
+import pytest
+import PIL.Image as pil_image
+
+from mosaic import data_utils
+from mosaic import features
 from mosaic import image_io
 
 
@@ -23,3 +31,200 @@ def test_load_from_directory(rgb_image_data):
                                           as_image=True)
 
     assert len(images) == len(image_list)
+
+
+def test_load_image_fast_decode(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    image = image_io.load_image(image_list[0],
+                                image_dir=image_dir,
+                                image_size=(5, 4),
+                                cache=False)
+    fast_image = image_io.load_image(image_list[0],
+                                     image_dir=image_dir,
+                                     image_size=(5, 4),
+                                     fast_decode=True,
+                                     cache=False)
+
+    assert fast_image.shape == image.shape == (5, 4, 3)
+    assert np.abs(fast_image.astype(int) - image).mean() < 10
+
+
+def test_load_image_fast_decode_bomb(rgb_image_data, monkeypatch):
+    image_dir, image_list = rgb_image_data
+    monkeypatch.setattr(pil_image, 'MAX_IMAGE_PIXELS', 100)
+
+    with pytest.raises(pil_image.DecompressionBombError):
+        image_io.load_image(image_list[0],
+                            image_dir=image_dir,
+                            image_size=2,
+                            fast_decode=True,
+                            cache=False)
+
+
+def test_load_images_shared_memory(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    images = image_io.load_images(image_list,
+                                  image_dir=image_dir,
+                                  image_size=10,
+                                  cache=False)
+    shared_images = image_io.load_images(image_list,
+                                         image_dir=image_dir,
+                                         image_size=10,
+                                         shared_memory=True,
+                                         n_jobs=2,
+                                         backend='loky',
+                                         cache=False)
+
+    assert isinstance(shared_images, np.memmap)
+    assert not os.path.exists(shared_images.filename)
+    np.testing.assert_array_equal(images, shared_images)
+
+
+def test_load_images_shared_memory_mixed_sizes(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    pil_image.new('RGB', (5, 5)).save(str(tmpdir.join('small.png')))
+    image_files = [os.path.join(image_dir, image_list[0]),
+                   str(tmpdir.join('small.png'))]
+
+    with pytest.raises(ValueError):
+        image_io.load_images(image_files, shared_memory=True, cache=False)
+
+
+def test_iter_images(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    images = image_io.load_images(image_list,
+                                  image_dir=image_dir,
+                                  image_size=10,
+                                  cache=False)
+
+    batches = list(image_io.iter_images(image_list,
+                                        image_dir=image_dir,
+                                        batch_size=3,
+                                        image_size=10,
+                                        cache=False))
+
+    assert [len(batch.images) for batch in batches] == [3, 3, 2]
+    assert sum([batch.image_files for batch in batches], []) == image_list
+    np.testing.assert_array_equal(
+        np.concatenate([batch.indices for batch in batches]),
+        np.arange(len(image_list)))
+    np.testing.assert_array_equal(
+        np.concatenate([batch.images for batch in batches]), images)
+
+
+def test_iter_images_early_exit(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    batches = image_io.iter_images(image_list,
+                                   image_dir=image_dir,
+                                   batch_size=1,
+                                   cache=False)
+    batch = next(batches)
+    batches.close()
+
+    assert batch.image_files == image_list[:1]
+
+
+def test_iter_images_error(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    with pytest.raises(IOError):
+        list(image_io.iter_images(image_list + ['missing.jpeg'],
+                                  image_dir=image_dir,
+                                  batch_size=4,
+                                  cache=False))
+
+
+def test_directory_to_dataframe_features(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    data = image_io.directory_to_dataframe(
+        image_dir, features=[features.SATURATION], n_jobs=1, batch_size=3)
+
+    images = image_io.load_images(data['image_path'], image_dir=image_dir,
+                                  cache=False)
+    hsv = features.extract_hsv_stats(images)
+    np.testing.assert_allclose(data[features.SATURATION], hsv[:, 1])
+
+
+def test_reservoir_sample():
+    sample = image_io.reservoir_sample(range(100), 10, random_state=1)
+    assert len(set(sample)) == 10
+    assert sample == image_io.reservoir_sample(range(100), 10, random_state=1)
+    assert image_io.reservoir_sample(range(5), 10) == list(range(5))
+    assert image_io.reservoir_sample(range(5), 0) == []
+
+    # every item is equally likely to be sampled
+    counts = np.zeros(20)
+    for seed in range(2000):
+        counts[image_io.reservoir_sample(range(20), 5, random_state=seed)] += 1
+    np.testing.assert_allclose(counts / 2000., 0.25, atol=0.05)
+
+
+def test_load_from_directory_reservoir(rgb_image_data):
+    image_dir, image_list = rgb_image_data
+    images = image_io.load_from_directory(image_dir,
+                                          n_samples=3,
+                                          sampling='reservoir',
+                                          random_state=0,
+                                          n_jobs=2)
+    assert images.shape == (3, 20, 20, 3)
+
+    same_images = image_io.load_from_directory(image_dir,
+                                               n_samples=3,
+                                               sampling='reservoir',
+                                               random_state=0)
+    np.testing.assert_array_equal(images, same_images)
+
+    with pytest.raises(ValueError):
+        image_io.load_from_directory(image_dir, sampling='bootstrap')
+
+    # options the reservoir sampler cannot honor are rejected.
+    for kwargs in [{'shared_memory': True}, {'backend': 'threading'},
+                   {'manifest_path': 'manifest.json'}]:
+        with pytest.raises(ValueError, match=list(kwargs)[0]):
+            image_io.load_from_directory(image_dir, n_samples=3,
+                                         sampling='reservoir', **kwargs)
+
+
+def test_probe_images(rgb_image_data, tmpdir):
+    image_dir, image_list = rgb_image_data
+    probe = image_io.probe_images(image_list, image_dir=image_dir)
+
+    assert list(probe.columns) == ['image_path', 'width', 'height', 'mode',
+                                   'format', 'orientation']
+    assert list(probe['image_path']) == image_list
+    assert (probe['width'] == 20).all() and (probe['height'] == 20).all()
+    assert (probe['format'] == 'JPEG').all()
+    assert image_io.estimate_memory(probe) == len(image_list) * 20 * 20 * 3
+    assert image_io.estimate_memory(probe, image_size=10) == (
+        len(image_list) * 10 * 10 * 3)
+
+    exif = pil_image.Exif()
+    exif[image_io.EXIF_ORIENTATION] = 6
+    pil_image.new('L', (4, 2)).save(str(tmpdir.join('rotated.jpeg')),
+                                    exif=exif)
+    pil_image.new('RGB', (5, 5)).save(str(tmpdir.join('small.png')))
+
+    probe = image_io.probe_images(str(tmpdir), n_jobs=2)
+    assert list(probe['image_path']) == ['rotated.jpeg', 'small.png']
+    assert list(probe['orientation']) == [6, 1]
+    assert list(probe['mode']) == ['L', 'RGB']
+
+    with pytest.raises(ValueError):
+        image_io.check_equal_sizes(probe)
+
+
+def test_get_images_mixed_sizes(tmpdir):
+    pil_image.new('RGB', (4, 4)).save(str(tmpdir.join('a.png')))
+    pil_image.new('RGB', (5, 5)).save(str(tmpdir.join('b.png')))
+
+    with pytest.raises(ValueError, match='same width and height'):
+        data_utils.get_images(None, ['a.png', 'b.png'],
+                              image_dir=str(tmpdir))
+
+    images = data_utils.get_images(None, ['a.png', 'b.png'],
+                                   image_dir=str(tmpdir), image_size=3)
+    assert images.shape == (2, 3, 3, 3)
+
+    # a list of PIL Images is not stacked, so it may mix sizes.
+    pil_images = data_utils.get_images(None, ['a.png', 'b.png'],
+                                       image_dir=str(tmpdir), as_image=True)
+    assert [img.size for img in pil_images] == [(4, 4), (5, 5)]
@@ -0,0 +1,73 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+
+from matplotlib import pyplot as plt
+
+from mosaic import image_io
+from mosaic import scatter_plot
+from mosaic.lazy_images import LazyImageArray
+
+
+def count_decodes(monkeypatch):
+    decoded = []
+    decode_image = image_io.decode_image
+
+    def counting_decode_image(fp, *args, **kwargs):
+        decoded.append(fp)
+        return decode_image(fp, *args, **kwargs)
+
+    monkeypatch.setattr(image_io, 'decode_image', counting_decode_image)
+    return decoded
+
+
+def test_lazy_image_array(rgb_image_data, monkeypatch):
+    image_dir, image_list = rgb_image_data
+    expected = image_io.load_images(image_list, image_dir=image_dir,
+                                    image_size=10, cache=False)
+
+    decoded = count_decodes(monkeypatch)
+    images = LazyImageArray(image_list, image_dir=image_dir,
+                            image_size=10, cache=False)
+    assert images.shape == (8, 10, 10, 3)
+    assert len(images) == 8
+    assert not decoded
+
+    np.testing.assert_array_equal(images[3], expected[3])
+    assert len(decoded) == 1
+
+    np.testing.assert_array_equal(images[[1, 5]], expected[[1, 5]])
+    np.testing.assert_array_equal(images[2:4], expected[2:4])
+    np.testing.assert_array_equal(images[np.arange(8) < 2], expected[:2])
+    assert len(decoded) == 7
+
+    subset = images.subset([7, 0])
+    assert len(decoded) == 7
+    np.testing.assert_array_equal(np.asarray(subset), expected[[7, 0]])
+    np.testing.assert_array_equal(np.stack(list(images)), expected)
+    assert images[[]].shape == (0, 10, 10, 3)
+
+
+def test_lazy_image_array_probes_shape(rgb_image_data, img_w, img_h):
+    image_dir, image_list = rgb_image_data
+    images = LazyImageArray(image_list, image_dir=image_dir, as_image=True)
+
+    assert images.shape == (8, img_h, img_w, 3)
+    assert images[0].size == (img_w, img_h)
+
+
+def test_scatter_plot_only_decodes_shown_images(rgb_image_data,
+                                                monkeypatch):
+    image_dir, image_list = rgb_image_data
+    decoded = count_decodes(monkeypatch)
+
+    # the first four points are within the threshold of each other.
+    x = np.array([0., 0.01, 0.02, 0.03, 1., 2., 3., 4.])
+    y = np.linspace(0, 1, 8)
+    ax = scatter_plot(x, y, images=image_list, image_dir=image_dir,
+                      image_size=10, threshold=0.5, color=[1., 0., 0.])
+
+    assert len(ax.artists) == 5
+    assert len(decoded) == 5
+    plt.close('all')
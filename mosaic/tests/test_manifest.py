@@ -0,0 +1,79 @@
+import os
+
+import PIL.Image as pil_image
+
+from mosaic import image_io
+from mosaic import manifest
+
+
+def make_tree(root):
+    os.makedirs(os.path.join(root, 'a', 'b'))
+    os.makedirs(os.path.join(root, 'c'))
+    for image_file in ['top.png', 'UPPER.JPG',
+                       os.path.join('a', 'a.jpeg'),
+                       os.path.join('a', 'b', 'b.png'),
+                       os.path.join('c', 'c.png')]:
+        pil_image.new('RGB', (4, 4)).save(os.path.join(root, image_file))
+    with open(os.path.join(root, 'notes.txt'), 'w') as f:
+        f.write('not an image')
+
+
+def test_iter_directory(tmpdir):
+    root = str(tmpdir)
+    make_tree(root)
+
+    image_files = [image_file for image_file, _, _ in
+                   manifest.iter_directory(root, recursive=False)]
+    assert image_files == ['UPPER.JPG', 'top.png']
+
+    image_files = [image_file for image_file, _, _ in
+                   manifest.iter_directory(root)]
+    assert image_files == ['UPPER.JPG', 'top.png',
+                           os.path.join('a', 'a.jpeg'),
+                           os.path.join('a', 'b', 'b.png'),
+                           os.path.join('c', 'c.png')]
+
+
+def test_manifest_incremental_update(tmpdir):
+    root = str(tmpdir.mkdir('images'))
+    make_tree(root)
+
+    images = manifest.DirectoryManifest(root)
+    assert images.update() == 4
+    assert len(images) == 5
+    assert images.update() == 0
+
+    pil_image.new('RGB', (4, 4)).save(os.path.join(root, 'a', 'b', 'new.png'))
+    os.remove(os.path.join(root, 'c', 'c.png'))
+    assert images.update() == 2
+
+    data = images.to_dataframe()
+    assert set(data['image_path']) == {
+        'UPPER.JPG', 'top.png', os.path.join('a', 'a.jpeg'),
+        os.path.join('a', 'b', 'b.png'), os.path.join('a', 'b', 'new.png')}
+    assert (data['size'] > 0).all()
+
+
+def test_scan_directory_manifest_path(tmpdir):
+    root = str(tmpdir.mkdir('images'))
+    make_tree(root)
+    manifest_path = str(tmpdir.join('manifest.json'))
+
+    data = manifest.scan_directory(root, manifest_path=manifest_path)
+    assert os.path.exists(manifest_path)
+
+    saved = manifest.DirectoryManifest.load(manifest_path)
+    assert saved.update() == 0
+    assert saved.to_dataframe().equals(data)
+
+
+def test_directory_to_dataframe_recursive(tmpdir):
+    root = str(tmpdir)
+    make_tree(root)
+
+    data = image_io.directory_to_dataframe(root)
+    assert list(data['image_path']) == ['UPPER.JPG', 'top.png']
+
+    data = image_io.directory_to_dataframe(root, recursive=True)
+    assert len(data) == 5
+    assert len(image_io.load_from_directory(root, recursive=True)) == 5
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from mosaic import image_io
+from mosaic import parallel
+
+
+def test_select_load_backend(rgb_image_data, monkeypatch):
+    image_dir, image_list = rgb_image_data
+
+    assert parallel.select_load_backend(
+        image_list, image_dir, n_jobs=2, backend='loky') == 'loky'
+    assert parallel.select_load_backend(
+        image_list, image_dir, n_jobs=2, as_image=True) == 'threading'
+    assert parallel.select_load_backend(
+        image_list, image_dir, n_jobs=2) == 'threading'
+
+    monkeypatch.setattr(parallel, 'SMALL_FILE_SIZE', 0)
+    assert parallel.select_load_backend(
+        image_list, image_dir, n_jobs=2) == 'loky'
+
+    with pytest.raises(ValueError):
+        parallel.select_load_backend(image_list, backend='dask')
+
+
+def test_select_feature_backend():
+    small_images = np.zeros((10, 8, 8, 3), dtype=np.uint8)
+    large_images = np.zeros((2, 256, 256, 3), dtype=np.uint8)
+
+    assert parallel.select_feature_backend(
+        small_images, n_jobs=2) == 'threading'
+    assert parallel.select_feature_backend(
+        list(small_images), n_jobs=2) == 'threading'
+    assert parallel.select_feature_backend(
+        large_images, n_jobs=2) == 'loky'
+
+
+@pytest.mark.parametrize('backend', ['threading', 'loky', 'auto'])
+def test_load_images_backend(rgb_image_data, backend):
+    image_dir, image_list = rgb_image_data
+    images = image_io.load_images(image_list, image_dir=image_dir,
+                                  cache=False)
+    parallel_images = image_io.load_images(image_list,
+                                           image_dir=image_dir,
+                                           n_jobs=2,
+                                           backend=backend,
+                                           cache=False)
+
+    np.testing.assert_array_equal(images, parallel_images)
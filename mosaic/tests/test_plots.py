@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from mosaic import plots
+
+
+@pytest.mark.parametrize('alpha', [1.0, 0.6])
+def test_composite_images_matches_sequential_drawing(alpha):
+    rng = np.random.RandomState(0)
+    images = rng.randint(0, 256, size=(30, 5, 4, 3)).astype(np.uint8)
+    rows = rng.randint(-3, 12, size=30)
+    cols = rng.randint(-3, 12, size=30)
+
+    canvas = plots.composite_images(images, rows, cols, (12, 14),
+                                    alpha=alpha, chunk_size=7)
+
+    # draw one image after the other with premultiplied colors.
+    color = np.zeros((12, 14, 3))
+    coverage = np.zeros((12, 14, 1))
+    for img, row, col in zip(plots.as_float_rgb(images), rows, cols):
+        for i in range(5):
+            for j in range(4):
+                if 0 <= row + i < 12 and 0 <= col + j < 14:
+                    color[row + i, col + j] = (
+                        alpha * img[i, j] +
+                        (1 - alpha) * color[row + i, col + j])
+                    coverage[row + i, col + j] = (
+                        alpha + (1 - alpha) * coverage[row + i, col + j])
+    color = np.where(coverage > 0, color / np.maximum(coverage, 1e-12), 0)
+
+    np.testing.assert_allclose(canvas[..., :3], color, atol=1e-5)
+    np.testing.assert_allclose(canvas[..., 3], coverage[..., 0], atol=1e-5)
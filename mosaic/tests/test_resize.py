@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from PIL import Image as pil_image
+
+from mosaic import data_utils
+from mosaic import resize
+
+
+@pytest.mark.parametrize('interp, resample', [
+    ('lanczos', pil_image.LANCZOS),
+    ('bicubic', pil_image.BICUBIC),
+    ('bilinear', pil_image.BILINEAR),
+    ('box', pil_image.BOX),
+])
+@pytest.mark.parametrize('image_size', [(10, 7), (32, 40), (60, 45)])
+def test_resize_images_matches_pillow(interp, resample, image_size):
+    rng = np.random.RandomState(0)
+    images = rng.randint(0, 256, size=(5, 37, 29, 3)).astype(np.uint8)
+
+    resized = resize.resize_images(images, image_size, interp=interp,
+                                   chunk_size=2, n_jobs=2)
+
+    expected = np.stack([
+        np.asarray(pil_image.fromarray(img).resize(
+            (image_size[1], image_size[0]), resample)) for img in images])
+    assert resized.shape == expected.shape
+    assert resized.dtype == np.uint8
+    # Pillow rounds to 8 bits in between the two passes.
+    assert np.abs(resized.astype(int) - expected).max() <= 1
+
+
+def test_resize_images_grayscale():
+    images = np.full((4, 28, 28), 200, dtype=np.uint8)
+
+    resized = resize.resize_images(images, 14)
+    assert resized.shape == (4, 14, 14)
+    np.testing.assert_array_equal(resized, 200)
+
+
+def test_resize_images_unknown_interp():
+    with pytest.raises(ValueError):
+        resize.resize_images(np.zeros((1, 8, 8, 3)), 4, interp='nearest')
+
+
+def test_get_images_resizes_arrays():
+    images = np.random.RandomState(0).rand(3, 16, 16, 3)
+
+    resized = data_utils.get_images(None, images, image_size=8)
+    assert resized.shape == (3, 8, 8, 3)
+    assert resized.dtype == np.uint8
+
+    pil_images = data_utils.get_images(None, images, image_size=(8, 4),
+                                       as_image=True)
+    assert [img.size for img in pil_images] == [(4, 8)] * 3
+    np.testing.assert_array_equal(np.asarray(pil_images[0]),
+                                  data_utils.get_images(
+                                      None, images, image_size=(8, 4))[0])
+
+
+def test_resize_images_same_size_is_not_copied(tmpdir):
+    images = np.lib.format.open_memmap(str(tmpdir.join('images.npy')),
+                                       mode='w+', dtype=np.uint8,
+                                       shape=(3, 8, 8, 3))
+    images[:] = np.random.RandomState(0).randint(0, 256, size=images.shape)
+
+    assert np.shares_memory(resize.resize_images(images, 8), images)
+    assert np.shares_memory(
+        data_utils.get_images(None, images, image_size=8), images)
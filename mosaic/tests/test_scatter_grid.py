@@ -0,0 +1,60 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from matplotlib import pyplot as plt
+
+from mosaic import scatter_grid
+from mosaic.grid.scatter_grid import assign_grid_cells, grid_points
+
+
+def layout_cost(xy, image_order):
+    grid_2d = grid_points(len(image_order))
+    return np.linalg.norm(grid_2d - xy[image_order], axis=1).sum()
+
+
+@pytest.mark.parametrize('n_samples', [1, 7, 50, 1000])
+def test_greedy_assignments_agree(n_samples):
+    rng = np.random.RandomState(n_samples)
+    xy = rng.rand(n_samples, 2)
+
+    image_order = assign_grid_cells(xy, assignment='kdtree')
+    np.testing.assert_array_equal(
+        image_order, assign_grid_cells(xy, assignment='chunked'))
+    np.testing.assert_array_equal(np.sort(image_order), np.arange(n_samples))
+
+
+def test_greedy_assignments_agree_on_ties():
+    xy = np.round(np.random.RandomState(0).rand(500, 2), 1)
+    np.testing.assert_array_equal(
+        assign_grid_cells(xy, assignment='kdtree'),
+        assign_grid_cells(xy, assignment='chunked'))
+
+
+def test_optimal_assignment():
+    xy = np.random.RandomState(0).rand(200, 2)
+
+    image_order = assign_grid_cells(xy, assignment='optimal')
+    np.testing.assert_array_equal(np.sort(image_order), np.arange(200))
+    assert (layout_cost(xy, image_order) <=
+            layout_cost(xy, assign_grid_cells(xy)))
+
+    with pytest.raises(ValueError):
+        assign_grid_cells(xy, assignment='hungarian')
+
+
+def test_scatter_grid_places_every_image_once():
+    # 10 images do not fill a 4 x 4 grid.
+    images = np.arange(10, dtype=np.uint8)[:, None, None, None] * np.ones(
+        (1, 2, 2, 3), dtype=np.uint8)
+    rng = np.random.RandomState(0)
+
+    ax = scatter_grid(rng.rand(10), rng.rand(10), images=images)
+
+    grid = np.asarray(ax.get_images()[0].get_array())
+    values = grid[::2, ::2, 0].ravel()
+    np.testing.assert_array_equal(np.sort(values[:10]), np.arange(10))
+    np.testing.assert_array_equal(values[10:], 255)
+    plt.close('all')
@@ -0,0 +1,91 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+
+from matplotlib import pyplot as plt
+
+from mosaic import features
+from mosaic import scatter_plot
+from mosaic.scatter_plot import images_to_scatter, select_points
+
+
+def brute_force_select_points(xy, threshold):
+    shown = []
+    for i in range(xy.shape[0]):
+        if shown:
+            dist = np.sum((xy[i] - xy[shown]) ** 2, axis=1)
+            if np.min(dist) < threshold:
+                continue
+        shown.append(i)
+    return np.asarray(shown)
+
+
+@pytest.mark.parametrize('threshold', [1e-3, 0.01, 0.1, 1.0])
+def test_select_points(threshold):
+    rng = np.random.RandomState(42)
+    xy = rng.randn(2000, 2) * [1., 10.]
+
+    np.testing.assert_array_equal(
+        select_points(xy, threshold=threshold),
+        brute_force_select_points(xy, threshold))
+
+
+def test_select_points_no_threshold():
+    xy = np.zeros((5, 2))
+    np.testing.assert_array_equal(select_points(xy), np.arange(5))
+    assert select_points(xy, threshold=0.1).tolist() == [0]
+
+
+def test_scatter_plot_threshold_keeps_limits():
+    rng = np.random.RandomState(0)
+    images = rng.randint(0, 256, size=(500, 8, 8, 3)).astype(np.uint8)
+    x, y = rng.rand(500), rng.rand(500)
+
+    ax = scatter_plot(x, y, images=images, threshold=0.01,
+                      color=[0., 0., 1.])
+
+    assert len(ax.artists) == len(select_points(np.c_[x, y], 0.01))
+    assert ax.get_xlim() == (x.min(), x.max())
+    assert ax.get_ylim() == (y.min(), y.max())
+    plt.close('all')
+
+
+def test_scatter_plot_raster():
+    rng = np.random.RandomState(0)
+    images = np.full((200, 8, 8), 255, dtype=np.uint8)
+    x, y = rng.rand(200), rng.rand(200)
+
+    ax = scatter_plot(x, y, images=images, render='raster', alpha=1.0)
+
+    assert not ax.artists
+    assert len(ax.get_images()) == 1
+    assert ax.get_xlim() == (x.min(), x.max())
+    assert ax.get_ylim() == (y.min(), y.max())
+
+    canvas = ax.get_images()[0].get_array()
+    bbox = ax.get_window_extent()
+    assert canvas.shape == (round(bbox.height), round(bbox.width), 4)
+    assert np.all(canvas[canvas[..., 3] > 0, :3] == 1.)
+    plt.close('all')
+
+    with pytest.raises(ValueError):
+        scatter_plot(x, y, images=images, render='vector')
+
+
+def test_images_to_scatter_colors_mixed_sizes():
+    rng = np.random.RandomState(0)
+    images = [rng.randint(0, 256, size=(size, size, 3)).astype(np.uint8) for
+              size in (4, 5, 6)]
+    colors = [[1, 0, 0], [0, 1, 0], [1, 0, 0]]
+
+    ax = images_to_scatter(images, np.arange(3.), np.arange(3.),
+                           colors=colors)
+
+    shown = [artist.offsetbox.get_data() for artist in ax.artists]
+    assert [img.shape for img in shown] == [(4, 4, 3), (5, 5, 3), (6, 6, 3)]
+    np.testing.assert_array_equal(
+        shown[1], features.color_images(images[1][np.newaxis], [0],
+                                        [colors[1]])[0])
+    plt.close('all')